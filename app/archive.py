@@ -0,0 +1,39 @@
+import asyncio
+import os
+
+from app.services.storage.archive import PartitionArchiver
+from app.services.storage.connections import create_db_engine
+from app.services.storage.relational_storage import RelationalStorage
+from app.utils.log import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+
+async def run_archival() -> None:
+    """Keep future message partitions ready and archive the expired ones.
+
+    Meant to run periodically (e.g. a daily cron job). Months older than
+    `MESSAGE_RETENTION_MONTHS` are detached, exported to
+    `MESSAGE_ARCHIVE_DIR` as `MESSAGE_ARCHIVE_FORMAT` files and dropped.
+    Like setup, DDL runs over `DB_DIRECT_CONNECTION_STR` when set.
+    """
+    configure_logging()
+    direct_url = os.getenv("DB_DIRECT_CONNECTION_STR")
+    engine = create_db_engine(direct_url, pgbouncer=False) if direct_url else None
+    relational_storage = RelationalStorage(engine=engine)
+    try:
+        created = await relational_storage.partitions.ensure_partitions()
+        archived = await PartitionArchiver(relational_storage.partitions).archive_expired()
+        logger.info(
+            "archive.done",
+            partitions_created=len(created),
+            partitions_archived=len(archived),
+            rows_archived=sum(result["rows"] for result in archived),
+        )
+    finally:
+        await relational_storage.engine.dispose()
+
+
+if __name__ == "__main__":
+    """Run the archival job when executed as a script."""
+    asyncio.run(run_archival())
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+from app.domain.meta import MetaModel
+
+
+class ConversationContext(BaseModel):
+    """Everything the debate prompt needs from working memory for one turn.
+
+    `summary_cutoff` is the last message folded into `summary`, so the
+    history it already covers can be left out of the prompt.
+    """
+
+    meta: Optional[MetaModel] = None
+    history: List[Dict[str, str]] = Field(default_factory=list)
+    summary: Optional[str] = None
+    summary_cutoff: Optional[Dict[str, str]] = None
+
+    def unsummarized_history(self, last_n: int) -> List[Dict[str, str]]:
+        """Return the newest history entries not covered by the summary.
+
+        When the cutoff message is not among the newest `last_n` entries,
+        all of them came after it. A message repeated word for word is
+        matched at its first position, which errs on keeping entries.
+
+        Args:
+            last_n: Number of newest entries considered.
+
+        Returns:
+            list[dict]: Entries after the summary's cutoff, oldest first.
+        """
+        window = self.history[-last_n:] if last_n else list(self.history)
+        if not self.summary or not self.summary_cutoff:
+            return window
+        for index, entry in enumerate(window):
+            if entry == self.summary_cutoff:
+                return window[index + 1 :]
+        return window
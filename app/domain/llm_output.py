@@ -3,3 +3,11 @@ from pydantic import BaseModel, Field
 
 class AssistantReply(BaseModel):
     text: str
+
+
+class OpeningReply(BaseModel):
+    """Structured first-turn output: topic, stance and opening argument."""
+
+    topic: str
+    stance: str
+    argument: str = Field(..., min_length=1)
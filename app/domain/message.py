@@ -4,6 +4,11 @@ from datetime import datetime
 
 Role = Literal["user", "assistant", "system"]
 
+# One-letter role prefixes of the compact `<code>:<content>` encoding.
+ROLE_CODES = {"user": "u", "assistant": "a", "system": "s"}
+CODE_ROLES = {code: role for role, code in ROLE_CODES.items()}
+COMPACT_SEPARATOR = ":"
+
 
 class MessageModel(BaseModel):
     id: Optional[int] = None
@@ -16,4 +21,33 @@ class MessageModel(BaseModel):
     @computed_field
     @property
     def compact_version(self) -> str:
-        return f"{'u' if self.role=='user' else 'a' if self.role =='assistant' else 's'}:{self.content}"
+        return f"{ROLE_CODES.get(self.role, 's')}{COMPACT_SEPARATOR}{self.content}"
+
+    @classmethod
+    def from_compact(
+        cls,
+        compact: str,
+        *,
+        id: Optional[int] = None,
+        created_at: Optional[datetime] = None,
+    ) -> "MessageModel":
+        """Rebuild a message from its `compact_version`.
+
+        Only the first separator splits role from content, so content with
+        colons, newlines or no text at all round-trips unchanged.
+
+        Args:
+            compact: Text such as `u:hola` or `a:`.
+            id: Optional id to attach.
+            created_at: Optional timestamp to attach.
+
+        Returns:
+            MessageModel: The decoded message.
+
+        Raises:
+            ValueError: If the text does not start with a known role code.
+        """
+        code, separator, content = compact.partition(COMPACT_SEPARATOR)
+        if not separator or code not in CODE_ROLES:
+            raise ValueError(f"Not a compact message: {compact[:20]!r}")
+        return cls(id=id, role=CODE_ROLES[code], content=content, created_at=created_at)
@@ -1,5 +1,7 @@
+import asyncio
 import os
 import dotenv
+import openai
 from fastapi import (
     APIRouter,
     FastAPI,
@@ -10,16 +12,25 @@ from fastapi import (
     BackgroundTasks,
 )
 
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Any, Dict
+from starlette.background import BackgroundTask
+from typing import Any, AsyncIterator, Dict
 
 from app.services.storage.relational_storage import RelationalStorage
 from app.utils.message_adapter import (
     message_from_user_input,
 )
 
-from app.services.llm.openai_client import OpenAIClient
+from app.services.llm.router import LLMRouter
+from app.services.llm.scheduler import BACKGROUND, LLMScheduler
+from app.services.memory.local_cache import CacheInvalidationListener
+from app.services.memory.read_through_memory import ReadThroughMemory
+from app.services.memory.summary_memory import SummaryMemory
+from app.services.memory.topic_stance_cache import TopicStanceCache
 from app.services.memory.working_memory import WorkingMemory
+from app.services.persistence.write_behind import TurnQueue
+from app.services.storage.cache_stats import memory_usage_by_namespace
 
 
 from contextlib import asynccontextmanager
@@ -32,20 +43,37 @@ from app.services.llm.llm_io import LLMConversationMessage, LLMConversationReque
 
 from app.schemas.requests import ConversationRequest
 
-from app.schemas.responses import ConversationResponse, Turn
+from app.schemas.responses import ConversationResponse, StreamEvent, Turn
+from app.prompts.constants import DEGRADED_REPLY, UNAVAILABLE_REPLY
+from app.services.llm.openai_client import RETRYABLE_ERRORS
+from app.services.llm.router import NoBackendAvailable
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils import metrics
+from app.utils.log import configure_logging, get_logger, shutdown_logging
 
 
 dotenv.load_dotenv()
 security = HTTPBearer()
 API_KEY = os.getenv("API_KEY", "dev-leonardo-key")
+# Time budget of a debate turn, kept below the 30 s response-time target.
+CONVERSATION_DEADLINE_SECONDS = float(os.getenv("CONVERSATION_DEADLINE_SECONDS", 25))
+# Errors answered with a degraded reply instead of a 500: the deadline ran
+# out, or the LLM stayed unreachable after every retry and failover.
+DEGRADED_ERRORS = (DeadlineExceeded, NoBackendAvailable, *RETRYABLE_ERRORS)
+TIMEOUT_ERRORS = (DeadlineExceeded, asyncio.TimeoutError, openai.APITimeoutError)
+
+logger = get_logger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager to wire core services.
 
-    Initializes the relational storage, LLM client, and working memory and
-    exposes a `ConversationService` through the FastAPI app state.
+    Initializes the relational storage, LLM client, read-through working
+    memory, rolling summary memory and, unless `PERSISTENCE_MODE=direct`, the
+    write-behind turn queue, and exposes a `ConversationService` through the
+    FastAPI app state. In write-behind mode summaries are compacted by the
+    persistence worker instead of the API process.
 
     Args:
         app: The FastAPI application instance.
@@ -53,16 +81,44 @@ async def lifespan(app: FastAPI):
     Yields:
         None: Controls the startup/shutdown lifecycle.
     """
+    configure_logging()
     relational_storage = RelationalStorage()
-    llm = OpenAIClient()
-    working_memory = WorkingMemory()
+    app.state.relational_storage = relational_storage
+    llm = LLMScheduler(LLMRouter.from_env())
+    app.state.llm_scheduler = llm
+    redis_memory = WorkingMemory()
+    app.state.local_meta_cache = redis_memory.local_meta
+    invalidation_listener = None
+    if redis_memory.publish_invalidations:
+        invalidation_listener = CacheInvalidationListener(redis_memory.local_meta)
+        await invalidation_listener.start()
+    working_memory = ReadThroughMemory(redis_memory, relational_storage)
+    turn_queue = (
+        TurnQueue() if os.getenv("PERSISTENCE_MODE", "queue") == "queue" else None
+    )
+
+    app.state.topic_cache = TopicStanceCache()
+
+    summary_memory = SummaryMemory(
+        llm=llm.for_lane(BACKGROUND), store=relational_storage, cache=working_memory
+    )
 
     app.state.conversation_service = ConversationService(
-        llm=llm, store=relational_storage, cache=working_memory
+        llm=llm,
+        store=relational_storage,
+        cache=working_memory,
+        turn_queue=turn_queue,
+        summary=summary_memory if turn_queue is None else None,
+        topic_cache=app.state.topic_cache,
     )
 
     yield
 
+    if invalidation_listener is not None:
+        await invalidation_listener.stop()
+    await relational_storage.engine.dispose()
+    shutdown_logging()
+
 
 app = FastAPI(lifespan=lifespan)
 router = APIRouter()
@@ -105,6 +161,61 @@ async def get_author(_auth: bool = Depends(require_api_key)) -> Dict[str, str]:
     }
 
 
+@app.get("/admin/memory")
+async def admin_memory(
+    max_keys: int = 10000, _auth: bool = Depends(require_api_key)
+) -> Dict[str, Any]:
+    """Return Redis memory usage per key namespace and kind, for capacity planning."""
+    return await memory_usage_by_namespace(max_keys=max_keys)
+
+
+@app.get("/admin/topic-cache")
+async def admin_topic_cache(
+    request: Request, _auth: bool = Depends(require_api_key)
+) -> Dict[str, float]:
+    """Return hit/miss counters of the topic/stance extraction cache."""
+    return await request.app.state.topic_cache.stats()
+
+
+@app.get("/admin/meta-cache")
+async def admin_meta_cache(
+    request: Request, _auth: bool = Depends(require_api_key)
+) -> Dict[str, Any]:
+    """Return size and hit ratio of this process's in-memory topic/stance cache."""
+    return request.app.state.local_meta_cache.stats()
+
+
+@app.get("/admin/llm")
+async def admin_llm(
+    request: Request, _auth: bool = Depends(require_api_key)
+) -> Dict[str, Any]:
+    """Return LLM concurrency slots, queue times and backend health."""
+    scheduler = request.app.state.llm_scheduler
+    stats = scheduler.stats()
+    if isinstance(scheduler.llm, LLMRouter):
+        stats["backends"] = scheduler.llm.stats()
+    return stats
+
+
+@app.get("/admin/db")
+async def admin_db(
+    request: Request, _auth: bool = Depends(require_api_key)
+) -> Dict[str, Any]:
+    """Return the PostgreSQL connection pool utilization."""
+    return request.app.state.relational_storage.pool_status()
+
+
+@app.get("/metrics")
+async def prometheus_metrics(_auth: bool = Depends(require_api_key)) -> Response:
+    """Expose per-stage latencies, in-flight calls and LLM token usage.
+
+    Returns:
+        Response: Metrics in the Prometheus text exposition format.
+    """
+    payload, content_type = metrics.render()
+    return Response(content=payload, media_type=content_type)
+
+
 @app.post("/conversation", response_model=ConversationResponse)
 async def conversation(
     request: ConversationRequest,
@@ -120,18 +231,49 @@ async def conversation(
 
     conversation_id = request.conversation_id
     input_message = LLMConversationMessage(role="user", content=request.message)
+    deadline = Deadline(CONVERSATION_DEADLINE_SECONDS)
 
-    print(f"Conversation_id: {conversation_id}")
-    print(f"User message: {input_message}")
-
-    if not conversation_id:
-        print("Starting conversation")
-        input_message.role = "system"
-        conversation_id = await conversation_service.start_conversation(input_message)
-
-    response, llm_formated_response = await conversation_service.continue_conversation(
-        conversation_id, input_message
+    logger.info(
+        "conversation.turn",
+        conversation_id=conversation_id,
+        new=not conversation_id,
+        message_chars=len(request.message),
     )
+    logger.debug("conversation.message", content=request.message)
+
+    try:
+        if not conversation_id:
+            input_message.role = "system"
+            conversation_id, response, llm_formated_response = (
+                await conversation_service.open_conversation(
+                    input_message, deadline=deadline
+                )
+            )
+        else:
+            response, llm_formated_response = (
+                await conversation_service.continue_conversation(
+                    conversation_id, input_message, deadline=deadline
+                )
+            )
+    except DEGRADED_ERRORS as e:
+        # Answer now rather than hang; the turn is not persisted, so the user
+        # can simply resend it.
+        reason = _degraded_reason(e)
+        metrics.DEGRADED_TURNS.labels(reason).inc()
+        logger.warning(
+            "conversation.degraded",
+            conversation_id=conversation_id,
+            reason=reason,
+            elapsed_s=round(deadline.budget - deadline.remaining(), 1),
+            error=e,
+        )
+        reply = UNAVAILABLE_REPLY if reason == "unavailable" else DEGRADED_REPLY
+        return ConversationResponse(
+            conversation_id=conversation_id,
+            message=[{"role": "assistant", "content": reply}],
+            degraded=True,
+            degraded_reason=reason,
+        )
 
     bg.add_task(
         conversation_service.persist_conversation,
@@ -145,3 +287,81 @@ async def conversation(
     )
 
     return result
+
+
+@app.post("/conversation/stream")
+async def conversation_stream(
+    request: ConversationRequest,
+    _auth: bool = Depends(require_api_key),
+    conversation_service=Depends(get_conversation_service),
+):
+    """Debate turn streamed as Server-Sent Events.
+
+    Emits one `token` event per reply chunk and a final `done` event with the
+    same envelope `/conversation` returns. The turn is persisted once the
+    stream has been fully sent.
+    """
+    if not request.message:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Missing message field."
+        )
+
+    input_message = LLMConversationMessage(role="user", content=request.message)
+
+    deadline = Deadline(CONVERSATION_DEADLINE_SECONDS)
+
+    completed: Dict[str, Any] = {"conversation_id": request.conversation_id}
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            if not completed["conversation_id"]:
+                # Opening turns extract topic/stance first; a copy keeps the
+                # extraction prompt out of the streamed and persisted turn.
+                input_message.role = "system"
+                completed["conversation_id"] = await conversation_service.start_conversation(
+                    input_message.model_copy(), deadline=deadline
+                )
+            async for event in conversation_service.stream_conversation(
+                completed["conversation_id"], input_message, deadline=deadline
+            ):
+                if event.event == "done":
+                    completed["response"] = event.data
+                yield event.to_sse()
+        except DEGRADED_ERRORS as e:
+            reason = _degraded_reason(e)
+            metrics.DEGRADED_TURNS.labels(reason).inc()
+            reply = UNAVAILABLE_REPLY if reason == "unavailable" else DEGRADED_REPLY
+            yield StreamEvent(
+                event="error",
+                data={"detail": reply, "degraded": True, "degraded_reason": reason},
+            ).to_sse()
+        except Exception:
+            logger.exception(
+                "conversation.stream_failed",
+                conversation_id=completed["conversation_id"],
+            )
+            yield StreamEvent(
+                event="error", data={"detail": "Response generation failed."}
+            ).to_sse()
+
+    async def persist_after_stream() -> None:
+        if "response" not in completed:
+            return
+        last_message = completed["response"]["message"][-1]
+        await conversation_service.persist_conversation(
+            completed["conversation_id"],
+            input_message,
+            LLMConversationMessage(**last_message),
+        )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(persist_after_stream),
+    )
+
+
+def _degraded_reason(error: Exception) -> str:
+    """Tell a deadline overrun (`timeout`) from an LLM outage (`unavailable`)."""
+    return "timeout" if isinstance(error, TIMEOUT_ERRORS) else "unavailable"
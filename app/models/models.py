@@ -2,8 +2,7 @@
 from typing import Optional, List, Dict, Any
 from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, Enum as SAEnum
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Enum as SAEnum, Index, Text
 from datetime import datetime
 import uuid
 
@@ -23,16 +22,78 @@ class Conversation(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.now)
 
     messages: List["Message"] = Relationship(back_populates="conversation")
+    summaries: List["Summary"] = Relationship(back_populates="conversation")
 
 
 class Message(SQLModel, table=True):
-    """Single message belonging to a conversation (user or assistant)."""
+    """Single message belonging to a conversation (user or assistant).
 
-    id: Optional[int] = Field(default=None, primary_key=True)  # autoincrement
+    The table is range-partitioned by `created_at` into monthly partitions
+    (see `app.services.storage.partitions`), so writes and recent-history
+    reads only touch the small, hot partition indexes and old months can be
+    detached and archived. The primary key includes the partition key, as
+    PostgreSQL requires.
+
+    The composite index backs keyset-paginated history reads ordered by
+    `(created_at, id)` within a conversation. Messages written by the
+    persistence worker carry the turn id and their position in the turn;
+    the unique index on them makes a redelivered turn a no-op.
+    """
+
+    __table_args__ = (
+        Index(
+            "ix_message_conversation_id_created_at_id",
+            "conversation_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ux_message_turn_id_turn_position_created_at",
+            "turn_id",
+            "turn_position",
+            "created_at",
+            unique=True,
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Optional[int] = Field(
+        default=None, primary_key=True, sa_column_kwargs={"autoincrement": True}
+    )
     conversation_id: str = Field(foreign_key="conversation.id")
     role: RoleEnum
 
-    content: Dict[str, Any] = Field(sa_column=Column(JSONB))
-    created_at: datetime = Field(default_factory=datetime.now)
+    content: str = Field(sa_column=Column(Text, nullable=False))
+    turn_id: Optional[str] = None
+    turn_position: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.now, primary_key=True)
 
     conversation: "Conversation" = Relationship(back_populates="messages")
+
+
+class Summary(SQLModel, table=True):
+    """Versioned rolling summary of the older turns of a conversation.
+
+    Each version folds the messages up to `last_message_id` into a compact
+    text, so prompts can carry the summary plus a short recent window.
+    """
+
+    __table_args__ = (
+        Index(
+            "ix_summary_conversation_id_version",
+            "conversation_id",
+            "version",
+            unique=True,
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    conversation_id: str = Field(foreign_key="conversation.id")
+    version: int
+    summary: str
+    first_message_id: Optional[int] = None
+    last_message_id: int
+    tokens_estimate: int
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    conversation: "Conversation" = Relationship(back_populates="summaries")
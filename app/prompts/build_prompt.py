@@ -1,30 +1,213 @@
-from typing import Any, Dict, List, Optional
-from app.prompts.constants import CONVERSATION_PROMPT, NEW_CONVERSATION_PROMPT
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from app.prompts.constants import (
+    CONVERSATION_HISTORY_PROMPT,
+    CONVERSATION_SUMMARY_PROMPT,
+    CONVERSATION_SYSTEM_PROMPT,
+    CONVERSATION_TOPIC_PROMPT,
+    NEW_CONVERSATION_OPENING_PROMPT,
+    NEW_CONVERSATION_PROMPT,
+    SUMMARY_MERGE_PROMPT,
+)
+from app.prompts.token_budget import (
+    CHARS_PER_TOKEN,
+    MESSAGE_OVERHEAD_TOKENS,
+    PromptAssembly,
+    compact_text,
+    estimate_message_tokens,
+    truncate_to_tokens,
+)
+from app.services.llm.llm_io import LLMConversationMessage, LLMConversationRequest
+from app.utils.message_adapter import render_compact_history
+from app.utils.metrics import timed
 
 
 def build_conversation_prompt(
     topic_and_stance: Dict[str, str],
     redis_stored_messages: Optional[List[Dict[str, str]]],
+    messages_summary: Optional[str],
     last_message: Dict[str, str],
-) -> str:
-    """Compose the prompt for an ongoing debate turn.
+    max_input_tokens: Optional[int] = None,
+    history_format: Optional[str] = None,
+) -> LLMConversationRequest:
+    """Compose the chat request for an ongoing debate turn.
 
     Args:
         topic_and_stance: Dict with the debate topic and the bot's stance.
         redis_stored_messages: Recent short-term history (working memory).
         messages_summary: Optional long-term summary to compress context.
         last_message: Latest user message dict.
+        max_input_tokens: Input-token budget; see `assemble_conversation_prompt`.
+        history_format: History rendering; see `assemble_conversation_prompt`.
+
+    Returns:
+        LLMConversationRequest: Messages to send to the LLM.
+    """
+    return assemble_conversation_prompt(
+        topic_and_stance,
+        redis_stored_messages,
+        messages_summary,
+        last_message,
+        max_input_tokens=max_input_tokens,
+        history_format=history_format,
+    ).request
+
+
+@timed("prompt.build")
+def assemble_conversation_prompt(
+    topic_and_stance: Optional[Dict[str, str]],
+    redis_stored_messages: Optional[List[Dict[str, str]]],
+    messages_summary: Optional[str],
+    last_message: Dict[str, str],
+    max_input_tokens: Optional[int] = None,
+    history_format: Optional[str] = None,
+) -> PromptAssembly:
+    """Compose the debate request within an input-token budget.
+
+    Messages are ordered from most to least stable so provider-side prompt
+    caching can reuse the longest possible prefix: the static instructions,
+    the topic/stance of the conversation, the rolling summary (if any), the
+    history, and the last message. History goes as real `user`/`assistant`
+    messages or, in `compact` format, as a single message of `u:`/`a:` lines,
+    which saves the per-message framing tokens of every turn.
+
+    Instructions, topic/stance and the last message are always kept; the
+    remaining budget goes to history, newest message first, so the oldest
+    turns are dropped first. Whatever is left is given to the summary, which
+    is cut down to its most recent part if it does not fit.
+
+    Args:
+        topic_and_stance: Dict with the debate topic and the bot's stance.
+        redis_stored_messages: Recent short-term history, oldest first.
+        messages_summary: Optional long-term summary to compress context.
+        last_message: Latest user message dict.
+        max_input_tokens: Input-token budget (`PROMPT_MAX_INPUT_TOKENS`, 3000).
+        history_format: `messages` or `compact` (`PROMPT_HISTORY_FORMAT`,
+            messages).
 
     Returns:
-        str: Fully rendered prompt string for the LLM.
+        PromptAssembly: Request to send and estimated tokens per section.
     """
-    prompt = CONVERSATION_PROMPT.format(
-        topic_and_stance=topic_and_stance,
-        redis_messages=redis_stored_messages,
-        last_message=last_message,
+    budget = (
+        max_input_tokens
+        if max_input_tokens is not None
+        else int(os.getenv("PROMPT_MAX_INPUT_TOKENS", 3000))
     )
+    compact_history = (
+        history_format or os.getenv("PROMPT_HISTORY_FORMAT", "messages")
+    ) == "compact"
 
-    return prompt
+    meta = topic_and_stance or {}
+    instructions = LLMConversationMessage(role="system", content=CONVERSATION_SYSTEM_PROMPT)
+    topic = LLMConversationMessage(
+        role="system",
+        content=CONVERSATION_TOPIC_PROMPT.format(
+            topic=meta.get("topic", ""), stance=meta.get("stance", "")
+        ),
+    )
+    last = _chat_message(last_message)
+    summary = str(messages_summary) if messages_summary else ""
+
+    sections = {
+        "instructions": estimate_message_tokens(instructions),
+        "topic_and_stance": estimate_message_tokens(topic),
+        "last_message": estimate_message_tokens(last),
+    }
+    available = budget - sum(sections.values())
+
+    messages = [_chat_message(message) for message in redis_stored_messages or []]
+    if compact_history:
+        history, kept = _compact_history(messages, available)
+        history_tokens = sum(estimate_message_tokens(m) for m in history)
+    else:
+        history = []
+        history_tokens = 0
+        for message in reversed(messages):
+            cost = estimate_message_tokens(message)
+            if history_tokens + cost > available:
+                break
+            history.append(message)
+            history_tokens += cost
+        history.reverse()
+        kept = len(history)
+    sections["history"] = history_tokens
+
+    summary_messages: List[LLMConversationMessage] = []
+    condensed_summary = ""
+    if summary:
+        overhead = estimate_message_tokens(
+            LLMConversationMessage(
+                role="system", content=CONVERSATION_SUMMARY_PROMPT.format(messages_summary="")
+            )
+        )
+        condensed_summary = truncate_to_tokens(
+            summary, max(0, available - history_tokens - overhead)
+        )
+        if condensed_summary:
+            summary_messages.append(
+                LLMConversationMessage(
+                    role="system",
+                    content=CONVERSATION_SUMMARY_PROMPT.format(
+                        messages_summary=condensed_summary
+                    ),
+                )
+            )
+    sections["summary"] = sum(estimate_message_tokens(m) for m in summary_messages)
+
+    request = LLMConversationRequest(
+        messages=[instructions, topic, *summary_messages, *history, last]
+    )
+
+    return PromptAssembly(
+        request=request,
+        sections=sections,
+        total_tokens=sum(sections.values()),
+        budget=budget,
+        dropped_messages=len(messages) - kept,
+        summary_truncated=condensed_summary != summary,
+    )
+
+
+def _chat_message(message: Dict[str, str]) -> LLMConversationMessage:
+    """Convert a stored message dict into a chat message with compact content.
+
+    The debate opener is stored with the `system` role; it was written by the
+    user, so it is replayed as a `user` message.
+    """
+    role = message.get("role", "user")
+    return LLMConversationMessage(
+        role="user" if role == "system" else role,
+        content=compact_text(message.get("content", "")),
+    )
+
+
+def _compact_history(
+    messages: List[LLMConversationMessage], available: int
+) -> Tuple[List[LLMConversationMessage], int]:
+    """Render history as one compact message within a token budget.
+
+    Lines are added newest first while the whole message still fits, so the
+    oldest turns are dropped first, as in the chat-message format.
+
+    Returns:
+        tuple: The history message (none if nothing fits) and the number of
+            messages it holds.
+    """
+    lines = render_compact_history(m.model_dump() for m in messages).split("\n")
+    header_chars = len(CONVERSATION_HISTORY_PROMPT.format(history=""))
+    chars = header_chars
+    kept = 0
+    for line in reversed(lines if messages else []):
+        needed = chars + len(line) + (1 if kept else 0)
+        if math.ceil(needed / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS > available:
+            break
+        chars = needed
+        kept += 1
+    if not kept:
+        return [], 0
+    content = CONVERSATION_HISTORY_PROMPT.format(history="\n".join(lines[-kept:]))
+    return [LLMConversationMessage(role="system", content=content)], kept
 
 
 def build_new_conversation_prompt(message: str) -> str:
@@ -39,3 +222,40 @@ def build_new_conversation_prompt(message: str) -> str:
     prompt = NEW_CONVERSATION_PROMPT.format(message=message)
 
     return prompt
+
+
+def build_new_conversation_opening_prompt(message: str) -> str:
+    """Compose the prompt that extracts topic/stance and opens the debate.
+
+    Args:
+        message: Initial user text that sets the debate.
+
+    Returns:
+        str: Prompt asking for topic, stance and opening argument as JSON.
+    """
+    prompt = NEW_CONVERSATION_OPENING_PROMPT.format(message=message)
+
+    return prompt
+
+
+def build_summary_merge_prompt(
+    recent_messages: List[Dict[str, str]], previous_summary: str
+) -> str:
+    """Compose the prompt that folds new messages into the rolling summary.
+
+    Args:
+        recent_messages: Messages to fold in, oldest first.
+        previous_summary: Current summary; empty for the first version.
+
+    Returns:
+        str: Prompt asking for the updated summary text.
+    """
+    rendered_messages = "\n".join(
+        f"{message['role']}: {message['content']}" for message in recent_messages
+    )
+    prompt = SUMMARY_MERGE_PROMPT.format(
+        previous_summary=previous_summary or "(vacío)",
+        recent_messages=rendered_messages,
+    )
+
+    return prompt
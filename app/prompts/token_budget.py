@@ -0,0 +1,89 @@
+"""Local token accounting for prompt assembly.
+
+Token counts are estimated without a network call or a tokenizer
+dependency: for the GPT family, one token averages about four characters of
+Spanish/English text. The estimate errs on the high side so a prompt that
+fits the budget also fits the real limit.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.services.llm.llm_io import LLMConversationMessage, LLMConversationRequest
+
+CHARS_PER_TOKEN = 4
+# Chat formats wrap every message in role/separator tokens.
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARK = "…"
+
+
+class PromptAssembly(BaseModel):
+    """A rendered chat request plus how its input-token budget was spent.
+
+    Attributes:
+        request: Messages to send, static system prompt first.
+        sections: Estimated tokens per prompt section.
+        total_tokens: Estimated tokens of the whole prompt.
+        budget: Input-token budget the prompt was assembled against.
+        dropped_messages: Oldest history messages left out to fit the budget.
+        summary_truncated: Whether the summary was shortened to fit.
+    """
+
+    request: LLMConversationRequest
+    sections: Dict[str, int] = Field(default_factory=dict)
+    total_tokens: int = 0
+    budget: int = 0
+    dropped_messages: int = 0
+    summary_truncated: bool = False
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the number of tokens of a text.
+
+    Args:
+        text: Text to measure; None counts as empty.
+
+    Returns:
+        int: Estimated token count, rounded up.
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(message: LLMConversationMessage) -> int:
+    """Estimate the tokens a chat message adds to the request.
+
+    Args:
+        message: Message to measure.
+
+    Returns:
+        int: Estimated content tokens plus the per-message framing.
+    """
+    return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def compact_text(text: str) -> str:
+    """Collapse runs of whitespace, which cost tokens but carry no meaning."""
+    return " ".join(str(text).split())
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Shorten a text to fit an estimated token budget.
+
+    Args:
+        text: Text to shorten.
+        max_tokens: Token budget for the result.
+
+    Returns:
+        str: The text itself if it fits, otherwise its tail (the most recent
+            part of a rolling summary) preceded by a truncation mark.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARK)
+    if max_chars <= 0:
+        return ""
+    return TRUNCATION_MARK + text[-max_chars:]
@@ -1,5 +1,6 @@
+import json
 from pydantic import BaseModel
-from typing import Literal, List, Dict
+from typing import Any, Literal, List, Dict, Optional
 
 Role = Literal["user", "assistant"]
 
@@ -9,6 +10,20 @@ class Turn(BaseModel):
     message: str
 
 
+DegradedReason = Literal["timeout", "unavailable"]
+
+
 class ConversationResponse(BaseModel):
-    conversation_id: str
+    conversation_id: Optional[str]
     message: List[Dict]
+    degraded: bool = False
+    degraded_reason: Optional[DegradedReason] = None
+
+
+class StreamEvent(BaseModel):
+    event: Literal["token", "done", "error"]
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        """Render the event in Server-Sent Events wire format."""
+        return f"event: {self.event}\ndata: {json.dumps(self.data, ensure_ascii=False)}\n\n"
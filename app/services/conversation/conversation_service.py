@@ -1,7 +1,9 @@
-from typing import Any, Dict, List, Optional, Tuple
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from app.prompts.build_prompt import (
-    build_conversation_prompt,
+    assemble_conversation_prompt,
+    build_new_conversation_opening_prompt,
     build_new_conversation_prompt,
 )
 
@@ -15,10 +17,31 @@ from app.utils.message_adapter import (
 from app.services.llm.base import LLMBase
 from app.services.storage.base import Storage
 from app.services.memory.memory import Memory
+from app.services.memory.summary_memory import SummaryMemory
+from app.services.memory.topic_stance_cache import TopicStanceCache
+from app.services.persistence.write_behind import TurnQueue
 from app.domain.message import MessageModel
-from app.domain.llm_output import AssistantReply
+from app.domain.llm_output import AssistantReply, OpeningReply
 from app.domain.meta import MetaModel
 from app.services.llm.llm_io import LLMConversationMessage, LLMConversationRequest
+from app.schemas.responses import StreamEvent
+from app.utils.deadline import Deadline
+from app.utils.log import get_logger
+from app.utils.metrics import timed
+from app.utils.topic_stance_parser import extract_topic_and_stance
+
+RESPONSE_WINDOW = 5
+
+logger = get_logger(__name__)
+
+
+def _strip_code_fences(raw: str) -> str:
+    """Remove Markdown code fences the model may wrap around JSON output."""
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
 
 
 class ConversationService:
@@ -32,45 +55,206 @@ class ConversationService:
         llm: Large language model client used to generate persuasive responses.
         store: Persistent storage for conversation metadata and summaries.
         cache: Ephemeral storage for recent message history per conversation.
+        history_window: Number of recent messages fed into the debate prompt.
+        turn_queue: Optional write-behind queue; when set, turns are enqueued
+            for the persistence worker instead of written to `store` inline.
+        summary: Optional rolling summary memory compacted after inline
+            writes (the persistence worker compacts in write-behind mode).
+        max_input_tokens: Input-token budget of the debate prompt; None
+            reads `PROMPT_MAX_INPUT_TOKENS`.
+        topic_cache: Optional cache of topic/stance extractions keyed by the
+            normalized opening message.
+        parser_min_confidence: Confidence the rule-based topic/stance parser
+            needs for its result to be used instead of the LLM.
     """
 
-    def __init__(self, *, llm: LLMBase, store: Storage, cache: Memory) -> None:
+    def __init__(
+        self,
+        *,
+        llm: LLMBase,
+        store: Storage,
+        cache: Memory,
+        history_window: int = 10,
+        turn_queue: Optional[TurnQueue] = None,
+        summary: Optional[SummaryMemory] = None,
+        max_input_tokens: Optional[int] = None,
+        topic_cache: Optional[TopicStanceCache] = None,
+        parser_min_confidence: Optional[float] = None,
+    ) -> None:
         """Initialize the conversation service.
 
         Args:
             llm: LLM client implementing `generate_response`.
             store: Storage backend with `save` and `get` for persistence.
-            cache: Working-memory backend with `store_in_memory` and `retrieve_from_memory`.
+            cache: Working-memory backend with `store_meta`, `retrieve_context`
+                and `store_in_memory`.
+            history_window: Number of recent messages fed into the debate prompt.
+            turn_queue: Optional write-behind queue for durable persistence.
+            summary: Optional rolling summary memory.
+            max_input_tokens: Input-token budget of the debate prompt
+                (`PROMPT_MAX_INPUT_TOKENS`, 3000).
+            topic_cache: Optional cache of topic/stance extractions.
+            parser_min_confidence: Threshold of the rule-based parser
+                (`TOPIC_STANCE_PARSER_MIN_CONFIDENCE`, 0.8); above 1 disables it.
         """
         self.llm = llm
         self.store = store
         self.cache = cache
+        self.history_window = history_window
+        self.turn_queue = turn_queue
+        self.summary = summary
+        self.max_input_tokens = max_input_tokens
+        self.topic_cache = topic_cache
+        self.parser_min_confidence = (
+            parser_min_confidence
+            if parser_min_confidence is not None
+            else float(os.getenv("TOPIC_STANCE_PARSER_MIN_CONFIDENCE", 0.8))
+        )
+
+    @timed("conversation.start")
+    async def start_conversation(
+        self, message: LLMConversationMessage, deadline: Optional[Deadline] = None
+    ) -> str:
+        opener = message.content
+        topic_and_stance = await self._known_topic_and_stance(opener)
+
+        if topic_and_stance is None:
+            message.content = build_new_conversation_prompt(message.content)
+
+            llm_request = LLMConversationRequest(messages=[message])
+
+            raw_llm_response = await self.llm.generate_response(
+                llm_request.messages, deadline=deadline
+            )
+
+            logger.debug("llm.raw_response", prompt="extraction", content=raw_llm_response)
+
+            try:
+                llm_response_dict = json.loads(_strip_code_fences(raw_llm_response))
+                topic_and_stance = MetaModel(**llm_response_dict)
+            except Exception as e:
+                raise ValueError("Topic and stance not processed.")
 
-    async def start_conversation(self, message: LLMConversationMessage) -> str:
-        message.content = build_new_conversation_prompt(message.content)
+            await self._remember_topic_and_stance(opener, topic_and_stance)
 
-        llm_request = LLMConversationRequest(messages=[message])
+        return await self._create_conversation(topic_and_stance)
 
-        raw_llm_response = await self.llm.generate_response(llm_request.messages)
+    @timed("conversation.open")
+    async def open_conversation(
+        self, message: LLMConversationMessage, deadline: Optional[Deadline] = None
+    ) -> Tuple[str, Dict[str, Any], LLMConversationMessage]:
+        """Start a debate and produce its opening argument in one LLM call.
 
-        print(f"RAW LLM RESPONSE:    {raw_llm_response}")
+        A single structured completion returns topic, stance and the opening
+        argument. If that output cannot be parsed, it falls back to the
+        two-step `start_conversation` + `continue_conversation` path. When
+        the opener's topic/stance is parsed by rules or already cached, only
+        the opening argument is generated.
+
+        Args:
+            message: The initial message that defines topic and stance.
+            deadline: Time budget of the request, passed to the LLM client.
+
+        Returns:
+            Tuple[str, dict, LLMConversationMessage]:
+                - Identifier of the new conversation.
+                - Response envelope with `conversation_id` and the messages.
+                - The assistant opening message for downstream persistence.
+        """
+        known_topic_and_stance = await self._known_topic_and_stance(message.content)
+        if known_topic_and_stance is not None:
+            conversation_id = await self._create_conversation(known_topic_and_stance)
+            response, llm_validated_response = await self.continue_conversation(
+                conversation_id, message, deadline=deadline
+            )
+            return conversation_id, response, llm_validated_response
+
+        opening_prompt = LLMConversationMessage(
+            role="system", content=build_new_conversation_opening_prompt(message.content)
+        )
+        raw_llm_response = await self.llm.generate_response(
+            [opening_prompt], deadline=deadline
+        )
+
+        logger.debug("llm.raw_response", prompt="opening", content=raw_llm_response)
 
         try:
-            llm_response_dict = json.loads(raw_llm_response)
-            topic_and_stance = MetaModel(**llm_response_dict)
-        except Exception as e:
-            raise ValueError("Topic and stance not processed.")
+            opening = OpeningReply(**json.loads(_strip_code_fences(raw_llm_response)))
+        except Exception:
+            conversation_id = await self.start_conversation(
+                message.model_copy(), deadline=deadline
+            )
+            response, llm_validated_response = await self.continue_conversation(
+                conversation_id, message, deadline=deadline
+            )
+            return conversation_id, response, llm_validated_response
 
-        conversation_id = await self.store.save(topic_and_stance.model_dump())
+        topic_and_stance = MetaModel(topic=opening.topic, stance=opening.stance)
+        await self._remember_topic_and_stance(message.content, topic_and_stance)
 
-        await self.cache.store_in_memory(
-            f"{conversation_id}:meta", topic_and_stance.model_dump()
+        conversation_id = await self._create_conversation(topic_and_stance)
+
+        llm_validated_response = LLMConversationMessage(
+            role="assistant", content=opening.argument.strip()
         )
+        response = self._build_envelope(
+            conversation_id, [], message, llm_validated_response
+        )
+
+        return conversation_id, response, llm_validated_response
+
+    async def _create_conversation(self, topic_and_stance: MetaModel) -> str:
+        """Persist a new conversation and cache its topic/stance.
+
+        Args:
+            topic_and_stance: Topic and stance of the debate.
+
+        Returns:
+            str: Identifier of the new conversation.
+        """
+        conversation_id = await self.store.save(topic_and_stance.model_dump())
+
+        await self.cache.store_meta(conversation_id, topic_and_stance.model_dump())
 
         return conversation_id
 
+    async def _known_topic_and_stance(self, opener: str) -> Optional[MetaModel]:
+        """Resolve topic and stance without the LLM when possible.
+
+        The rule-based parser is tried first since it costs no I/O; then the
+        cache of previous extractions for the same opening message.
+
+        Args:
+            opener: Opening message of the debate.
+
+        Returns:
+            MetaModel | None: Topic and stance, or None if the LLM is needed.
+        """
+        extraction = extract_topic_and_stance(opener)
+        if extraction.meta is not None and extraction.confidence >= self.parser_min_confidence:
+            return extraction.meta
+        if self.topic_cache is None:
+            return None
+        return await self.topic_cache.get(opener)
+
+    async def _remember_topic_and_stance(
+        self, opener: str, topic_and_stance: MetaModel
+    ) -> None:
+        """Cache an extraction so repeated openers skip the LLM.
+
+        Args:
+            opener: Opening message of the debate.
+            topic_and_stance: Topic and stance extracted from it.
+        """
+        if self.topic_cache is not None:
+            await self.topic_cache.set(opener, topic_and_stance)
+
+    @timed("conversation.continue")
     async def continue_conversation(
-        self, conversation_id: str, user_message: LLMConversationMessage
+        self,
+        conversation_id: str,
+        user_message: LLMConversationMessage,
+        deadline: Optional[Deadline] = None,
     ) -> Tuple[Dict[str, Any], Dict[str, str]]:
         """Continue an ongoing debate with the latest user message.
 
@@ -80,53 +264,137 @@ class ConversationService:
         Args:
             conversation_id: Identifier of the existing conversation.
             user_message: The latest message from the user.
+            deadline: Time budget of the request, passed to the LLM client.
 
         Returns:
             Tuple[dict, dict]:
                 - Response envelope with `conversation_id` and the last 5 messages.
                 - The assistant message as a message dict for downstream persistence.
         """
-        cache_stored_messages = await self.cache.retrieve_from_memory(conversation_id)
-        print(f"Cache stored messages: {cache_stored_messages}")
+        history, full_context = await self._prepare_turn(conversation_id, user_message)
 
-        topic_and_stance = await self.cache.retrieve_from_memory(
-            f"{conversation_id}:meta"
+        llm_response = await self.llm.generate_response(
+            full_context.messages, deadline=deadline
         )
 
-        conversation_prompt_str = build_conversation_prompt(
-            topic_and_stance=topic_and_stance,
-            redis_stored_messages=cache_stored_messages,
-            last_message=user_message.model_dump(),
+        llm_validated_response = LLMConversationMessage(
+            role="assistant", content=llm_response
         )
 
-        conversation_prompt_obj = LLMConversationMessage(
-            role="system", content=conversation_prompt_str
+        response = self._build_envelope(
+            conversation_id, history, user_message, llm_validated_response
         )
 
-        full_context = LLMConversationRequest(messages=[conversation_prompt_obj])
+        return response, llm_validated_response
+
+    async def stream_conversation(
+        self,
+        conversation_id: str,
+        user_message: LLMConversationMessage,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """Continue a debate, yielding the reply as it is generated.
+
+        Args:
+            conversation_id: Identifier of the existing conversation.
+            user_message: The latest message from the user.
+            deadline: Time budget of the request, passed to the LLM client.
 
-        print(f"full context: {full_context}")
+        Yields:
+            StreamEvent: One `token` event per text chunk, then a single `done`
+                event carrying the same envelope `continue_conversation` returns.
+        """
+        history, full_context = await self._prepare_turn(conversation_id, user_message)
 
-        llm_response = await self.llm.generate_response(full_context.messages)
+        chunks: List[str] = []
+        async for chunk in self.llm.stream_response(
+            full_context.messages, deadline=deadline
+        ):
+            chunks.append(chunk)
+            yield StreamEvent(event="token", data={"content": chunk})
 
         llm_validated_response = LLMConversationMessage(
-            role="assistant", content=llm_response
+            role="assistant", content="".join(chunks).strip()
+        )
+
+        yield StreamEvent(
+            event="done",
+            data=self._build_envelope(
+                conversation_id, history, user_message, llm_validated_response
+            ),
+        )
+
+    async def _prepare_turn(
+        self, conversation_id: str, user_message: LLMConversationMessage
+    ) -> Tuple[List[Dict[str, str]], LLMConversationRequest]:
+        """Load the turn context from memory and build the LLM request.
+
+        Args:
+            conversation_id: Identifier of the existing conversation.
+            user_message: The latest message from the user.
+
+        Returns:
+            Tuple[list, LLMConversationRequest]: Cached history and the request
+                to send to the LLM.
+        """
+        context = await self.cache.retrieve_context(
+            conversation_id, last_n=max(self.history_window, RESPONSE_WINDOW)
+        )
+        cache_stored_messages = context.history
+
+        topic_and_stance = context.meta.model_dump() if context.meta else None
+
+        assembly = assemble_conversation_prompt(
+            topic_and_stance=topic_and_stance,
+            redis_stored_messages=context.unsummarized_history(self.history_window),
+            messages_summary=context.summary,
+            last_message=user_message.model_dump(),
+            max_input_tokens=self.max_input_tokens,
         )
+        logger.info(
+            "prompt.assembled",
+            conversation_id=conversation_id,
+            cached_messages=len(cache_stored_messages),
+            prompt_messages=len(assembly.request.messages),
+            tokens=assembly.total_tokens,
+            budget=assembly.budget,
+            dropped_messages=assembly.dropped_messages,
+            summary_truncated=assembly.summary_truncated,
+        )
+
+        return cache_stored_messages, assembly.request
+
+    @staticmethod
+    def _build_envelope(
+        conversation_id: str,
+        history: List[Dict[str, str]],
+        user_message: LLMConversationMessage,
+        llm_response: LLMConversationMessage,
+    ) -> Dict[str, Any]:
+        """Build the response envelope with the last messages of the debate.
+
+        Args:
+            conversation_id: Identifier of the conversation.
+            history: Cached history preceding this turn.
+            user_message: The latest message from the user.
+            llm_response: The assistant reply for this turn.
 
-        messages: List[Dict[str, str]] = list(cache_stored_messages or [])
+        Returns:
+            dict: Envelope with `conversation_id` and the last 5 messages.
+        """
+        messages: List[Dict[str, str]] = list(history)
 
         if messages and user_message.role != "system":
             messages.append(user_message.model_dump())
 
-        messages.append(llm_validated_response.model_dump())
+        messages.append(llm_response.model_dump())
 
-        response: Dict[str, Any] = {
+        return {
             "conversation_id": conversation_id,
-            "message": messages[-5:],
+            "message": messages[-RESPONSE_WINDOW:],
         }
 
-        return response, llm_validated_response
-
+    @timed("conversation.persist")
     async def persist_conversation(
         self,
         conversation_id: str,
@@ -135,6 +403,10 @@ class ConversationService:
     ) -> None:
         """Persist the latest user/bot turn into cache and durable storage.
 
+        The cache is always updated inline because the next turn reads from
+        it. With a `turn_queue`, the durable write is handed to the
+        write-behind pipeline; otherwise it goes straight to `store`.
+
         Args:
             conversation_id: Conversation identifier to associate with the turn.
             user_message: The user's message dict (role/content).
@@ -147,6 +419,13 @@ class ConversationService:
             [message.model_dump() for message in turn_messages],
         )
 
+        if self.turn_queue is not None:
+            await self.turn_queue.enqueue(conversation_id, turn_messages)
+            return
+
         data = {"conversation_id": conversation_id, "messages": turn_messages}
 
         await self.store.save(data)
+
+        if self.summary is not None:
+            await self.summary.compact(conversation_id)
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional
+
+from app.utils.deadline import Deadline
 
 
 class LLMBase(ABC):
@@ -18,13 +20,33 @@ class LLMBase(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def generate_response(self, messages: list) -> str:
+    async def generate_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> str:
         """Generate a chat response from a structured message list.
 
         Args:
             messages: Sequence of dicts with `role` and `content`.
+            deadline: Time budget of the request being served, if any.
 
         Returns:
             str: Model response text.
         """
         raise NotImplementedError
+
+    async def stream_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """Stream a chat response chunk by chunk.
+
+        Clients without native streaming inherit this fallback, which yields
+        the complete `generate_response` output as a single chunk.
+
+        Args:
+            messages: Sequence of dicts with `role` and `content`.
+            deadline: Time budget of the request being served, if any.
+
+        Yields:
+            str: Successive pieces of the model response text.
+        """
+        yield await self.generate_response(messages, deadline=deadline)
@@ -10,4 +10,10 @@ class LLMConversationMessage(BaseModel):
 
 
 class LLMConversationRequest(BaseModel):
+    """Ordered chat messages for one completion.
+
+    Debate requests put the static system prompt first and per-turn content
+    last, so consecutive turns share the longest possible prompt prefix.
+    """
+
     messages: List[LLMConversationMessage]
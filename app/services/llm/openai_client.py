@@ -1,8 +1,30 @@
+import asyncio
 import os
-from typing import Any, Dict, List
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import openai
+from pydantic import BaseModel
 
 from app.services.llm.base import LLMBase
 from app.services.storage.connections import get_openai_client
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.log import get_logger
+from app.utils.metrics import record_llm_usage, timed
+
+logger = get_logger(__name__)
+
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+# Latency samples needed before the observed p95 drives hedging.
+MIN_HEDGE_SAMPLES = 20
 
 
 class OpenAIClient(LLMBase):
@@ -10,37 +32,243 @@ class OpenAIClient(LLMBase):
 
     Generates chat completions for debate turns and offers a minimal
     interpretation fallback for structured prompts.
+
+    Every completion runs within a `Deadline`: each attempt is capped by
+    `request_timeout` and by what is left of the request's budget, and
+    transient failures are retried with full-jitter exponential back-off
+    while the budget allows. With hedging enabled, a duplicate request is
+    sent once an attempt outlives the observed p95 latency and the first
+    answer wins.
     """
 
-    def __init__(self):
-        """Initialize model and temperature from environment variables."""
-        self.model = os.getenv("OPENAI_MODEL")
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        report_cached_tokens: Optional[bool] = None,
+        request_timeout: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        hedge_after: Optional[float] = None,
+    ):
+        """Initialize model and temperature from environment variables.
+
+        Args:
+            model: Chat model to use (`OPENAI_MODEL`).
+            base_url: OpenAI-compatible endpoint; None uses the default one.
+            api_key: API key of the endpoint; None reads `OPENAI_API_KEY`.
+            report_cached_tokens: Log prompt and cached-prefix token counts of
+                every completion (`OPENAI_REPORT_CACHED_TOKENS`, false).
+            request_timeout: Seconds one attempt may take
+                (`OPENAI_REQUEST_TIMEOUT`, 20).
+            max_attempts: Attempts per completion (`OPENAI_MAX_ATTEMPTS`, 3).
+            retry_backoff: Base of the exponential back-off in seconds
+                (`OPENAI_RETRY_BACKOFF`, 0.5).
+            hedge: Send a duplicate request when an attempt is slow
+                (`OPENAI_HEDGE_REQUESTS`, false).
+            hedge_after: Fixed hedging delay in seconds; 0 uses the observed
+                p95 latency (`OPENAI_HEDGE_AFTER_MS` / 1000, 0).
+        """
+        self.model = model or os.getenv("OPENAI_MODEL")
+        self.base_url = base_url
+        self.api_key = api_key
         self.temperature = float(os.getenv("OPENAI_TEMPERATURE", 0.7))
+        self.report_cached_tokens = (
+            report_cached_tokens
+            if report_cached_tokens is not None
+            else os.getenv("OPENAI_REPORT_CACHED_TOKENS", "false").lower() == "true"
+        )
+        self.request_timeout = request_timeout or float(
+            os.getenv("OPENAI_REQUEST_TIMEOUT", 20)
+        )
+        self.max_attempts = max_attempts or int(os.getenv("OPENAI_MAX_ATTEMPTS", 3))
+        self.retry_backoff = (
+            retry_backoff
+            if retry_backoff is not None
+            else float(os.getenv("OPENAI_RETRY_BACKOFF", 0.5))
+        )
+        self.hedge = (
+            hedge
+            if hedge is not None
+            else os.getenv("OPENAI_HEDGE_REQUESTS", "false").lower() == "true"
+        )
+        self.hedge_after = (
+            hedge_after
+            if hedge_after is not None
+            else float(os.getenv("OPENAI_HEDGE_AFTER_MS", 0)) / 1000
+        )
+        self.hedged_requests = 0
+        self._latencies: Deque[float] = deque(maxlen=500)
+        self.last_usage: Optional[Dict[str, int]] = None
         self.client = None
 
     async def get_client(self) -> "AsyncOpenAI":
         """Lazily initialize and return the OpenAI client instance."""
         if self.client is None:
-            self.client = await get_openai_client()
+            self.client = await get_openai_client(
+                base_url=self.base_url, api_key=self.api_key
+            )
         return self.client
 
-    async def generate_response(self, messages: List[Dict[str, Any]]) -> str:
+    @timed("llm.generate")
+    async def generate_response(
+        self, messages: List[Dict[str, Any]], deadline: Optional[Deadline] = None
+    ) -> str:
         """Generate a response using the configured chat model.
 
         Args:
             messages: Conversation history for the model.
+            deadline: Time budget of the request; defaults to one allowing
+                every attempt its full timeout.
 
         Returns:
             str: Trimmed model response text.
+
+        Raises:
+            DeadlineExceeded: If the budget ran out before an answer arrived.
+            Exception: The last of `RETRYABLE_ERRORS` once every attempt
+                failed; the API answers it with a degraded reply.
         """
         if not self.client:
             self.client = await self.get_client()
-        response = await self.client.chat.completions.create(
+        deadline = deadline or Deadline(self.request_timeout * self.max_attempts)
+        payload = _to_payload(messages)
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await deadline.run(
+                    self._complete(payload), cap=self.request_timeout
+                )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_attempts:
+                    raise
+                delay = random.uniform(0, self.retry_backoff * 2 ** (attempt - 1))
+                if delay >= deadline.remaining():
+                    raise DeadlineExceeded("No budget left to retry") from e
+                logger.warning(
+                    "llm.retry", attempt=attempt, delay_s=round(delay, 3), error=e
+                )
+                await asyncio.sleep(delay)
+
+        record_llm_usage(self.model, response.usage)
+        if self.report_cached_tokens:
+            self._report_usage(response.usage)
+        return response.choices[0].message.content.strip()
+
+    async def _complete(self, payload: List[Dict[str, Any]]) -> Any:
+        """Run one attempt, hedged if enabled, and record its latency."""
+        started = time.perf_counter()
+        if self.hedge:
+            response = await self._hedged(payload)
+        else:
+            response = await self._create(payload)
+        self._latencies.append(time.perf_counter() - started)
+        return response
+
+    async def _create(self, payload: List[Dict[str, Any]]) -> Any:
+        """Send a single chat completion request."""
+        return await self.client.chat.completions.create(
             model=self.model,
             temperature=self.temperature,
-            messages=messages,
+            messages=payload,
         )
-        return response.choices[0].message.content.strip()
+
+    async def _hedged(self, payload: List[Dict[str, Any]]) -> Any:
+        """Send a duplicate request if the first is slow; return the first answer.
+
+        Args:
+            payload: Serialized chat messages.
+
+        Returns:
+            Completion of whichever request succeeded first.
+        """
+        tasks = [asyncio.ensure_future(self._create(payload))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay())
+            if not done:
+                self.hedged_requests += 1
+                tasks.append(asyncio.ensure_future(self._create(payload)))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _hedge_delay(self) -> float:
+        """Seconds to wait before hedging: fixed, observed p95, or a cold-start guess."""
+        if self.hedge_after > 0:
+            return self.hedge_after
+        if len(self._latencies) < MIN_HEDGE_SAMPLES:
+            return self.request_timeout / 2
+        samples = sorted(self._latencies)
+        return samples[int(len(samples) * 0.95) - 1]
+
+    async def stream_response(
+        self, messages: List[Dict[str, Any]], deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """Stream a response from the configured chat model.
+
+        The deadline bounds the wait for the stream to start; once tokens
+        flow they are relayed as they come.
+
+        Args:
+            messages: Conversation history for the model.
+            deadline: Time budget of the request, if any.
+
+        Yields:
+            str: Content deltas as they arrive from the provider.
+        """
+        if not self.client:
+            self.client = await self.get_client()
+        stream = await (deadline or Deadline(self.request_timeout)).run(
+            self.client.chat.completions.create(
+                model=self.model,
+                temperature=self.temperature,
+                messages=_to_payload(messages),
+                stream=True,
+                stream_options={"include_usage": True},
+            ),
+            cap=self.request_timeout,
+        )
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                record_llm_usage(self.model, usage)
+                if self.report_cached_tokens:
+                    self._report_usage(usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def _report_usage(self, usage: Any) -> None:
+        """Record and log prompt tokens and how many were served from cache.
+
+        Args:
+            usage: `usage` object of a completion or of the final stream chunk.
+        """
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.last_usage = {
+            "prompt_tokens": usage.prompt_tokens,
+            "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+            "completion_tokens": usage.completion_tokens,
+        }
+        logger.info("llm.usage", model=self.model, **self.last_usage)
 
     async def interpret(self, user_input: str) -> Dict[str, Any]:
         """Return a trivial interpretation payload for raw input.
@@ -52,3 +280,11 @@ class OpenAIClient(LLMBase):
             dict: Minimal structure with default intent and echo of input.
         """
         return {"intent": "default", "message": user_input}
+
+
+def _to_payload(messages: List[Any]) -> List[Dict[str, Any]]:
+    """Serialize chat messages to plain dicts, keeping their order and keys."""
+    return [
+        message.model_dump() if isinstance(message, BaseModel) else message
+        for message in messages
+    ]
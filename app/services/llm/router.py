@@ -0,0 +1,299 @@
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.services.llm.base import LLMBase
+from app.services.llm.openai_client import OpenAIClient
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend's circuit is open, so no call was attempted."""
+
+
+class Backend:
+    """One LLM backend of the router plus its rolling health statistics.
+
+    Attributes:
+        name: Label used in logs and stats.
+        llm: Client serving the backend.
+        weight: Relative preference; higher weights look proportionally faster.
+        latency: Exponentially weighted moving average latency in seconds;
+            None until the first success.
+        error_rate: Exponentially weighted moving average of failures (0-1).
+        state: Circuit state: `closed`, `open` or `half_open`.
+    """
+
+    def __init__(self, name: str, llm: LLMBase, weight: float = 1.0) -> None:
+        self.name = name
+        self.llm = llm
+        self.weight = weight
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.calls = 0
+        self.failures = 0
+
+
+class LLMRouter(LLMBase):
+    """Routes each completion to the fastest healthy backend.
+
+    Backends are ranked by their moving-average latency divided by their
+    weight, penalized by their recent error rate; backends without samples
+    rank first so every backend gets measured. When a call fails, the next
+    backend in the ranking is tried while the deadline allows.
+
+    Each backend has a circuit breaker: after `failure_threshold` consecutive
+    failures it stops receiving traffic for `cooldown` seconds, then a single
+    trial call decides whether it closes again.
+
+    Attributes:
+        backends: Routed backends.
+        failure_threshold: Consecutive failures that open a circuit.
+        cooldown: Seconds an open circuit rejects traffic.
+        alpha: Smoothing factor of the moving averages.
+    """
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        failure_threshold: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        alpha: float = 0.2,
+    ) -> None:
+        """Initialize the router, reading unset settings from env vars.
+
+        Args:
+            backends: Backends to route between; at least one.
+            failure_threshold: Consecutive failures that open a circuit
+                (`LLM_ROUTER_FAILURE_THRESHOLD`, 3).
+            cooldown: Seconds before an open circuit is retried
+                (`LLM_ROUTER_COOLDOWN_SECONDS`, 30).
+            alpha: Smoothing factor of the latency and error moving averages.
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend.")
+        self.backends = backends
+        self.failure_threshold = failure_threshold or int(
+            os.getenv("LLM_ROUTER_FAILURE_THRESHOLD", 3)
+        )
+        self.cooldown = (
+            cooldown
+            if cooldown is not None
+            else float(os.getenv("LLM_ROUTER_COOLDOWN_SECONDS", 30))
+        )
+        self.alpha = alpha
+
+    @classmethod
+    def from_env(cls) -> LLMBase:
+        """Build the LLM client described by `LLM_BACKENDS`.
+
+        `LLM_BACKENDS` is a JSON list of objects with `name`, `model`,
+        `base_url`, `api_key_env` (name of the env var holding the key),
+        `weight` and optionally `max_attempts`. Without it, the single default
+        `OpenAIClient` is returned.
+
+        Backends make a single attempt per completion by default, so a failing
+        backend is left right away and the router's failover, not the
+        client's back-off, picks the next one.
+
+        Returns:
+            LLMBase: A router over the configured backends, or an `OpenAIClient`.
+        """
+        raw = os.getenv("LLM_BACKENDS")
+        if not raw:
+            return OpenAIClient()
+        backends = []
+        for index, config in enumerate(json.loads(raw)):
+            api_key_env = config.get("api_key_env")
+            backends.append(
+                Backend(
+                    name=config.get("name") or f"backend-{index}",
+                    llm=OpenAIClient(
+                        model=config.get("model"),
+                        base_url=config.get("base_url"),
+                        api_key=os.getenv(api_key_env) if api_key_env else None,
+                        max_attempts=int(config.get("max_attempts", 1)),
+                    ),
+                    weight=float(config.get("weight", 1.0)),
+                )
+            )
+        return cls(backends)
+
+    async def interpret(self, user_input: str) -> Dict[str, Any]:
+        """Delegate to the first backend; interpretation makes no LLM call."""
+        return await self.backends[0].llm.interpret(user_input)
+
+    async def generate_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> str:
+        """Generate a response on the best backend, failing over on errors.
+
+        Args:
+            messages: Sequence of chat messages.
+            deadline: Time budget of the request; failover stops when it ends.
+
+        Returns:
+            str: Model response text.
+
+        Raises:
+            NoBackendAvailable: If every backend failed or had its circuit
+                open; a backend error is chained as the cause.
+            DeadlineExceeded: If the deadline ended before any backend answered.
+        """
+        error: Optional[Exception] = None
+        for backend in self._ranked():
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded("Deadline exceeded during failover") from error
+            if not self._admit(backend):
+                continue
+            started = time.perf_counter()
+            try:
+                response = await backend.llm.generate_response(
+                    messages, deadline=deadline
+                )
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                self._record_failure(backend)
+                logger.warning("llm.backend_failed", backend=backend.name, error=e)
+                error = e
+                continue
+            finally:
+                backend.probing = False
+            self._record_success(backend, time.perf_counter() - started)
+            return response
+        if error is not None:
+            raise NoBackendAvailable("Every LLM backend failed") from error
+        raise NoBackendAvailable("Every LLM backend circuit is open")
+
+    async def stream_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """Stream from the best backend, failing over until the first chunk.
+
+        Once a backend has produced output the stream is committed to it.
+
+        Args:
+            messages: Sequence of chat messages.
+            deadline: Time budget of the request.
+
+        Yields:
+            str: Successive pieces of the model response text.
+
+        Raises:
+            NoBackendAvailable: If every backend failed before streaming or
+                had its circuit open.
+            DeadlineExceeded: If the deadline ended before any backend answered.
+        """
+        error: Optional[Exception] = None
+        for backend in self._ranked():
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded("Deadline exceeded during failover") from error
+            if not self._admit(backend):
+                continue
+            started = time.perf_counter()
+            streamed = False
+            try:
+                async for chunk in backend.llm.stream_response(
+                    messages, deadline=deadline
+                ):
+                    streamed = True
+                    yield chunk
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                self._record_failure(backend)
+                if streamed:
+                    raise
+                logger.warning("llm.backend_failed", backend=backend.name, error=e)
+                error = e
+                continue
+            finally:
+                backend.probing = False
+            self._record_success(backend, time.perf_counter() - started)
+            return
+        if error is not None:
+            raise NoBackendAvailable("Every LLM backend failed") from error
+        raise NoBackendAvailable("Every LLM backend circuit is open")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return health statistics per backend, best ranked first."""
+        return [
+            {
+                "name": backend.name,
+                "state": backend.state,
+                "weight": backend.weight,
+                "latency_ms": (
+                    backend.latency * 1000 if backend.latency is not None else None
+                ),
+                "error_rate": backend.error_rate,
+                "calls": backend.calls,
+                "failures": backend.failures,
+            }
+            for backend in self._ranked(include_open=True)
+        ]
+
+    def _ranked(self, include_open: bool = False) -> List[Backend]:
+        """Backends allowed to take a call, fastest healthy one first."""
+        now = time.monotonic()
+        eligible = []
+        for backend in self.backends:
+            if backend.state == OPEN and now - backend.opened_at >= self.cooldown:
+                backend.state = HALF_OPEN
+            if backend.state == CLOSED or backend.state == HALF_OPEN or include_open:
+                eligible.append(backend)
+        return sorted(eligible, key=self._score)
+
+    def _admit(self, backend: Backend) -> bool:
+        """Let a call through; a half-open circuit admits one trial at a time."""
+        if backend.state != HALF_OPEN:
+            return True
+        if backend.probing:
+            return False
+        backend.probing = True
+        return True
+
+    def _score(self, backend: Backend) -> float:
+        """Expected cost of a call: lower is better."""
+        if backend.state == OPEN:
+            return float("inf")
+        if backend.latency is None:
+            return 0.0
+        return backend.latency / backend.weight * (1 + 4 * backend.error_rate)
+
+    def _record_success(self, backend: Backend, elapsed: float) -> None:
+        """Fold a successful call into the backend's statistics."""
+        backend.calls += 1
+        backend.latency = (
+            elapsed
+            if backend.latency is None
+            else self.alpha * elapsed + (1 - self.alpha) * backend.latency
+        )
+        backend.error_rate *= 1 - self.alpha
+        backend.consecutive_failures = 0
+        backend.state = CLOSED
+
+    def _record_failure(self, backend: Backend) -> None:
+        """Fold a failed call into the statistics, opening the circuit if needed."""
+        backend.calls += 1
+        backend.failures += 1
+        backend.error_rate = self.alpha + (1 - self.alpha) * backend.error_rate
+        backend.consecutive_failures += 1
+        if (
+            backend.state == HALF_OPEN
+            or backend.consecutive_failures >= self.failure_threshold
+        ):
+            backend.state = OPEN
+            backend.opened_at = time.monotonic()
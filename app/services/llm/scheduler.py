@@ -0,0 +1,260 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from app.services.llm.base import LLMBase
+from app.utils.deadline import Deadline
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+
+class LLMScheduler(LLMBase):
+    """Bounded-concurrency front for an LLM client with priority lanes.
+
+    At most `max_concurrency` completions are in flight at once; further calls
+    wait in their lane. Whenever a slot frees up, waiting interactive calls
+    (debate turns) are served before background ones (summaries), and
+    background work never holds more than `background_limit` slots, so a
+    burst of compactions cannot starve users.
+
+    The scheduler itself serves the interactive lane; `for_lane` returns a
+    client bound to another lane sharing the same slots.
+
+    Attributes:
+        llm: Wrapped client that performs the completions.
+        max_concurrency: Maximum completions in flight across lanes.
+        background_limit: Maximum slots held by background completions.
+    """
+
+    def __init__(
+        self,
+        llm: LLMBase,
+        max_concurrency: Optional[int] = None,
+        background_limit: Optional[int] = None,
+        stats_window: int = 1000,
+    ) -> None:
+        """Initialize the scheduler, reading unset limits from env vars.
+
+        Args:
+            llm: Client that performs the completions.
+            max_concurrency: Slots shared by all lanes (`LLM_MAX_CONCURRENCY`, 8).
+            background_limit: Slots background work may hold
+                (`LLM_BACKGROUND_MAX_CONCURRENCY`, half of `max_concurrency`).
+            stats_window: Queue-time samples kept per lane for percentiles.
+        """
+        self.llm = llm
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("LLM_MAX_CONCURRENCY", 8)
+        )
+        self.background_limit = background_limit or int(
+            os.getenv(
+                "LLM_BACKGROUND_MAX_CONCURRENCY", max(1, self.max_concurrency // 2)
+            )
+        )
+        self._running: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {
+            lane: deque() for lane in LANES
+        }
+        self._completed: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._queue_times: Dict[str, Deque[float]] = {
+            lane: deque(maxlen=stats_window) for lane in LANES
+        }
+
+    def for_lane(self, lane: str) -> "LLMBase":
+        """Return a client whose calls are scheduled in the given lane.
+
+        Args:
+            lane: `interactive` or `background`.
+
+        Returns:
+            LLMBase: Client sharing this scheduler's slots.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown LLM lane: {lane}")
+        return self if lane == INTERACTIVE else _LaneClient(self, lane)
+
+    async def interpret(self, user_input: str) -> Dict[str, Any]:
+        """Delegate to the wrapped client; interpretation makes no LLM call."""
+        return await self.llm.interpret(user_input)
+
+    async def generate_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> str:
+        """Generate a response in the interactive lane.
+
+        Args:
+            messages: Sequence of chat messages.
+            deadline: Time budget of the request, covering the queue wait.
+
+        Returns:
+            str: Model response text.
+        """
+        return await self.generate_in_lane(INTERACTIVE, messages, deadline)
+
+    async def stream_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """Stream a response in the interactive lane.
+
+        Args:
+            messages: Sequence of chat messages.
+            deadline: Time budget of the request, covering the queue wait.
+
+        Yields:
+            str: Successive pieces of the model response text.
+        """
+        async for chunk in self.stream_in_lane(INTERACTIVE, messages, deadline):
+            yield chunk
+
+    async def generate_in_lane(
+        self, lane: str, messages: list, deadline: Optional[Deadline] = None
+    ) -> str:
+        """Generate a response once the lane gets a slot.
+
+        Args:
+            lane: Lane the call is queued in.
+            messages: Sequence of chat messages.
+            deadline: Time budget of the request, covering the queue wait.
+
+        Returns:
+            str: Model response text.
+        """
+        async with self._slot(lane, deadline):
+            return await self.llm.generate_response(messages, deadline=deadline)
+
+    async def stream_in_lane(
+        self, lane: str, messages: list, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """Stream a response once the lane gets a slot, holding it until done.
+
+        Args:
+            lane: Lane the call is queued in.
+            messages: Sequence of chat messages.
+            deadline: Time budget of the request, covering the queue wait.
+
+        Yields:
+            str: Successive pieces of the model response text.
+        """
+        async with self._slot(lane, deadline):
+            async for chunk in self.llm.stream_response(messages, deadline=deadline):
+                yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        """Return slot usage and queue-time metrics per lane.
+
+        Returns:
+            dict: Limits plus, per lane, running and waiting calls, completed
+                calls and queue-time mean/p50/p95/max in milliseconds over
+                the recent window.
+        """
+        lanes = {}
+        for lane in LANES:
+            samples = sorted(self._queue_times[lane])
+            lanes[lane] = {
+                "running": self._running[lane],
+                "waiting": len(self._waiters[lane]),
+                "completed": self._completed[lane],
+                "queue_ms": {
+                    "mean": sum(samples) / len(samples) if samples else 0.0,
+                    "p50": _percentile(samples, 0.50),
+                    "p95": _percentile(samples, 0.95),
+                    "max": samples[-1] if samples else 0.0,
+                },
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "background_limit": self.background_limit,
+            "lanes": lanes,
+        }
+
+    @asynccontextmanager
+    async def _slot(
+        self, lane: str, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[None]:
+        """Hold one concurrency slot for the duration of the block.
+
+        Raises:
+            DeadlineExceeded: If the deadline passed while queued.
+        """
+        queued_at = time.perf_counter()
+        if deadline is None:
+            await self._acquire(lane)
+        else:
+            await deadline.run(self._acquire(lane))
+        self._queue_times[lane].append((time.perf_counter() - queued_at) * 1000)
+        try:
+            yield
+        finally:
+            self._running[lane] -= 1
+            self._completed[lane] += 1
+            self._dispatch()
+
+    async def _acquire(self, lane: str) -> None:
+        """Wait until the lane is granted a slot."""
+        ahead = LANES[: LANES.index(lane) + 1]
+        if not any(self._waiters[other] for other in ahead) and self._can_run(lane):
+            self._running[lane] += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the caller gave up: pass it on.
+                self._running[lane] -= 1
+                self._dispatch()
+            elif waiter in self._waiters[lane]:
+                self._waiters[lane].remove(waiter)
+            raise
+
+    def _can_run(self, lane: str) -> bool:
+        """Whether a new call of the lane fits the current limits."""
+        if sum(self._running.values()) >= self.max_concurrency:
+            return False
+        return lane == INTERACTIVE or self._running[lane] < self.background_limit
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, interactive lane first."""
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self._can_run(lane):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                self._running[lane] += 1
+                waiter.set_result(None)
+
+
+class _LaneClient(LLMBase):
+    """LLM client view that schedules every call in a fixed lane."""
+
+    def __init__(self, scheduler: LLMScheduler, lane: str) -> None:
+        self.scheduler = scheduler
+        self.lane = lane
+
+    async def interpret(self, user_input: str) -> Dict[str, Any]:
+        return await self.scheduler.interpret(user_input)
+
+    async def generate_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> str:
+        return await self.scheduler.generate_in_lane(self.lane, messages, deadline)
+
+    async def stream_response(
+        self, messages: list, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        async for chunk in self.scheduler.stream_in_lane(self.lane, messages, deadline):
+            yield chunk
+
+
+def _percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile of sorted samples; 0 when empty."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.services.storage.connections import get_pubsub_client
+from app.utils.log import get_logger
+
+INVALIDATION_CHANNEL = "memory:invalidate"
+
+logger = get_logger(__name__)
+
+
+class LocalCache:
+    """Size-bounded, in-process LRU cache with a per-entry time to live.
+
+    Meant for values that never change once written, such as a
+    conversation's topic/stance: a hit saves a Redis round trip and a JSON
+    decode. Entries are evicted least-recently-used first once `max_entries`
+    is reached, and expire `ttl` seconds after being stored so memory held by
+    finished debates is reclaimed.
+
+    Attributes:
+        max_entries: Maximum number of entries kept.
+        ttl: Seconds an entry stays valid; 0 keeps it until evicted.
+    """
+
+    def __init__(self, max_entries: int, ttl: float = 0) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of entries kept.
+            ttl: Seconds an entry stays valid; 0 keeps it until evicted.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value and mark it recently used.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            The value, or None on a miss or when the entry expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at and expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key.
+            value: Value to cache; treat it as read-only afterwards.
+        """
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key if present.
+
+        Args:
+            key: Cache key.
+        """
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hit/miss counters and the hit ratio.
+
+        Returns:
+            dict: Entries and capacity, hits, misses, evictions,
+                invalidations and hit ratio (0 when nothing was looked up).
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CacheInvalidationListener:
+    """Keeps a `LocalCache` coherent across processes through Redis pub/sub.
+
+    Writers publish the key they changed or deleted on `channel`; every
+    process running a listener drops that key from its local cache. The
+    local TTL still bounds staleness if a message is missed while the
+    subscription reconnects.
+
+    Attributes:
+        cache: Local cache to invalidate.
+        channel: Pub/sub channel carrying invalidated keys.
+    """
+
+    def __init__(self, cache: LocalCache, channel: str = INVALIDATION_CHANNEL) -> None:
+        self.cache = cache
+        self.channel = channel
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        """Subscribe to the channel and start evicting announced keys."""
+        redis = await get_pubsub_client()
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        """Stop listening and close the subscription."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen(self, pubsub: Any) -> None:
+        """Evict every key received on the channel until cancelled."""
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.handle(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Stop invalidating but keep serving; entries still expire by TTL.
+            logger.error("local_cache.invalidation_stopped", error=e)
+        finally:
+            await pubsub.aclose()
+
+    def handle(self, key: Any) -> None:
+        """Drop one announced key from the local cache.
+
+        Args:
+            key: Key as published; bytes are decoded as UTF-8.
+        """
+        if isinstance(key, bytes):
+            key = key.decode("utf-8")
+        self.cache.invalidate(key)
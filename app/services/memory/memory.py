@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, Optional
+
+from app.domain.context import ConversationContext
 
 
 class Memory(ABC):
@@ -16,11 +18,15 @@ class Memory(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def retrieve_from_memory(self, key: str) -> Any:
+    async def retrieve_from_memory(
+        self, key: str, last_n: Optional[int] = None
+    ) -> Any:
         """Retrieve data by memory key.
 
         Args:
             key: Memory key.
+            last_n: Number of newest entries to return for list-valued keys;
+                None returns every entry held.
 
         Returns:
             Any: Stored value or None.
@@ -35,3 +41,30 @@ class Memory(ABC):
             key: Memory key.
         """
         raise NotImplementedError
+
+    @abstractmethod
+    async def store_meta(self, conversation_id: str, meta: Dict[str, str]) -> None:
+        """Store the topic/stance document of a conversation.
+
+        Args:
+            conversation_id: Conversation identifier.
+            meta: Topic and stance payload.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def retrieve_context(
+        self, conversation_id: str, last_n: Optional[int] = None
+    ) -> ConversationContext:
+        """Fetch everything a debate turn needs for a conversation.
+
+        Args:
+            conversation_id: Conversation identifier.
+            last_n: Number of newest history entries to return; None returns
+                every entry held.
+
+        Returns:
+            ConversationContext: Topic/stance, summary and history; missing
+                parts are None or empty.
+        """
+        raise NotImplementedError
@@ -0,0 +1,226 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from app.domain.context import ConversationContext
+from app.domain.meta import MetaModel
+from app.services.memory.local_cache import LocalCache
+from app.services.memory.memory import Memory
+from app.services.memory.working_memory import WorkingMemory
+from app.services.storage.base import Storage
+
+
+class ReadThroughMemory(Memory):
+    """Working memory that rebuilds evicted conversations from durable storage.
+
+    Sits between `ConversationService` and `WorkingMemory`. When Redis no
+    longer holds a conversation's topic/stance or history, the context is
+    loaded from `Storage` and written back to the cache. Concurrent misses
+    for the same conversation share a single load (single-flight), so Redis
+    can run as a pure cache with aggressive eviction.
+
+    Conversations opened through this layer are remembered until their
+    first history entry is stored, so the empty history of a brand-new
+    conversation is not mistaken for an evicted one.
+
+    Attributes:
+        memory: The Redis-backed working memory being fronted.
+        store: Durable storage used as the source of truth on a miss.
+        new_conversations: Conversations opened here with no history yet.
+    """
+
+    def __init__(
+        self,
+        memory: WorkingMemory,
+        store: Storage,
+        new_conversations: Optional[LocalCache] = None,
+    ) -> None:
+        """Initialize the read-through layer.
+
+        Args:
+            memory: Redis-backed working memory.
+            store: Durable storage with conversation and message lookups.
+            new_conversations: Marker cache of conversations without
+                history yet; by default 10000 entries kept for an hour.
+        """
+        self.memory = memory
+        self.store = store
+        self.new_conversations = (
+            new_conversations
+            if new_conversations is not None
+            else LocalCache(max_entries=10000, ttl=3600)
+        )
+        self._inflight: Dict[str, "asyncio.Future[Optional[ConversationContext]]"] = {}
+
+    async def store_in_memory(self, key: str, data: Any) -> None:
+        """Append entries to working memory.
+
+        Args:
+            key: Memory key.
+            data: Entries to append.
+        """
+        await self.memory.store_in_memory(key, data)
+        self.new_conversations.invalidate(key)
+
+    async def retrieve_from_memory(self, key: str, last_n: Optional[int] = None) -> Any:
+        """Retrieve the newest entries from working memory.
+
+        Args:
+            key: Memory key.
+            last_n: Number of newest entries to return.
+
+        Returns:
+            list | None: Entries oldest first, or None when empty.
+        """
+        return await self.memory.retrieve_from_memory(key, last_n=last_n)
+
+    async def delete_from_memory(self, key: str) -> None:
+        """Delete data from working memory.
+
+        Args:
+            key: Memory key to delete.
+        """
+        await self.memory.delete_from_memory(key)
+
+    async def store_meta(self, conversation_id: str, meta: Dict[str, str]) -> None:
+        """Store the topic/stance document of a new conversation.
+
+        The conversation is marked as having no history yet, so its first
+        turn does not look it up in durable storage.
+
+        Args:
+            conversation_id: Conversation identifier.
+            meta: Topic and stance payload.
+        """
+        await self.memory.store_meta(conversation_id, meta)
+        self.new_conversations.set(conversation_id, True)
+
+    async def store_summary(
+        self,
+        conversation_id: str,
+        summary: str,
+        cutoff: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Cache the latest rolling summary of a conversation.
+
+        Args:
+            conversation_id: Conversation identifier.
+            summary: Summary text.
+            cutoff: Role and content of the last message folded into it.
+        """
+        await self.memory.store_summary(conversation_id, summary, cutoff=cutoff)
+
+    async def retrieve_meta(self, conversation_id: str) -> Optional[Dict[str, str]]:
+        """Fetch topic/stance, falling back to durable storage on a miss.
+
+        Args:
+            conversation_id: Conversation identifier.
+
+        Returns:
+            dict | None: Topic and stance, or None if the conversation is unknown.
+        """
+        meta = await self.memory.retrieve_meta(conversation_id)
+        if meta is not None:
+            return meta
+        context = await self._load(conversation_id)
+        return context.meta.model_dump() if context and context.meta else None
+
+    async def retrieve_context(
+        self, conversation_id: str, last_n: Optional[int] = None
+    ) -> ConversationContext:
+        """Fetch topic/stance and history, rehydrating the cache on a miss.
+
+        Storage is only queried when topic/stance is missing, or when the
+        history is empty for a conversation not opened through this layer
+        (its history was evicted while topic/stance stayed cached).
+
+        Args:
+            conversation_id: Conversation identifier.
+            last_n: Number of newest history entries to return.
+
+        Returns:
+            ConversationContext: Cached context, or the one rebuilt from
+                durable storage when the cache lost it.
+        """
+        context = await self.memory.retrieve_context(conversation_id, last_n=last_n)
+        if context.meta is not None and (
+            context.history or self.new_conversations.get(conversation_id)
+        ):
+            return context
+
+        loaded = await self._load(conversation_id)
+        if loaded is None:
+            return context
+        history = loaded.history[-last_n:] if last_n else loaded.history
+        if context.summary:
+            summary, cutoff = context.summary, context.summary_cutoff
+        else:
+            summary, cutoff = loaded.summary, loaded.summary_cutoff
+        return ConversationContext(
+            meta=loaded.meta, history=history, summary=summary, summary_cutoff=cutoff
+        )
+
+    async def _load(self, conversation_id: str) -> Optional[ConversationContext]:
+        """Load a conversation from storage once per concurrent miss.
+
+        Args:
+            conversation_id: Conversation identifier.
+
+        Returns:
+            ConversationContext | None: Rebuilt context, or None if unknown.
+        """
+        future = self._inflight.get(conversation_id)
+        if future is None:
+            future = asyncio.ensure_future(self._rehydrate(conversation_id))
+            self._inflight[conversation_id] = future
+            future.add_done_callback(
+                lambda _: self._inflight.pop(conversation_id, None)
+            )
+        return await asyncio.shield(future)
+
+    async def _rehydrate(self, conversation_id: str) -> Optional[ConversationContext]:
+        """Load meta, summary and recent messages and repopulate the cache.
+
+        Args:
+            conversation_id: Conversation identifier.
+
+        Returns:
+            ConversationContext | None: Rebuilt context, or None if unknown.
+        """
+        conversations = await self.store.get({"id": conversation_id})
+        if not conversations:
+            return None
+        conversation = conversations[0]
+        meta = MetaModel(topic=conversation["topic"], stance=conversation["stance"])
+
+        rows = await self.store.get(
+            {
+                "conversation_id": conversation_id,
+                "limit": self.memory.max_messages,
+                "latest": True,
+            }
+        )
+        history = [
+            {"role": getattr(row["role"], "value", row["role"]), "content": row["content"]}
+            for row in rows
+        ]
+
+        summaries = await self.store.get({"summary_for": conversation_id})
+        summary = summaries[0]["summary"] if summaries else None
+        cutoff = None
+        if summaries:
+            last_id = summaries[0].get("last_message_id")
+            cutoff = next(
+                (entry for row, entry in zip(rows, history) if row.get("id") == last_id),
+                None,
+            )
+
+        await self.memory.rehydrate(
+            conversation_id,
+            meta.model_dump(),
+            history,
+            summary=summary,
+            summary_cutoff=cutoff,
+        )
+        return ConversationContext(
+            meta=meta, history=history, summary=summary, summary_cutoff=cutoff
+        )
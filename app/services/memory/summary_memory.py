@@ -1,51 +1,224 @@
-from typing import Any
+import asyncio
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
 
+from app.domain.context import ConversationContext
+from app.prompts.build_prompt import build_summary_merge_prompt
 from app.services.llm.base import LLMBase
+from app.services.llm.llm_io import LLMConversationMessage
 from app.services.memory.memory import Memory
+from app.services.memory.working_memory import WorkingMemory, summary_key
+from app.services.storage.base import Storage
+from app.utils.log import get_logger
+
+MAX_MESSAGES_PER_COMPACTION = 200
+
+logger = get_logger(__name__)
 
 
 class SummaryMemory(Memory):
-    """Longer-term summary memory for condensing debate context."""
+    """Longer-term summary memory for condensing debate context.
+
+    Once a conversation accumulates more unsummarized messages than
+    `trigger_messages`, everything but the newest `keep_recent` messages is
+    folded into a new summary version. Versions are stored in durable storage
+    and the latest one is cached next to the working memory, so prompts carry
+    the summary plus a short recent window instead of the full history.
+
+    Attributes:
+        storage: Durable storage holding messages and summary versions.
+        cache: Working memory where the latest summary is cached.
+        llm: Language model used to build/update summaries.
+        trigger_messages: Unsummarized messages that trigger a compaction.
+        keep_recent: Newest messages left out of the summary.
+    """
 
-    def __init__(self, llm: LLMBase):
+    def __init__(
+        self,
+        llm: LLMBase,
+        store: Storage,
+        cache: WorkingMemory,
+        trigger_messages: Optional[int] = None,
+        keep_recent: Optional[int] = None,
+    ):
         """Initialize with an LLM to create merged summaries.
 
         Args:
             llm: Language model used to build/update summaries.
+            store: Durable storage with message and summary lookups.
+            cache: Working memory where the latest summary is cached.
+            trigger_messages: Compaction threshold
+                (`SUMMARY_TRIGGER_MESSAGES`, 10).
+            keep_recent: Messages kept out of the summary
+                (`SUMMARY_KEEP_RECENT`, 4).
         """
-        self.storage = None
+        self.storage = store
+        self.cache = cache
         self.llm = llm
+        self.trigger_messages = trigger_messages or int(
+            os.getenv("SUMMARY_TRIGGER_MESSAGES", 10)
+        )
+        self.keep_recent = (
+            keep_recent
+            if keep_recent is not None
+            else int(os.getenv("SUMMARY_KEEP_RECENT", 4))
+        )
+        self._compacting: Set[str] = set()
 
     async def store_in_memory(self, key: str, data: Any) -> None:
         """Create and store a merged summary for the given key.
 
         Args:
-            key: User identifier.
-            data: Recent messages to merge into the existing summary.
+            key: Conversation identifier.
+            data: Messages (with their storage ids) to merge into the
+                existing summary, oldest first.
         """
-        old_summary = await self.retrieve_from_memory(key)
-        # prompt = await build_summary_merge_prompt(
-        #     recent_messages=data, previous_summary=old_summary or ""
-        # )
-        # merged_summary = await self.llm.generate_response([prompt])
-        # await self.storage.save({"whatsapp_id": key, "data": merged_summary})
+        previous = await self._latest(key)
+        await self._merge(key, previous, data)
 
-    async def retrieve_from_memory(self, key: str) -> Any:
-        """Fetch the stored summary for a user key.
+    async def retrieve_from_memory(
+        self, key: str, last_n: Optional[int] = None
+    ) -> Any:
+        """Fetch the stored summary for a conversation.
 
         Args:
-            key: User identifier.
+            key: Conversation identifier.
+            last_n: Unused; a conversation has a single current summary.
 
         Returns:
             str | None: Summary text if present.
         """
-        doc = await self.storage.get({"whatsapp_id": key})
+        doc = await self._latest(key)
         return doc.get("summary") if doc else None
 
     async def delete_from_memory(self, key: str) -> None:
-        """Delete the stored summary for a user key.
+        """Drop the cached summary for a conversation.
+
+        Summary versions in durable storage are kept as an audit trail.
+
+        Args:
+            key: Conversation identifier.
+        """
+        await self.cache.delete_from_memory(summary_key(key))
+
+    async def store_meta(self, conversation_id: str, meta: Dict[str, str]) -> None:
+        """Store the topic/stance document in the working memory.
+
+        Args:
+            conversation_id: Conversation identifier.
+            meta: Topic and stance payload.
+        """
+        await self.cache.store_meta(conversation_id, meta)
+
+    async def retrieve_context(
+        self, conversation_id: str, last_n: Optional[int] = None
+    ) -> ConversationContext:
+        """Fetch the working-memory context, reading an uncached summary from storage.
+
+        Args:
+            conversation_id: Conversation identifier.
+            last_n: Number of newest history entries to return.
+
+        Returns:
+            ConversationContext: Topic/stance, latest summary and history.
+        """
+        context = await self.cache.retrieve_context(conversation_id, last_n=last_n)
+        if context.summary is None:
+            context.summary = await self.retrieve_from_memory(conversation_id)
+        return context
+
+    async def compact(self, conversation_id: str) -> bool:
+        """Fold older turns into a new summary version if the threshold is met.
+
+        Meant to run off the request path (background task or persistence
+        worker). Concurrent compactions of one conversation are skipped.
 
         Args:
-            key: User identifier.
+            conversation_id: Conversation identifier.
+
+        Returns:
+            bool: True if a new summary version was stored.
         """
-        await self.storage.delete(key)
+        if conversation_id in self._compacting:
+            return False
+        self._compacting.add(conversation_id)
+        try:
+            previous = await self._latest(conversation_id)
+            pending = await self.storage.get(
+                {
+                    "conversation_id": conversation_id,
+                    "after_id": previous["last_message_id"] if previous else None,
+                    "limit": MAX_MESSAGES_PER_COMPACTION,
+                }
+            )
+            if len(pending) <= self.trigger_messages:
+                return False
+            to_fold = pending[: len(pending) - self.keep_recent]
+            await self._merge(conversation_id, previous, to_fold)
+            return True
+        finally:
+            self._compacting.discard(conversation_id)
+
+    async def compact_many(self, conversation_ids: Iterable[str]) -> None:
+        """Run `compact` for several conversations concurrently.
+
+        Failures are reported and skipped; the next turn retries them.
+
+        Args:
+            conversation_ids: Conversations touched by a persisted batch.
+        """
+        results = await asyncio.gather(
+            *[self.compact(cid) for cid in set(conversation_ids)],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("summary.compaction_failed", error=result)
+
+    async def _latest(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch the newest stored summary version, if any."""
+        docs = await self.storage.get({"summary_for": conversation_id})
+        return docs[0] if docs else None
+
+    async def _merge(
+        self,
+        conversation_id: str,
+        previous: Optional[Dict[str, Any]],
+        messages: List[Dict[str, Any]],
+    ) -> None:
+        """Ask the LLM for the merged summary and store it as a new version."""
+        prompt = build_summary_merge_prompt(
+            recent_messages=[
+                {
+                    "role": getattr(m["role"], "value", m["role"]),
+                    "content": m["content"],
+                }
+                for m in messages
+            ],
+            previous_summary=previous["summary"] if previous else "",
+        )
+        merged_summary = await self.llm.generate_response(
+            [LLMConversationMessage(role="system", content=prompt)]
+        )
+
+        await self.storage.save(
+            {
+                "conversation_id": conversation_id,
+                "version": previous["version"] + 1 if previous else 1,
+                "summary": merged_summary,
+                "first_message_id": (
+                    previous["first_message_id"] if previous else messages[0].get("id")
+                ),
+                "last_message_id": messages[-1]["id"],
+                "tokens_estimate": max(1, len(merged_summary) // 4),
+            }
+        )
+        last = messages[-1]
+        await self.cache.store_summary(
+            conversation_id,
+            merged_summary,
+            cutoff={
+                "role": getattr(last["role"], "value", last["role"]),
+                "content": last["content"],
+            },
+        )
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import os
+import unicodedata
+from typing import Dict, Optional, Set
+
+from app.domain.meta import MetaModel
+from app.services.storage.cache_storage import CacheStorage
+from app.utils.log import get_logger
+
+STATS_KEY = "topic_stance:stats"
+
+logger = get_logger(__name__)
+
+
+class TopicStanceCache:
+    """Content-addressed cache of topic/stance extractions.
+
+    Many users open a debate with the same pasted prompt. The extracted
+    `MetaModel` is stored under a hash of the normalized opening message, so a
+    repeated opener skips the extraction round trip to the LLM. Hit and miss
+    counters are kept in Redis so they add up across API workers; they are
+    updated in the background so a lookup costs a single round trip.
+
+    Attributes:
+        storage: Cache layer holding the extractions and counters.
+        ttl: Expiry of cached extractions in seconds; 0 disables it.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        """Initialize with a `CacheStorage` instance.
+
+        Args:
+            ttl: Expiry of cached extractions in seconds
+                (`TOPIC_STANCE_CACHE_TTL`, 604800).
+        """
+        self.storage = CacheStorage()
+        self.ttl = ttl if ttl is not None else int(
+            os.getenv("TOPIC_STANCE_CACHE_TTL", 604800)
+        )
+        self._counting: Set["asyncio.Task[None]"] = set()
+
+    async def get(self, message: str) -> Optional[MetaModel]:
+        """Look up the extraction for an opening message and count the outcome.
+
+        Args:
+            message: Opening message of the debate.
+
+        Returns:
+            MetaModel | None: Cached topic and stance, or None on a miss.
+        """
+        cached = await self.storage.get(opener_key(message))
+        if isinstance(cached, dict):
+            self._count("hits")
+            return MetaModel(**cached)
+        self._count("misses")
+        return None
+
+    async def set(self, message: str, meta: MetaModel) -> None:
+        """Store the extraction for an opening message.
+
+        Args:
+            message: Opening message of the debate.
+            meta: Topic and stance extracted from it.
+        """
+        await self.storage.set(opener_key(message), meta.model_dump(), ttl=self.ttl)
+
+    def _count(self, outcome: str) -> None:
+        """Increment a lookup counter without waiting for Redis."""
+        task = asyncio.create_task(self._increment(outcome))
+        self._counting.add(task)
+        task.add_done_callback(self._counting.discard)
+
+    async def _increment(self, outcome: str) -> None:
+        """Increment a lookup counter; failures only lose the count."""
+        try:
+            await self.storage.increment(STATS_KEY, outcome)
+        except Exception as error:
+            logger.error("topic_cache.count_failed", outcome=outcome, error=error)
+
+    async def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the resulting hit rate.
+
+        Returns:
+            dict: `hits`, `misses` and `hit_rate` (0 without lookups).
+        """
+        counters = await self.storage.get_counters(STATS_KEY)
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+def normalize_opener(message: str) -> str:
+    """Fold case, Unicode forms and whitespace so equivalent openers match."""
+    return " ".join(unicodedata.normalize("NFKC", message).casefold().split())
+
+
+def opener_key(message: str) -> str:
+    """Build the cache key of an opening message from its normalized hash.
+
+    The digest is the key's hash tag, so openers spread across cluster slots
+    instead of all sharing the `topic_stance` one.
+    """
+    digest = hashlib.sha256(normalize_opener(message).encode("utf-8")).hexdigest()
+    return f"topic_stance:{{{digest}}}"
@@ -1,50 +1,268 @@
-import json
+import os
+from app.domain.context import ConversationContext
+from app.domain.meta import MetaModel
+from app.services.memory.local_cache import INVALIDATION_CHANNEL, LocalCache
 from app.services.memory.memory import Memory
 from app.services.storage.cache_storage import CacheStorage
-from typing import Any
-
+from app.utils.message_adapter import decode_history, encode_history
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class WorkingMemory(Memory):
-    """Short-term working memory backed by the cache layer."""
+    """Short-term working memory backed by the cache layer.
+
+    Conversation history lives in a Redis list so each turn is an O(1) append
+    trimmed server-side to a bounded window, while the immutable topic/stance
+    metadata is stored as a single document under `{conversation_id}:meta`.
+
+    Every key of a conversation starts with its id, so `CacheStorage` gives
+    them the same hash tag and they live on one Redis Cluster node.
+
+    Both keys expire so Redis only holds active debates. With sliding expiry
+    (the default) every turn pushes the expiry forward, making the TTL an
+    idle timeout; otherwise it is a fixed lifetime counted from creation.
+
+    Because the metadata never changes, it is also kept in an in-process
+    `LocalCache`, so most turns read it without a Redis lookup or JSON
+    decode. With invalidation enabled, every meta write is announced on
+    `memory:invalidate` for the `CacheInvalidationListener` of other
+    processes.
+
+    History messages are stored in the compact `u:`/`a:`/`s:` form of
+    `MessageModel.compact_version` rather than as role/content documents,
+    and expanded back to dicts on read. Entries in either form are read, so
+    the setting can be flipped on a live deployment.
+    """
+
+    def __init__(
+        self,
+        max_messages: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        history_ttl: Optional[int] = None,
+        meta_ttl: Optional[int] = None,
+        sliding_expiry: Optional[bool] = None,
+        local_meta: Optional[LocalCache] = None,
+        publish_invalidations: Optional[bool] = None,
+        compact_history: Optional[bool] = None,
+    ):
+        """Initialize with a `CacheStorage` instance.
 
-    def __init__(self):
-        """Initialize with a `CacheStorage` instance."""
+        Unset arguments are read from environment variables.
+
+        Args:
+            max_messages: Size of the history window kept per conversation
+                (`MAX_TURNS`, 10).
+            max_bytes: Serialized history budget per conversation; 0 disables
+                it (`WORKING_MEMORY_MAX_BYTES`, 32768).
+            history_ttl: Expiry of history keys in seconds; 0 disables it
+                (`WORKING_MEMORY_HISTORY_TTL`, 86400).
+            meta_ttl: Expiry of topic/stance keys in seconds; 0 disables it
+                (`WORKING_MEMORY_META_TTL`, 86400).
+            sliding_expiry: Refresh expiries on every turn
+                (`WORKING_MEMORY_SLIDING_EXPIRY`, true).
+            local_meta: In-process cache of topic/stance; by default one
+                holding `LOCAL_META_CACHE_SIZE` (10000) entries for
+                `LOCAL_META_CACHE_TTL` (300) seconds. A size of 0 disables it.
+            publish_invalidations: Announce meta writes to other processes
+                (`LOCAL_META_CACHE_INVALIDATION`, false).
+            compact_history: Store history messages in compact form
+                (`WORKING_MEMORY_COMPACT_HISTORY`, true).
+        """
         self.storage = CacheStorage()
+        self.max_messages = _setting(max_messages, "MAX_TURNS", 10)
+        self.max_bytes = _setting(max_bytes, "WORKING_MEMORY_MAX_BYTES", 32768)
+        self.history_ttl = _setting(history_ttl, "WORKING_MEMORY_HISTORY_TTL", 86400)
+        self.meta_ttl = _setting(meta_ttl, "WORKING_MEMORY_META_TTL", 86400)
+        self.sliding_expiry = (
+            sliding_expiry
+            if sliding_expiry is not None
+            else os.getenv("WORKING_MEMORY_SLIDING_EXPIRY", "true").lower() == "true"
+        )
+        self.local_meta = local_meta if local_meta is not None else LocalCache(
+            max_entries=_setting(None, "LOCAL_META_CACHE_SIZE", 10000),
+            ttl=_setting(None, "LOCAL_META_CACHE_TTL", 300),
+        )
+        self.publish_invalidations = (
+            publish_invalidations
+            if publish_invalidations is not None
+            else os.getenv("LOCAL_META_CACHE_INVALIDATION", "false").lower() == "true"
+        )
+        self.compact_history = (
+            compact_history
+            if compact_history is not None
+            else os.getenv("WORKING_MEMORY_COMPACT_HISTORY", "true").lower() == "true"
+        )
 
     async def store_in_memory(self, key: str, data: Any) -> None:
-        """Append to an existing list stored under the key.
+        """Append one or more entries to the list stored under the key.
 
         Args:
             key: Memory key.
             data: Data to store; must be a Python object (not pre-serialized).
+                Lists are appended item by item, and role/content
+                messages are compacted when `compact_history` is set.
         """
         if isinstance(data, str):
             raise ValueError("Data should not be a pre-serialized string.")
-        existing_data = await self.retrieve_from_memory(key)
-        if not isinstance(existing_data, list):
-            existing_data = []
-        if isinstance(data, list):
-            existing_data.extend(data)
-        else:
-            existing_data.append(data)
-        await self.storage.set(key, existing_data)
+        values = data if isinstance(data, list) else [data]
+        if self.compact_history:
+            values = encode_history(values)
+        await self.storage.append_to_list(
+            key,
+            values,
+            max_length=self.max_messages,
+            max_bytes=self.max_bytes,
+            ttl=self.history_ttl,
+            sliding=self.sliding_expiry,
+        )
 
-    async def retrieve_from_memory(self, key: str) -> Any:
-        """Retrieve and deserialize data by key.
+    async def retrieve_from_memory(
+        self, key: str, last_n: Optional[int] = None
+    ) -> Optional[List[Any]]:
+        """Retrieve the newest entries stored under the key.
 
         Args:
             key: Memory key.
+            last_n: Number of newest entries to return; None returns the
+                whole window.
 
         Returns:
-            Any: Python object or None.
+            list | None: Entries oldest first, with compact messages expanded
+                to dicts, or None when the key is empty.
         """
-        raw = await self.storage.get(key)
-        if raw is None:
-            return None
-        if isinstance(raw, (list, dict)):
-            return raw
-        return json.loads(raw)
+        start = -last_n if last_n else 0
+        items = await self.storage.get_list(key, start, -1)
+        return decode_history(items) or None
+
+    async def store_meta(self, conversation_id: str, meta: Dict[str, str]) -> None:
+        """Store the topic/stance document of a conversation.
+
+        Args:
+            conversation_id: Conversation identifier.
+            meta: Topic and stance payload.
+        """
+        await self.storage.set(meta_key(conversation_id), meta, ttl=self.meta_ttl)
+        self.local_meta.set(conversation_id, MetaModel(**meta))
+        if self.publish_invalidations:
+            await self.storage.publish(INVALIDATION_CHANNEL, conversation_id)
+
+    async def retrieve_meta(self, conversation_id: str) -> Optional[Dict[str, str]]:
+        """Fetch the topic/stance document of a conversation.
+
+        Args:
+            conversation_id: Conversation identifier.
+
+        Returns:
+            dict | None: Topic and stance, or None if missing.
+        """
+        cached = self.local_meta.get(conversation_id)
+        if cached is not None:
+            return cached.model_dump()
+        meta = await self.storage.get(meta_key(conversation_id))
+        if isinstance(meta, dict):
+            self.local_meta.set(conversation_id, MetaModel(**meta))
+        return meta
+
+    async def store_summary(
+        self,
+        conversation_id: str,
+        summary: str,
+        cutoff: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Cache the latest rolling summary of a conversation.
+
+        Args:
+            conversation_id: Conversation identifier.
+            summary: Summary text.
+            cutoff: Role and content of the last message folded into it.
+        """
+        await self.storage.set(
+            summary_key(conversation_id),
+            {"summary": summary, "cutoff": cutoff},
+            ttl=self.meta_ttl,
+        )
+
+    async def retrieve_context(
+        self, conversation_id: str, last_n: Optional[int] = None
+    ) -> ConversationContext:
+        """Fetch topic/stance, summary and recent history in one cache round trip.
+
+        With sliding expiry, the keys' TTLs are refreshed in the same trip.
+        Topic/stance found in the local cache is not read from Redis again.
+
+        Args:
+            conversation_id: Conversation identifier.
+            last_n: Number of newest history entries to return; None returns
+                the whole window.
+
+        Returns:
+            ConversationContext: Meta and summary (None if missing) and history
+                entries.
+        """
+        meta = meta_key(conversation_id)
+        summary = summary_key(conversation_id)
+        touch = {}
+        if self.sliding_expiry:
+            expiries = {
+                meta: self.meta_ttl,
+                summary: self.meta_ttl,
+                conversation_id: self.history_ttl,
+            }
+            touch = {key: ttl for key, ttl in expiries.items() if ttl > 0}
+        local_meta = self.local_meta.get(conversation_id)
+        results = await self.storage.read_many(
+            keys=[summary] if local_meta else [meta, summary],
+            lists={conversation_id: (-last_n if last_n else 0, -1)},
+            touch=touch,
+        )
+        if local_meta is None and isinstance(results[meta], dict):
+            local_meta = MetaModel(**results[meta])
+            self.local_meta.set(conversation_id, local_meta)
+        summary_text, cutoff = split_summary(results[summary])
+        return ConversationContext(
+            meta=local_meta,
+            history=decode_history(results[conversation_id] or []),
+            summary=summary_text,
+            summary_cutoff=cutoff,
+        )
+
+    async def rehydrate(
+        self,
+        conversation_id: str,
+        meta: Dict[str, str],
+        history: List[Dict[str, str]],
+        summary: Optional[str] = None,
+        summary_cutoff: Optional[Dict[str, str]] = None,
+        lock_ttl: int = 10,
+    ) -> bool:
+        """Repopulate a conversation evicted from the cache.
+
+        A short-lived NX lock ensures that only one process across all
+        workers writes the rebuilt keys, and history is only pushed onto an
+        empty list so no turn is ever duplicated.
+
+        Args:
+            conversation_id: Conversation identifier.
+            meta: Topic and stance loaded from durable storage.
+            history: Newest messages loaded from durable storage, oldest first.
+            summary: Latest rolling summary, if any.
+            summary_cutoff: Last message folded into the summary.
+            lock_ttl: Seconds the rehydration lock is held at most.
+
+        Returns:
+            bool: True if this call repopulated the cache.
+        """
+        acquired = await self.storage.set(
+            rehydrate_key(conversation_id), 1, ttl=lock_ttl, nx=True
+        )
+        if not acquired:
+            return False
+        await self.store_meta(conversation_id, meta)
+        if summary:
+            await self.store_summary(conversation_id, summary, cutoff=summary_cutoff)
+        if history and not await self.storage.get_list(conversation_id, 0, 0):
+            await self.store_in_memory(conversation_id, history)
+        return True
 
     async def delete_from_memory(self, key: str) -> None:
         """Delete data from memory by key.
@@ -53,3 +271,40 @@ class WorkingMemory(Memory):
             key: Memory key to delete.
         """
         await self.storage.delete(key)
+        if key.endswith(":meta"):
+            conversation_id = key[: -len(":meta")]
+            self.local_meta.invalidate(conversation_id)
+            if self.publish_invalidations:
+                await self.storage.publish(INVALIDATION_CHANNEL, conversation_id)
+
+
+def meta_key(conversation_id: str) -> str:
+    """Build the memory key that holds a conversation's topic/stance."""
+    return f"{conversation_id}:meta"
+
+
+def summary_key(conversation_id: str) -> str:
+    """Build the memory key that holds a conversation's rolling summary."""
+    return f"{conversation_id}:summary"
+
+
+def split_summary(
+    cached: Any,
+) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
+    """Split a cached summary into its text and cutoff message.
+
+    Summaries cached before the cutoff was recorded are plain strings.
+    """
+    if isinstance(cached, dict):
+        return cached.get("summary"), cached.get("cutoff")
+    return cached, None
+
+
+def rehydrate_key(conversation_id: str) -> str:
+    """Build the memory key of a conversation's rehydration lock."""
+    return f"{conversation_id}:rehydrate"
+
+
+def _setting(value: Optional[int], env_var: str, default: int) -> int:
+    """Resolve an integer setting from an argument or environment variable."""
+    return value if value is not None else int(os.getenv(env_var, default))
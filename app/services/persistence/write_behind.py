@@ -0,0 +1,358 @@
+import asyncio
+import json
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.services.llm.llm_io import LLMConversationMessage
+from app.services.storage.base import Storage
+from app.services.storage.connections import get_redis_client
+from app.utils.log import get_logger
+
+TURNS_STREAM = "persistence:turns"
+DEAD_LETTER_STREAM = "persistence:turns:dead"
+CONSUMER_GROUP = "persistence-workers"
+
+StreamEntry = Tuple[str, Dict[str, str]]
+
+# Errors that say the database or Redis is unreachable, not that a turn is bad.
+TRANSIENT_ERRORS = (
+    OperationalError,
+    InterfaceError,
+    PoolTimeoutError,
+    RedisConnectionError,
+    RedisTimeoutError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+logger = get_logger(__name__)
+
+
+class TurnQueue:
+    """Producer side of the write-behind pipeline.
+
+    Turns are appended to a Redis Stream instead of being written to
+    PostgreSQL on the request path; a `PersistenceWorker` drains them later.
+    Each turn carries a random `turn_id`, so a redelivered entry is
+    recognized and not inserted twice.
+    """
+
+    def __init__(self, stream: str = TURNS_STREAM):
+        """Initialize the queue.
+
+        Args:
+            stream: Name of the Redis Stream holding pending turns.
+        """
+        self.stream = stream
+
+    async def enqueue(
+        self, conversation_id: str, messages: Sequence[LLMConversationMessage]
+    ) -> str:
+        """Append a turn to the stream.
+
+        Args:
+            conversation_id: Conversation the turn belongs to.
+            messages: User and assistant messages of the turn.
+
+        Returns:
+            str: Stream entry ID assigned by Redis.
+        """
+        redis = await get_redis_client()
+        payload = {
+            "turn_id": uuid.uuid4().hex,
+            "conversation_id": conversation_id,
+            "created_at": datetime.now().isoformat(),
+            "messages": [message.model_dump() for message in messages],
+        }
+        return await redis.xadd(self.stream, {"payload": json.dumps(payload)})
+
+
+class PersistenceWorker:
+    """Consumer side of the write-behind pipeline.
+
+    Reads turns from the stream through a consumer group, writes each batch
+    with a multi-row insert in one transaction and acknowledges it. Entries
+    left pending by a crashed consumer are reclaimed after `claim_idle_ms`,
+    and entries that keep failing are moved to a dead-letter stream.
+    Acknowledged entries are deleted from the stream, and the dead-letter
+    stream is capped at roughly `dead_letter_maxlen` entries, so neither
+    grows without bound in Redis.
+
+    Delivery is at least once: a batch saved but not acknowledged (e.g. the
+    XACK failed) is delivered again. Turns are inserted with their `turn_id`
+    and `ON CONFLICT DO NOTHING`, so redelivery never duplicates rows.
+    Only row-specific errors count as failed deliveries. Errors reaching
+    Redis or PostgreSQL leave the whole batch pending, are logged and
+    retried with exponential backoff instead of stopping the worker, so an
+    outage never dead-letters turns.
+
+    Attributes:
+        store: Durable storage implementing `save_many`.
+        batch_size: Maximum number of turns written per transaction.
+        block_ms: How long a read waits for new entries.
+        max_deliveries: Attempts before an entry is dead-lettered.
+        claim_idle_ms: Idle time after which pending entries are reclaimed.
+        retry_backoff: First delay after a failed batch, doubled per
+            consecutive failure.
+        max_retry_backoff: Longest delay between failed batches.
+        dead_letter_maxlen: Approximate cap on the dead-letter stream length.
+    """
+
+    def __init__(
+        self,
+        store: Storage,
+        *,
+        stream: str = TURNS_STREAM,
+        dead_letter_stream: str = DEAD_LETTER_STREAM,
+        group: str = CONSUMER_GROUP,
+        consumer: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        block_ms: Optional[int] = None,
+        max_deliveries: Optional[int] = None,
+        claim_idle_ms: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        max_retry_backoff: Optional[float] = None,
+        dead_letter_maxlen: Optional[int] = None,
+        on_persisted: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+    ) -> None:
+        """Initialize the worker, reading unset tunables from env vars.
+
+        Args:
+            store: Durable storage implementing `save_many`.
+            stream: Name of the stream holding pending turns.
+            dead_letter_stream: Stream receiving entries that keep failing.
+            group: Consumer group shared by all workers.
+            consumer: Name of this consumer; defaults to hostname and PID.
+            batch_size: Turns per batch (`PERSISTENCE_BATCH_SIZE`, 100).
+            block_ms: Read timeout (`PERSISTENCE_BLOCK_MS`, 1000).
+            max_deliveries: Attempts per entry (`PERSISTENCE_MAX_DELIVERIES`, 5).
+            claim_idle_ms: Reclaim threshold (`PERSISTENCE_CLAIM_IDLE_MS`, 60000).
+            retry_backoff: Seconds to wait after a failed batch
+                (`PERSISTENCE_RETRY_BACKOFF_SECONDS`, 1).
+            max_retry_backoff: Backoff cap in seconds
+                (`PERSISTENCE_MAX_RETRY_BACKOFF_SECONDS`, 30).
+            dead_letter_maxlen: Approximate dead-letter stream cap
+                (`PERSISTENCE_DEAD_LETTER_MAXLEN`, 10000).
+            on_persisted: Hook awaited after each batch with the ids of the
+                conversations whose turns were saved (e.g. summary
+                compaction); not called when nothing was saved.
+        """
+        self.store = store
+        self.stream = stream
+        self.dead_letter_stream = dead_letter_stream
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size or int(os.getenv("PERSISTENCE_BATCH_SIZE", 100))
+        self.block_ms = block_ms or int(os.getenv("PERSISTENCE_BLOCK_MS", 1000))
+        self.max_deliveries = max_deliveries or int(
+            os.getenv("PERSISTENCE_MAX_DELIVERIES", 5)
+        )
+        self.claim_idle_ms = claim_idle_ms or int(
+            os.getenv("PERSISTENCE_CLAIM_IDLE_MS", 60000)
+        )
+        self.retry_backoff = retry_backoff or float(
+            os.getenv("PERSISTENCE_RETRY_BACKOFF_SECONDS", 1)
+        )
+        self.max_retry_backoff = max_retry_backoff or float(
+            os.getenv("PERSISTENCE_MAX_RETRY_BACKOFF_SECONDS", 30)
+        )
+        self.dead_letter_maxlen = dead_letter_maxlen or int(
+            os.getenv("PERSISTENCE_DEAD_LETTER_MAXLEN", 10000)
+        )
+        self.on_persisted = on_persisted
+
+    async def ensure_group(self) -> None:
+        """Create the consumer group (and stream) if it does not exist yet."""
+        redis = await get_redis_client()
+        try:
+            await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Drain the stream until `stop` is set.
+
+        A failing batch never ends the loop: the error is logged and the
+        next batch is attempted after a growing delay, so a Redis or
+        PostgreSQL outage only pauses persistence.
+
+        Args:
+            stop: Event that ends the loop after the current batch.
+        """
+        stop = stop or asyncio.Event()
+        group_ready = False
+        failures = 0
+        while not stop.is_set():
+            try:
+                if not group_ready:
+                    await self.ensure_group()
+                    group_ready = True
+                await self.run_once()
+                failures = 0
+            except Exception:
+                failures += 1
+                delay = min(
+                    self.max_retry_backoff, self.retry_backoff * 2 ** (failures - 1)
+                )
+                logger.exception(
+                    "persistence.batch_failed", failures=failures, retry_in=delay
+                )
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """Process one batch of reclaimed or new entries.
+
+        Returns:
+            int: Number of entries handled (acknowledged or dead-lettered).
+        """
+        entries = await self._claim_stale()
+        if not entries:
+            entries = await self._read_new()
+        if not entries:
+            return 0
+        handled, saved = await self._persist(entries)
+        if self.on_persisted is not None and saved:
+            try:
+                conversation_ids = [
+                    json.loads(fields["payload"])["conversation_id"]
+                    for _, fields in saved
+                ]
+                await self.on_persisted(conversation_ids)
+            except Exception as e:
+                logger.error("persistence.hook_failed", error=e)
+        return handled
+
+    async def _read_new(self) -> List[StreamEntry]:
+        """Read entries never delivered to any consumer of the group."""
+        redis = await get_redis_client()
+        response = await redis.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: ">"},
+            count=self.batch_size,
+            block=self.block_ms,
+        )
+        return [entry for _, entries in response or [] for entry in entries]
+
+    async def _claim_stale(self) -> List[StreamEntry]:
+        """Take over entries left pending by consumers that stopped responding."""
+        redis = await get_redis_client()
+        response = await redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=self.claim_idle_ms,
+            count=self.batch_size,
+        )
+        return [entry for entry in response[1] if entry[1]]
+
+    async def _persist(
+        self, entries: List[StreamEntry]
+    ) -> Tuple[int, List[StreamEntry]]:
+        """Write a batch in one transaction, isolating failures per entry.
+
+        Transient errors are re-raised so the batch stays pending and
+        `run` backs off; only row-specific errors count against an entry.
+
+        Args:
+            entries: Stream entries to persist.
+
+        Returns:
+            Tuple[int, List[StreamEntry]]: Number of entries acknowledged or
+                dead-lettered, and the entries that were saved.
+        """
+        try:
+            await self.store.save_many([_decode_turn(fields) for _, fields in entries])
+            await self._ack(*[entry_id for entry_id, _ in entries])
+            return len(entries), entries
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            if len(entries) == 1:
+                return await self._handle_failure(entries[0]), []
+
+        # The batch failed as a whole: retry entry by entry so one poisoned
+        # turn does not block the rest.
+        handled = 0
+        saved = []
+        for entry_id, fields in entries:
+            try:
+                await self.store.save_many([_decode_turn(fields)])
+                await self._ack(entry_id)
+                handled += 1
+                saved.append((entry_id, fields))
+            except Exception as e:
+                if _is_transient(e):
+                    raise
+                handled += await self._handle_failure((entry_id, fields))
+        return handled, saved
+
+    async def _ack(self, *entry_ids: str) -> None:
+        """Acknowledge entries and delete them so the stream stays bounded."""
+        redis = await get_redis_client()
+        await redis.xack(self.stream, self.group, *entry_ids)
+        await redis.xdel(self.stream, *entry_ids)
+
+    async def _handle_failure(self, entry: StreamEntry) -> int:
+        """Dead-letter an entry once it exhausted its delivery attempts.
+
+        Entries below the limit stay pending and are retried when reclaimed.
+
+        Args:
+            entry: The failing stream entry.
+
+        Returns:
+            int: 1 if the entry was dead-lettered, 0 if it stays pending.
+        """
+        entry_id, fields = entry
+        redis = await get_redis_client()
+        pending = await redis.xpending_range(
+            self.stream, self.group, min=entry_id, max=entry_id, count=1
+        )
+        deliveries = pending[0]["times_delivered"] if pending else self.max_deliveries
+        if deliveries < self.max_deliveries:
+            return 0
+        await redis.xadd(
+            self.dead_letter_stream,
+            {**fields, "source_id": entry_id, "deliveries": deliveries},
+            maxlen=self.dead_letter_maxlen,
+            approximate=True,
+        )
+        await self._ack(entry_id)
+        return 1
+
+
+def _is_transient(error: Exception) -> bool:
+    """Tell whether an error is an outage rather than a problem with a turn."""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def _decode_turn(fields: Dict[str, str]) -> Dict[str, Any]:
+    """Deserialize a stream entry into a turn payload for `save_many`."""
+    payload = json.loads(fields["payload"])
+    payload["created_at"] = datetime.fromisoformat(payload["created_at"])
+    return payload
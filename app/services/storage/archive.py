@@ -0,0 +1,234 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+
+from app.services.storage.partitions import PartitionManager, add_months, month_start
+from app.utils.log import get_logger
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+ARCHIVE_FORMATS = ("ndjson", "parquet")
+ARCHIVE_COLUMNS = ("id", "conversation_id", "role", "content", "created_at")
+
+logger = get_logger(__name__)
+
+
+class PartitionArchiver:
+    """Moves message partitions older than the retention window to files.
+
+    Each expired month is detached from the message table, so history reads
+    and index maintenance never touch it again, then streamed to a
+    gzip-compressed NDJSON or zstd-compressed Parquet file and dropped once
+    the file holds every row. Files are written under a temporary name and
+    renamed when complete, and partitions left detached by an interrupted
+    run are picked up again, so the job can be rerun safely.
+
+    Attributes:
+        partitions: Manager of the message table's partitions.
+        directory: Directory archive files are written to.
+        format: `ndjson` or `parquet`.
+        retention_months: Months kept attached besides the current one.
+        drop: Drop partitions after exporting them.
+        batch_size: Rows fetched per round trip while exporting.
+    """
+
+    def __init__(
+        self,
+        partitions: PartitionManager,
+        directory: Optional[str] = None,
+        format: Optional[str] = None,
+        retention_months: Optional[int] = None,
+        drop: Optional[bool] = None,
+        batch_size: int = 10000,
+    ) -> None:
+        """Initialize the archiver.
+
+        Args:
+            partitions: Manager of the message table's partitions.
+            directory: Output directory (`MESSAGE_ARCHIVE_DIR`, archive).
+            format: Output format (`MESSAGE_ARCHIVE_FORMAT`, ndjson).
+            retention_months: Months kept attached besides the current one
+                (`MESSAGE_RETENTION_MONTHS`, 6).
+            drop: Drop exported partitions (`MESSAGE_ARCHIVE_DROP`, true).
+            batch_size: Rows fetched per round trip while exporting.
+
+        Raises:
+            ValueError: If the format is unknown.
+            RuntimeError: If Parquet is requested without pyarrow.
+        """
+        self.partitions = partitions
+        self.directory = directory or os.getenv("MESSAGE_ARCHIVE_DIR", "archive")
+        self.format = format or os.getenv("MESSAGE_ARCHIVE_FORMAT", "ndjson")
+        if self.format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown MESSAGE_ARCHIVE_FORMAT: {self.format}")
+        if self.format == "parquet" and pyarrow is None:
+            raise RuntimeError("MESSAGE_ARCHIVE_FORMAT=parquet requires the pyarrow package.")
+        self.retention_months = (
+            retention_months
+            if retention_months is not None
+            else int(os.getenv("MESSAGE_RETENTION_MONTHS", 6))
+        )
+        self.drop = (
+            drop
+            if drop is not None
+            else os.getenv("MESSAGE_ARCHIVE_DROP", "true").lower() == "true"
+        )
+        self.batch_size = batch_size
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """First month that is kept; every earlier month is archived."""
+        return add_months(month_start(now or datetime.now()), -self.retention_months)
+
+    async def archive_expired(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Archive every monthly partition older than the retention window.
+
+        Args:
+            now: Reference time; defaults to the current time.
+
+        Returns:
+            list[dict]: One result per archived partition (see `archive`).
+        """
+        cutoff = self.cutoff(now)
+        results = []
+        for name, month, attached in await self.partitions.partitions():
+            if month >= cutoff:
+                continue
+            if attached:
+                await self.partitions.detach(name)
+            results.append(await self.archive(name))
+        return results
+
+    async def archive(self, name: str) -> Dict[str, Any]:
+        """Export a detached partition to a file and drop it.
+
+        Args:
+            name: Detached partition name.
+
+        Returns:
+            dict: Partition name, rows written, file path and size, and
+                whether the partition was dropped.
+
+        Raises:
+            RuntimeError: If the file does not hold every row; the partition
+                is kept.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        extension = "ndjson.gz" if self.format == "ndjson" else "parquet"
+        path = os.path.join(self.directory, f"{name}.{extension}")
+        temporary = f"{path}.tmp"
+
+        engine = self.partitions.engine
+        async with engine.connect() as conn:
+            expected = (
+                await conn.execute(text(f'SELECT count(*) FROM "{name}"'))
+            ).scalar()
+            result = await conn.stream(
+                text(
+                    f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM \"{name}\" "
+                    "ORDER BY created_at, id"
+                )
+            )
+            batches = (
+                [dict(row._mapping) for row in rows]
+                async for rows in result.partitions(self.batch_size)
+            )
+            if self.format == "ndjson":
+                written = await write_ndjson(temporary, batches)
+            else:
+                written = await write_parquet(temporary, batches)
+
+        if written != expected:
+            os.remove(temporary)
+            raise RuntimeError(
+                f"Archived {written} of {expected} rows of {name}; partition kept."
+            )
+        os.replace(temporary, path)
+
+        if self.drop:
+            async with engine.begin() as conn:
+                await conn.execute(text(f'DROP TABLE "{name}"'))
+        archived = {
+            "partition": name,
+            "rows": written,
+            "path": path,
+            "bytes": os.path.getsize(path),
+            "dropped": self.drop,
+        }
+        logger.info("archive.partition_archived", **archived)
+        return archived
+
+
+async def write_ndjson(
+    path: str, batches: AsyncIterator[Sequence[Dict[str, Any]]]
+) -> int:
+    """Write row batches as gzip-compressed NDJSON, one object per line.
+
+    Args:
+        path: Output file.
+        batches: Row dicts in batches; datetimes are written in ISO format.
+
+    Returns:
+        int: Rows written.
+    """
+    written = 0
+    with gzip.open(path, "wt", encoding="utf-8") as output:
+        async for batch in batches:
+            output.writelines(
+                json.dumps(row, ensure_ascii=False, default=_isoformat) + "\n"
+                for row in batch
+            )
+            written += len(batch)
+    return written
+
+
+async def write_parquet(
+    path: str, batches: AsyncIterator[Sequence[Dict[str, Any]]]
+) -> int:
+    """Write row batches as a zstd-compressed Parquet file.
+
+    Args:
+        path: Output file.
+        batches: Row dicts in batches with the `ARCHIVE_COLUMNS` keys.
+
+    Returns:
+        int: Rows written.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet archives require the pyarrow package.")
+    schema = pyarrow.schema(
+        [
+            ("id", pyarrow.int64()),
+            ("conversation_id", pyarrow.string()),
+            ("role", pyarrow.string()),
+            ("content", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us")),
+        ]
+    )
+    written = 0
+    with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        async for batch in batches:
+            rows = [
+                {**row, "role": getattr(row["role"], "value", row["role"])}
+                for row in batch
+            ]
+            writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+            written += len(rows)
+    return written
+
+
+def _isoformat(value: Any) -> str:
+    """JSON fallback for datetimes and enum values."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(getattr(value, "value", value))
@@ -18,6 +18,16 @@ class Storage(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def save_many(self, turns: List[Dict[str, Any]]) -> None:
+        """Persist several conversation turns in a single transaction.
+
+        Args:
+            turns: Turn payloads with `conversation_id`, `messages` and
+                optionally `created_at`.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def get(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Retrieve records filtered by the provided criteria.
@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Tuple
+
+from redis.asyncio.cluster import RedisCluster
+
+from app.services.storage.connections import get_redis_client
+
+
+BASE_KIND = "base"
+
+
+async def memory_usage_by_namespace(
+    max_keys: int = 10000, batch_size: int = 500
+) -> Dict[str, Any]:
+    """Report Redis memory usage grouped by key namespace and kind.
+
+    Keys are walked with SCAN (never KEYS) and sized with MEMORY USAGE in
+    pipelined batches, so the report is safe to run against a live instance.
+    The namespace is the key prefix before the first `:`; within it, keys
+    are grouped by kind, the suffix after the owner (`meta`, `summary`,
+    `bytes`...), so history and metadata sizes are reported apart. Keys
+    without a suffix, such as conversation history, are of kind `base`.
+    On Redis Cluster every primary is scanned and `used_memory` is summed
+    over them.
+
+    Args:
+        max_keys: Upper bound on the number of keys inspected.
+        batch_size: Keys sized per pipeline round trip.
+
+    Returns:
+        dict: Server-wide memory figures plus `keys` and `bytes` per
+            namespace and per kind; `complete` is False when `max_keys` cut
+            the scan short of the end of the keyspace.
+    """
+    redis = await get_redis_client()
+    info = await _memory_info(redis)
+
+    namespaces: Dict[str, Dict[str, Any]] = {}
+    batch: List[str] = []
+    scanned = 0
+    complete = True
+    async for key in redis.scan_iter(count=batch_size):
+        if scanned >= max_keys:
+            # SCAN had more keys to return, so its cursor was not back to 0.
+            complete = False
+            break
+        batch.append(key)
+        scanned += 1
+        if len(batch) >= batch_size:
+            await _account(redis, batch, namespaces)
+            batch = []
+    if batch:
+        await _account(redis, batch, namespaces)
+
+    return {
+        "used_memory": info.get("used_memory"),
+        "used_memory_human": info.get("used_memory_human"),
+        "maxmemory": info.get("maxmemory"),
+        "maxmemory_policy": info.get("maxmemory_policy"),
+        "scanned_keys": scanned,
+        "complete": complete,
+        "namespaces": namespaces,
+    }
+
+
+async def _account(
+    redis: Any, keys: List[str], namespaces: Dict[str, Dict[str, Any]]
+) -> None:
+    """Add the memory usage of a batch of keys to the namespace totals."""
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.memory_usage(key)
+        sizes = await pipe.execute()
+    for key, size in zip(keys, sizes):
+        namespace, kind = _classify(key)
+        totals = namespaces.setdefault(namespace, {"keys": 0, "bytes": 0, "kinds": {}})
+        kind_totals = totals["kinds"].setdefault(kind, {"keys": 0, "bytes": 0})
+        for bucket in (totals, kind_totals):
+            bucket["keys"] += 1
+            bucket["bytes"] += size or 0
+
+
+def _classify(key: str) -> Tuple[str, str]:
+    """Split a key into its namespace and kind.
+
+    Hash-tagged segments (`{conv-1}`) identify the owner and are dropped;
+    without a hash tag the segment after the namespace is the owner. What
+    remains is the kind, e.g. `memory:{conv-1}:meta` and `memory:conv-1:meta`
+    are `("memory", "meta")` and `memory:topic_stance:{abc}` is
+    `("memory", "topic_stance")`.
+    """
+    namespace, *segments = key.split(":")
+    untagged = [s for s in segments if not (s.startswith("{") and s.endswith("}"))]
+    suffix = untagged if len(untagged) < len(segments) else segments[1:]
+    return namespace, ":".join(suffix) or BASE_KIND
+
+
+async def _memory_info(redis: Any) -> Dict[str, Any]:
+    """Read INFO memory, summing `used_memory` over cluster primaries."""
+    if not isinstance(redis, RedisCluster):
+        return await redis.info("memory")
+    per_node = await redis.info("memory", target_nodes=RedisCluster.PRIMARIES)
+    if "used_memory" in per_node:
+        # A single-primary cluster answers with that node's info directly.
+        return per_node
+    nodes = list(per_node.values())
+    used_memory = sum(node.get("used_memory", 0) for node in nodes)
+    return {
+        "used_memory": used_memory,
+        "used_memory_human": f"{used_memory / 1024 / 1024:.2f}M",
+        "maxmemory": sum(node.get("maxmemory", 0) for node in nodes),
+        "maxmemory_policy": nodes[0].get("maxmemory_policy") if nodes else None,
+    }
+
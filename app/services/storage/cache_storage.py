@@ -1,7 +1,40 @@
-import json
-from typing import Any, Optional, Union
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from app.services.storage.connections import get_redis_client
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import NoScriptError, ResponseError
+
+from app.services.storage.codecs import ValueCodec
+from app.services.storage.connections import get_redis_client, redis_mode
+from app.utils.metrics import timed
+
+# Drops the oldest entries of list KEYS[1] until its serialized size fits in
+# ARGV[1] bytes, always keeping the newest entry. KEYS[2] holds an upper bound
+# of the list's size, raised by the ARGV[2] bytes just pushed; while a known
+# bound is within budget the list is not read at all. Otherwise the list is
+# measured, trimmed and the bound reset. Returns the number of entries dropped.
+TRIM_TO_BYTES_SCRIPT = """
+local pushed = tonumber(ARGV[2])
+local bound = redis.call('INCRBY', KEYS[2], pushed)
+if bound > pushed and bound <= tonumber(ARGV[1]) then
+  return 0
+end
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+local total = 0
+for i = 1, #items do
+  total = total + #items[i]
+end
+local dropped = 0
+while total > tonumber(ARGV[1]) and dropped < #items - 1 do
+  dropped = dropped + 1
+  total = total - #items[dropped]
+end
+if dropped > 0 then
+  redis.call('LTRIM', KEYS[1], dropped, -1)
+end
+redis.call('SET', KEYS[2], total, 'KEEPTTL')
+return dropped
+"""
 
 
 class CacheStorage:
@@ -9,31 +42,67 @@ class CacheStorage:
 
     Provides simple get/set/delete operations plus utilities to append user-bot
     interactions, enabling fast retrieval of the latest turns within a debate.
+
+    Values and list items are serialized by a `ValueCodec` (orjson, json or
+    msgpack, optionally zstd-compressed) behind a small version header, so
+    the format can change without invalidating stored keys.
+
+    With hash tags enabled (the default on Redis Cluster), keys are tagged
+    by their first segment, so `conv-1`, `conv-1:meta` and `conv-1:summary`
+    become `memory:{conv-1}`, `memory:{conv-1}:meta` and
+    `memory:{conv-1}:summary` and share a cluster slot. A conversation's
+    keys can then be read in one pipeline and used together in scripts on
+    any topology. Standalone and Sentinel deployments keep the untagged
+    `memory:conv-1` keys unless `CACHE_KEY_HASH_TAGS` opts in, since turning
+    tags on renames every key and orphans the conversations already cached.
+
+    History written before it moved to Redis lists is a single JSON-array
+    string. List operations that hit such a key convert it to a list holding
+    the same entries and retry, instead of failing with WRONGTYPE.
     """
 
-    def __init__(self, namespace="memory"):
+    def __init__(
+        self,
+        namespace="memory",
+        codec: Optional[ValueCodec] = None,
+        hash_tags: Optional[bool] = None,
+    ):
         """Initialize the cache wrapper.
 
         Args:
             namespace: Prefix applied to all Redis keys.
+            codec: Value serializer; None builds one from `CACHE_*` env vars.
+            hash_tags: Hash-tag keys by their first segment
+                (`CACHE_KEY_HASH_TAGS`; true on a cluster, false otherwise).
         """
         self.namespace = namespace
+        self.codec = codec or ValueCodec.from_env()
+        self._trim_script = None
+        if hash_tags is None:
+            default = "true" if redis_mode() == "cluster" else "false"
+            hash_tags = os.getenv("CACHE_KEY_HASH_TAGS", default).lower() == "true"
+        self.hash_tags = hash_tags
 
     async def _get_redis(self):
-        """Get a Redis client connection (singleton)."""
-        return await get_redis_client()
+        """Get the shared binary-safe Redis client."""
+        return await get_redis_client(decode_responses=False)
 
     def _make_key(self, key: str) -> str:
-        """Build a namespaced Redis key.
+        """Build a namespaced, hash-tagged Redis key.
 
         Args:
-            key: Base key.
+            key: Base key. A key that already contains a `{...}` hash tag is
+                only namespaced.
 
         Returns:
             str: Namespaced key.
         """
-        return f"{self.namespace}:{key}"
+        if not self.hash_tags or "{" in key:
+            return f"{self.namespace}:{key}"
+        owner, separator, rest = key.partition(":")
+        return f"{self.namespace}:{{{owner}}}{separator}{rest}"
 
+    @timed("cache.get")
     async def get(self, key: str) -> Any:
         """Fetch and deserialize a value by key.
 
@@ -45,38 +114,283 @@ class CacheStorage:
         """
         redis = await self._get_redis()
         data = await redis.get(self._make_key(key))
-        if data is not None:
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return data
-        return None
-
-    async def set(self, key: str, value: Any, ttl: int = 0) -> None:
+        return self.codec.decode(data)
+
+    @timed("cache.set")
+    async def set(
+        self, key: str, value: Any, ttl: int = 0, nx: bool = False
+    ) -> bool:
         """Serialize and store a value, optionally with TTL.
 
         Args:
             key: Cache key.
             value: Value to serialize and store.
             ttl: Expiration in seconds; 0 disables expiration.
+            nx: Only store the value if the key does not exist yet.
+
+        Returns:
+            bool: False if `nx` was set and the key already existed.
         """
         redis = await self._get_redis()
-        data = json.dumps(value)
+        data = self.codec.encode(value)
         namespaced_key = self._make_key(key)
+        options: Dict[str, Any] = {}
         if ttl > 0:
-            await redis.set(namespaced_key, data, ex=ttl)
-        else:
-            await redis.set(namespaced_key, data)
+            options["ex"] = ttl
+        if nx:
+            options["nx"] = True
+        result = await redis.set(namespaced_key, data, **options)
+        return bool(result) if nx else True
 
+    @timed("cache.delete")
     async def delete(self, key: str) -> None:
-        """Remove a key from Redis.
+        """Remove a key, and the size bound of a byte-budgeted list, from Redis.
+
+        Hash-tagged keys share a slot and go in one DEL; untagged ones may
+        live on different cluster nodes, so they are deleted one by one in a
+        non-transactional pipeline.
 
         Args:
             key: Key to delete.
         """
         redis = await self._get_redis()
-        await redis.delete(self._make_key(key))
+        keys = (self._make_key(key), self._make_key(f"{key}:bytes"))
+        if self.hash_tags:
+            await redis.delete(*keys)
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for namespaced_key in keys:
+                pipe.delete(namespaced_key)
+            await pipe.execute()
+
+    @timed("cache.append_to_list")
+    async def append_to_list(
+        self,
+        key: str,
+        values: List[Any],
+        max_length: int = 0,
+        max_bytes: int = 0,
+        ttl: int = 0,
+        sliding: bool = True,
+    ) -> None:
+        """Append values to a Redis list, optionally trimming it server-side.
+
+        RPUSH, the trims and the expiry run in a single transactional
+        pipeline, so concurrent writers never overwrite each other's entries
+        and the list never grows past its entry or byte budget. Redis Cluster
+        has no MULTI across a pipeline, so there the commands are only
+        pipelined; each one is atomic on its own, and the trims still cut
+        the list back to its budget.
+
+        The byte budget is enforced by a script called by its SHA, next to a
+        `<key>:bytes` size bound, so the list is only read back when it may
+        be over budget. On a cluster this needs hash-tagged keys. `sliding`
+        False relies on EXPIRE NX, so Redis 7.0 or newer is required.
+
+        Args:
+            key: Cache key of the list.
+            values: Items to serialize and append, oldest first.
+            max_length: Number of newest items to keep; 0 disables trimming.
+            max_bytes: Serialized size budget; the oldest items are dropped
+                until the list fits (the newest item is always kept).
+                0 disables the byte budget.
+            ttl: Expiration in seconds; 0 leaves the expiry untouched.
+            sliding: Refresh the expiry on every append; when False it is only
+                set if the key has none yet.
+        """
+        if not values:
+            return
+        redis = await self._get_redis()
+        namespaced_key = self._make_key(key)
+        transaction = not isinstance(redis, RedisCluster)
+        encoded = [self.codec.encode(value) for value in values]
+        pushed = sum(len(item) for item in encoded)
+        bytes_key = self._make_key(f"{key}:bytes")
+        trim = self._get_trim_script(redis) if max_bytes > 0 else None
+        for attempt in range(2):
+            async with redis.pipeline(transaction=transaction) as pipe:
+                pipe.rpush(namespaced_key, *encoded)
+                if max_length > 0:
+                    pipe.ltrim(namespaced_key, -max_length, -1)
+                if trim is not None:
+                    pipe.evalsha(
+                        trim.sha,
+                        2,
+                        namespaced_key,
+                        bytes_key,
+                        max_bytes,
+                        pushed,
+                    )
+                if ttl > 0:
+                    pipe.expire(namespaced_key, ttl, nx=not sliding)
+                    if trim is not None:
+                        pipe.expire(bytes_key, ttl, nx=not sliding)
+                try:
+                    await pipe.execute()
+                    return
+                except NoScriptError:
+                    # The entries were pushed but the script never ran; load it
+                    # and trim, counting the pushed bytes into the size bound.
+                    await trim(
+                        keys=[namespaced_key, bytes_key],
+                        args=[max_bytes, pushed],
+                        client=redis,
+                    )
+                    return
+                except ResponseError as error:
+                    if attempt or not _is_wrong_type(error):
+                        raise
+            await self._convert_legacy_list(redis, namespaced_key)
+
+    @timed("cache.get_list")
+    async def get_list(self, key: str, start: int = 0, end: int = -1) -> List[Any]:
+        """Fetch and deserialize a slice of a Redis list.
+
+        Args:
+            key: Cache key of the list.
+            start: First index (negative values count from the tail).
+            end: Last index, inclusive (negative values count from the tail).
+
+        Returns:
+            list: Deserialized items; empty if the key does not exist.
+        """
+        redis = await self._get_redis()
+        namespaced_key = self._make_key(key)
+        try:
+            items = await redis.lrange(namespaced_key, start, end)
+        except ResponseError as error:
+            if not _is_wrong_type(error):
+                raise
+            await self._convert_legacy_list(redis, namespaced_key)
+            items = await redis.lrange(namespaced_key, start, end)
+        return [self.codec.decode(item) for item in items]
+
+    @timed("cache.read_many")
+    async def read_many(
+        self,
+        keys: Sequence[str] = (),
+        lists: Optional[Dict[str, Tuple[int, int]]] = None,
+        touch: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """Fetch several values and list slices in a single round trip.
+
+        All reads are queued on one non-transactional pipeline, so the cost is
+        one network hop regardless of how many keys are requested.
+
+        Args:
+            keys: Cache keys holding plain values (read with GET).
+            lists: Cache keys holding lists, mapped to the `(start, end)` slice
+                to read with LRANGE.
+            touch: Cache keys whose expiry is refreshed in the same round
+                trip, mapped to their TTL in seconds.
+
+        Returns:
+            dict: Deserialized results keyed by the un-namespaced key; missing
+                values are None and missing lists are empty.
+        """
+        lists = lists or {}
+        redis = await self._get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(self._make_key(key))
+            for key, (start, end) in lists.items():
+                pipe.lrange(self._make_key(key), start, end)
+            for key, ttl in (touch or {}).items():
+                pipe.expire(self._make_key(key), ttl)
+            raw_results = await pipe.execute(raise_on_error=False)
+
+        results: Dict[str, Any] = {}
+        for key, raw in zip(keys, raw_results[: len(keys)]):
+            if isinstance(raw, Exception):
+                raise raw
+            results[key] = self.codec.decode(raw)
+        list_results = raw_results[len(keys) : len(keys) + len(lists)]
+        for (key, (start, end)), items in zip(lists.items(), list_results):
+            if isinstance(items, Exception):
+                if not _is_wrong_type(items):
+                    raise items
+                await self._convert_legacy_list(redis, self._make_key(key))
+                items = await redis.lrange(self._make_key(key), start, end)
+            results[key] = [self.codec.decode(item) for item in items]
+        return results
+
+    def _get_trim_script(self, redis):
+        """Register the byte-budget trim script once and return it."""
+        if self._trim_script is None:
+            self._trim_script = redis.register_script(TRIM_TO_BYTES_SCRIPT)
+        return self._trim_script
+
+    async def _convert_legacy_list(self, redis, namespaced_key: str) -> None:
+        """Replace a legacy JSON-array value with a Redis list of its items.
+
+        Values that are not a JSON array are dropped, like any other
+        unreadable cache entry.
+
+        Args:
+            redis: Client the key lives on.
+            namespaced_key: Full Redis key of the legacy value.
+        """
+        try:
+            legacy = self.codec.decode(await redis.get(namespaced_key))
+        except ResponseError as error:
+            if _is_wrong_type(error):
+                return  # converted by a concurrent writer
+            raise
+        items = legacy if isinstance(legacy, list) else []
+        transaction = not isinstance(redis, RedisCluster)
+        async with redis.pipeline(transaction=transaction) as pipe:
+            pipe.delete(namespaced_key)
+            if items:
+                pipe.rpush(namespaced_key, *[self.codec.encode(item) for item in items])
+            await pipe.execute()
+
+    @timed("cache.publish")
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message on a pub/sub channel (channels are not namespaced).
+
+        Args:
+            channel: Channel name.
+            message: Payload.
+
+        Returns:
+            int: Number of subscribers that received it.
+        """
+        redis = await self._get_redis()
+        return await redis.publish(channel, message)
 
+    @timed("cache.increment")
+    async def increment(self, key: str, field: str, amount: int = 1) -> int:
+        """Increment a counter stored in a Redis hash.
+
+        Args:
+            key: Cache key of the hash.
+            field: Counter name within the hash.
+            amount: Value to add.
+
+        Returns:
+            int: Counter value after the increment.
+        """
+        redis = await self._get_redis()
+        return await redis.hincrby(self._make_key(key), field, amount)
+
+    @timed("cache.get_counters")
+    async def get_counters(self, key: str) -> Dict[str, int]:
+        """Fetch all counters stored in a Redis hash.
+
+        Args:
+            key: Cache key of the hash.
+
+        Returns:
+            dict: Counter values by name; empty if the key does not exist.
+        """
+        redis = await self._get_redis()
+        counters = await redis.hgetall(self._make_key(key))
+        return {
+            field.decode() if isinstance(field, bytes) else field: int(value)
+            for field, value in counters.items()
+        }
+
+    @timed("cache.append_interaction")
     async def append_interaction(
         self, key: str, user_msg: str, assistant_msg: str
     ) -> None:
@@ -93,6 +407,7 @@ class CacheStorage:
         current.append({"role": "assistant", "content": assistant_msg})
         await self.set(key, current)
 
+    @timed("cache.get_raw")
     async def get_raw(self, key: str) -> Optional[Union[str, bytes]]:
         """Retrieve the unparsed Redis value for a key.
 
@@ -100,7 +415,13 @@ class CacheStorage:
             key: Cache key.
 
         Returns:
-            Optional[Union[str, bytes]]: Raw stored value (depends on Redis client config).
+            Optional[Union[str, bytes]]: Raw stored value, including the codec
+                header.
         """
         redis = await self._get_redis()
         return await redis.get(self._make_key(key))
+
+
+def _is_wrong_type(error: Exception) -> bool:
+    """Tell whether Redis rejected a command for the key's data type."""
+    return str(error).startswith("WRONGTYPE")
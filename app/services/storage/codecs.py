@@ -0,0 +1,238 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encoded values start with HEADER_MARK, the format version, the codec id and
+# the compression id. A NUL byte never starts a JSON document, so values
+# written before the header existed are still told apart and read as JSON.
+HEADER_MARK = 0x00
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+JSON_ID = 1
+MSGPACK_ID = 2
+
+NO_COMPRESSION = 0
+ZSTD = 1
+
+
+class Codec(ABC):
+    """Serializes cache values to bytes and back.
+
+    Attributes:
+        codec_id: Identifier written in the value header.
+        name: Name used in `CACHE_CODEC`.
+    """
+
+    codec_id: int
+    name: str
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """Serialize a value."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Deserialize a value."""
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """Standard-library JSON, compact and UTF-8 encoded."""
+
+    codec_id = JSON_ID
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """JSON through orjson; same bytes on the wire as `JsonCodec`, several times faster."""
+
+    codec_id = JSON_ID
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("CACHE_CODEC=orjson requires the orjson package.")
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(Codec):
+    """Binary MessagePack; smaller than JSON for short strings and numbers."""
+
+    codec_id = MSGPACK_ID
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("CACHE_CODEC=msgpack requires the msgpack package.")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec, OrjsonCodec, MsgpackCodec)}
+
+
+class ValueCodec:
+    """Encodes cache values with a codec, optional zstd and a version header.
+
+    Values are decoded according to their own header, whatever the current
+    settings are, so the codec or compression can be changed on a live
+    deployment: old values stay readable and are rewritten in the new format
+    as they are updated. Values without a header are read as legacy JSON.
+
+    Attributes:
+        codec: Serializer used for new values.
+        compress: Whether large values are zstd-compressed.
+        min_compress_bytes: Smallest serialized size worth compressing.
+    """
+
+    def __init__(
+        self,
+        codec: Optional[Codec] = None,
+        compress: bool = False,
+        min_compress_bytes: int = 1024,
+        compression_level: int = 3,
+    ) -> None:
+        """Initialize the codec.
+
+        Args:
+            codec: Serializer for new values; orjson when installed, else json.
+            compress: zstd-compress serialized values of at least
+                `min_compress_bytes` when that makes them smaller.
+            min_compress_bytes: Compression threshold in bytes.
+            compression_level: zstd level (1-22).
+
+        Raises:
+            RuntimeError: If compression is requested without zstandard.
+        """
+        self.codec = codec or (OrjsonCodec() if orjson is not None else JsonCodec())
+        if compress and zstandard is None:
+            raise RuntimeError("CACHE_COMPRESSION=zstd requires the zstandard package.")
+        self.compress = compress
+        self.min_compress_bytes = min_compress_bytes
+        self._compressor = (
+            zstandard.ZstdCompressor(level=compression_level) if compress else None
+        )
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        self._decoders: Dict[int, Codec] = {
+            JSON_ID: OrjsonCodec() if orjson is not None else JsonCodec()
+        }
+        if msgpack is not None:
+            self._decoders[MSGPACK_ID] = MsgpackCodec()
+
+    @classmethod
+    def from_env(cls) -> "ValueCodec":
+        """Build the codec from `CACHE_CODEC` (orjson), `CACHE_COMPRESSION`
+        (`none` or `zstd`), `CACHE_COMPRESSION_MIN_BYTES` (1024) and
+        `CACHE_COMPRESSION_LEVEL` (3).
+
+        Returns:
+            ValueCodec: Configured codec.
+
+        Raises:
+            ValueError: If `CACHE_CODEC` names an unknown codec.
+        """
+        name = os.getenv("CACHE_CODEC", "orjson")
+        if name not in CODECS:
+            raise ValueError(f"Unknown CACHE_CODEC: {name}")
+        return cls(
+            codec=CODECS[name](),
+            compress=os.getenv("CACHE_COMPRESSION", "none").lower() == "zstd",
+            min_compress_bytes=int(os.getenv("CACHE_COMPRESSION_MIN_BYTES", 1024)),
+            compression_level=int(os.getenv("CACHE_COMPRESSION_LEVEL", 3)),
+        )
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize a value and prepend its header.
+
+        Args:
+            value: JSON-compatible value.
+
+        Returns:
+            bytes: Header plus (possibly compressed) payload.
+        """
+        body = self.codec.dumps(value)
+        compression = NO_COMPRESSION
+        if self._compressor is not None and len(body) >= self.min_compress_bytes:
+            compressed = self._compressor.compress(body)
+            if len(compressed) < len(body):
+                body, compression = compressed, ZSTD
+        return bytes((HEADER_MARK, FORMAT_VERSION, self.codec.codec_id, compression)) + body
+
+    def decode(self, raw: Optional[Union[bytes, str]]) -> Any:
+        """Deserialize a stored value in any supported format.
+
+        Args:
+            raw: Value as read from Redis; None for a missing key.
+
+        Returns:
+            The decoded value. Legacy values that are not JSON are returned
+            as text, like the original reader did.
+
+        Raises:
+            ValueError: If the header names an unknown version, codec or
+                compression, or an uninstalled library is needed.
+        """
+        if raw is None:
+            return None
+        if isinstance(raw, str):
+            return _legacy(raw)
+        if not raw or raw[0] != HEADER_MARK:
+            return _legacy(raw.decode("utf-8", "replace"))
+
+        version, codec_id, compression = raw[1], raw[2], raw[3]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache value version: {version}")
+        body = raw[HEADER_SIZE:]
+        if compression == ZSTD:
+            if self._decompressor is None:
+                raise ValueError("zstd-compressed cache value but zstandard is missing")
+            body = self._decompressor.decompress(body)
+        elif compression != NO_COMPRESSION:
+            raise ValueError(f"Unsupported cache value compression: {compression}")
+        decoder = self._decoders.get(codec_id)
+        if decoder is None:
+            raise ValueError(f"Unsupported cache value codec: {codec_id}")
+        return decoder.loads(body)
+
+
+def _legacy(text: str) -> Any:
+    """Read a value written as plain JSON text before headers existed."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
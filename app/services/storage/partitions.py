@@ -0,0 +1,340 @@
+import os
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.models.models import Message
+from app.utils.log import get_logger
+
+PARTITIONED_TABLE = Message.__tablename__
+LEGACY_SUFFIX = "_unpartitioned"
+MESSAGE_INDEX = "ix_message_conversation_id_created_at_id"
+
+logger = get_logger(__name__)
+
+
+def month_start(moment: datetime) -> datetime:
+    """Return midnight of the first day of the moment's month."""
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift the first day of a month by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime, table: str = PARTITIONED_TABLE) -> str:
+    """Build the name of a table's monthly partition, e.g. `message_p2025_01`."""
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(name: str, table: str = PARTITIONED_TABLE) -> Optional[datetime]:
+    """Parse the month a partition holds from its name.
+
+    Returns:
+        datetime | None: First day of the month, or None if the name is not
+            a monthly partition of the table.
+    """
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})_(\d{{2}})", name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+def default_partition_name(table: str = PARTITIONED_TABLE) -> str:
+    """Build the name of the partition catching rows outside every month."""
+    return f"{table}_default"
+
+
+class PartitionManager:
+    """Maintains the monthly range partitions of the message table.
+
+    Each month of `created_at` gets its own partition, created
+    `premake` months ahead so inserts never wait for DDL. A default
+    partition catches rows outside every range, so inserts keep working
+    while the maintenance job is stalled. Rows it caught for a month block
+    creating that month's partition, so maintenance moves them into the new
+    partition when it catches up (briefly detaching the default partition,
+    which locks the table). Only the current month's partition
+    and indexes are written to, so write and recent-history read latency
+    depends on one month's volume, not on the table's total size.
+
+    Attributes:
+        engine: Engine the DDL runs on.
+        table: Partitioned table name.
+        premake: Future months kept ready.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        table: str = PARTITIONED_TABLE,
+        premake: Optional[int] = None,
+    ) -> None:
+        """Initialize the manager.
+
+        Args:
+            engine: Engine the DDL runs on.
+            table: Partitioned table name.
+            premake: Future months to create ahead
+                (`MESSAGE_PARTITION_PREMAKE`, 3).
+        """
+        self.engine = engine
+        self.table = table
+        self.premake = (
+            premake
+            if premake is not None
+            else int(os.getenv("MESSAGE_PARTITION_PREMAKE", 3))
+        )
+
+    @property
+    def legacy_table(self) -> str:
+        """Name an unpartitioned table is moved to before migrating it."""
+        return f"{self.table}{LEGACY_SUFFIX}"
+
+    async def ensure_partitions(
+        self, conn: Optional[AsyncConnection] = None, now: Optional[datetime] = None
+    ) -> List[str]:
+        """Create the default partition and the months from now to `premake`.
+
+        Args:
+            conn: Connection inside an open transaction; None opens one.
+            now: Reference time; defaults to the current time.
+
+        Returns:
+            list[str]: Partitions created by this call.
+        """
+        current = month_start(now or datetime.now())
+        months = [add_months(current, offset) for offset in range(self.premake + 1)]
+        if conn is None:
+            async with self.engine.begin() as conn:
+                return await self._create_months(conn, months)
+        return await self._create_months(conn, months)
+
+    async def partitions(
+        self, conn: Optional[AsyncConnection] = None
+    ) -> List[Tuple[str, datetime, bool]]:
+        """List the monthly partitions, including detached ones.
+
+        Args:
+            conn: Connection to query on; None opens one.
+
+        Returns:
+            list[tuple]: `(name, month, attached)` ordered by month.
+        """
+        query = text(
+            "SELECT c.relname, c.relispartition FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') "
+            "AND c.relname LIKE :pattern"
+        )
+        pattern = self.table.replace("_", r"\_") + r"\_p%"
+        if conn is None:
+            async with self.engine.connect() as conn:
+                rows = (await conn.execute(query, {"pattern": pattern})).all()
+        else:
+            rows = (await conn.execute(query, {"pattern": pattern})).all()
+        found = []
+        for name, attached in rows:
+            month = partition_month(name, self.table)
+            if month is not None:
+                found.append((name, month, bool(attached)))
+        return sorted(found, key=lambda partition: partition[1])
+
+    async def detach(self, name: str) -> None:
+        """Detach a partition so it stops being read and can be archived.
+
+        Args:
+            name: Partition name.
+        """
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text(f'ALTER TABLE "{self.table}" DETACH PARTITION "{name}"')
+            )
+        logger.info("partitions.detached", partition=name)
+
+    async def prepare_legacy(self, conn: AsyncConnection) -> bool:
+        """Move an unpartitioned message table out of the way.
+
+        Runs before the schema is created. The old table, its primary key
+        and its history index are renamed so the partitioned table can take
+        their names; `migrate_legacy` then copies the rows over.
+
+        Args:
+            conn: Connection inside the setup transaction.
+
+        Returns:
+            bool: True if an unpartitioned table was found and renamed.
+        """
+        kind = (
+            await conn.execute(
+                text(
+                    "SELECT c.relkind FROM pg_class c "
+                    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    "WHERE n.nspname = current_schema() AND c.relname = :table"
+                ),
+                {"table": self.table},
+            )
+        ).scalar()
+        if kind != "r":
+            return False
+        legacy = self.legacy_table
+        for statement in (
+            f'ALTER TABLE "{self.table}" RENAME TO "{legacy}"',
+            f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{self.table}_pkey" TO "{legacy}_pkey"',
+            f'ALTER INDEX IF EXISTS "{MESSAGE_INDEX}" RENAME TO "{MESSAGE_INDEX}{LEGACY_SUFFIX}"',
+        ):
+            await conn.execute(text(statement))
+        return True
+
+    async def migrate_legacy(
+        self, conn: AsyncConnection, now: Optional[datetime] = None
+    ) -> int:
+        """Copy the renamed unpartitioned table into the partitioned one.
+
+        Partitions are created for every month holding rows, JSONB string
+        content is unwrapped to TEXT, the id sequence continues after the
+        highest copied id and the old table is dropped once the copied row
+        count matches. Everything happens in the setup transaction.
+
+        Args:
+            conn: Connection inside the setup transaction.
+            now: Reference time; defaults to the current time.
+
+        Returns:
+            int: Rows copied.
+
+        Raises:
+            RuntimeError: If the copied row count does not match.
+        """
+        legacy = self.legacy_table
+        oldest = (
+            await conn.execute(text(f'SELECT min(created_at) FROM "{legacy}"'))
+        ).scalar()
+        if oldest is not None:
+            current = month_start(now or datetime.now())
+            months, month = [], month_start(oldest)
+            while month < current:
+                months.append(month)
+                month = add_months(month, 1)
+            await self._create_months(conn, months)
+
+        content_type = (
+            await conn.execute(
+                text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() "
+                    "AND table_name = :table AND column_name = 'content'"
+                ),
+                {"table": legacy},
+            )
+        ).scalar()
+        content = (
+            "CASE WHEN jsonb_typeof(content) = 'string' THEN content #>> '{}' "
+            "ELSE content::text END"
+            if content_type == "jsonb"
+            else "content::text"
+        )
+        copied = (
+            await conn.execute(
+                text(
+                    f'INSERT INTO "{self.table}" '
+                    "(id, conversation_id, role, content, created_at) "
+                    f"SELECT id, conversation_id, role, coalesce({content}, ''), created_at "
+                    f'FROM "{legacy}"'
+                )
+            )
+        ).rowcount
+        expected = (
+            await conn.execute(text(f'SELECT count(*) FROM "{legacy}"'))
+        ).scalar()
+        if copied != expected:
+            raise RuntimeError(
+                f"Copied {copied} of {expected} rows from {legacy}; aborting."
+            )
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{self.table}', 'id'), "
+                f'coalesce((SELECT max(id) FROM "{self.table}"), 0) + 1, false)'
+            )
+        )
+        await conn.execute(text(f'DROP TABLE "{legacy}"'))
+        logger.info("partitions.migrated", table=self.table, rows=copied)
+        return copied
+
+    async def _create_months(
+        self, conn: AsyncConnection, months: List[datetime]
+    ) -> List[str]:
+        """Create the default partition and any missing monthly partition."""
+        existing = {name for name, _, _ in await self.partitions(conn)}
+        default = default_partition_name(self.table)
+        await conn.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{default}" '
+                f'PARTITION OF "{self.table}" DEFAULT'
+            )
+        )
+        created = []
+        for month in months:
+            name = partition_name(month, self.table)
+            if name in existing:
+                continue
+            bounds = {"start": month, "end": add_months(month, 1)}
+            in_default = (
+                await conn.execute(
+                    text(
+                        f'SELECT EXISTS (SELECT 1 FROM "{default}" '
+                        "WHERE created_at >= :start AND created_at < :end)"
+                    ),
+                    bounds,
+                )
+            ).scalar()
+            if in_default:
+                await self._create_from_default(conn, name, month)
+            else:
+                await conn.execute(text(self._create_month_sql(name, month)))
+            created.append(name)
+        if created:
+            logger.info("partitions.created", table=self.table, partitions=created)
+        return created
+
+    async def _create_from_default(
+        self, conn: AsyncConnection, name: str, month: datetime
+    ) -> None:
+        """Create a month's partition out of rows the default partition caught.
+
+        PostgreSQL refuses to create a partition while the default one holds
+        rows in its range, so the default partition is detached, the month
+        created, its rows moved over and the default reattached, all in the
+        caller's transaction.
+        """
+        default = default_partition_name(self.table)
+        bounds = {"start": month, "end": add_months(month, 1)}
+        in_range = "WHERE created_at >= :start AND created_at < :end"
+        await conn.execute(
+            text(f'ALTER TABLE "{self.table}" DETACH PARTITION "{default}"')
+        )
+        await conn.execute(text(self._create_month_sql(name, month)))
+        moved = (
+            await conn.execute(
+                text(f'INSERT INTO "{name}" SELECT * FROM "{default}" {in_range}'),
+                bounds,
+            )
+        ).rowcount
+        await conn.execute(text(f'DELETE FROM "{default}" {in_range}'), bounds)
+        await conn.execute(
+            text(f'ALTER TABLE "{self.table}" ATTACH PARTITION "{default}" DEFAULT')
+        )
+        logger.warning("partitions.moved_from_default", partition=name, rows=moved)
+
+    def _create_month_sql(self, name: str, month: datetime) -> str:
+        """Build the DDL creating a month's range partition."""
+        return (
+            f'CREATE TABLE "{name}" PARTITION OF "{self.table}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{add_months(month, 1).isoformat()}')"
+        )
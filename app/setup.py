@@ -1,16 +1,31 @@
 import asyncio
+import os
 
+from app.services.storage.connections import create_db_engine
 from app.services.storage.relational_storage import RelationalStorage
 
 
 async def setup_all() -> None:
     """Initialize storage backends required by the service.
 
-    Currently sets up the relational database schema.
+    Currently sets up the relational database schema, including the monthly
+    partitions of the message table (`MESSAGE_PARTITION_PREMAKE` months
+    ahead) and the migration of an unpartitioned one. DDL runs over
+    `DB_DIRECT_CONNECTION_STR` when set, so schema changes can bypass a
+    transaction-pooling PgBouncer; otherwise the regular connection is used.
     """
     print("Initializing PostgreSQL...")
-    relational_storage = RelationalStorage()
-    await asyncio.gather(relational_storage.setup())
+    direct_url = os.getenv("DB_DIRECT_CONNECTION_STR")
+    engine = create_db_engine(direct_url, pgbouncer=False) if direct_url else None
+    relational_storage = RelationalStorage(engine=engine)
+    try:
+        (result,) = await asyncio.gather(relational_storage.setup())
+        print(
+            f"Message partitions created: {result['partitions_created'] or 'none'}; "
+            f"migrated rows: {result['migrated_rows']}"
+        )
+    finally:
+        await relational_storage.engine.dispose()
 
 
 if __name__ == "__main__":
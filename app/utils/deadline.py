@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request ran out of its time budget."""
+
+
+class Deadline:
+    """Absolute time budget of one request, shared by every step serving it.
+
+    Created once in the HTTP handler and passed down, so each step (queueing
+    for an LLM slot, each attempt, each retry back-off) only spends what is
+    left instead of applying its own fixed timeout.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        """Start the budget now.
+
+        Args:
+            seconds: Total time budget in seconds.
+        """
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline; never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Whether the budget is exhausted."""
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout for the next step: the remaining budget, optionally capped.
+
+        Args:
+            cap: Upper bound for the step, e.g. a per-attempt timeout.
+
+        Returns:
+            float: Seconds the next step may take.
+
+        Raises:
+            DeadlineExceeded: If no budget is left.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.budget:.1f}s exceeded")
+        return min(remaining, cap) if cap is not None else remaining
+
+    async def run(self, awaitable: Awaitable[T], cap: Optional[float] = None) -> T:
+        """Await something within the remaining budget.
+
+        Args:
+            awaitable: Coroutine or future to await.
+            cap: Optional upper bound for this step.
+
+        Returns:
+            The awaited result.
+
+        Raises:
+            asyncio.TimeoutError: If only the cap was hit (the step may be
+                retried).
+            DeadlineExceeded: If the whole budget ran out.
+        """
+        try:
+            timeout = self.timeout(cap)
+        except DeadlineExceeded:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            if self.expired():
+                raise DeadlineExceeded(f"Deadline of {self.budget:.1f}s exceeded")
+            raise
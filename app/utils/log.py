@@ -0,0 +1,221 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+ROOT_LOGGER = "carax"
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["DroppingQueueHandler"] = None
+_sample_rates: Dict[str, float] = {}
+_max_field_chars = 200
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full.
+
+    Formatting and writing happen on the listener thread, so emitting a record
+    on the event loop only costs building it and a non-blocking `put`.
+
+    Attributes:
+        dropped: Records discarded because the queue was full.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records are immutable once built and formatted on the listener
+        # thread, so skip the eager formatting and copy done by the base class.
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Render a record as `time level logger event key=value ...`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(
+            f"{key}={value}" for key, value in getattr(record, "fields", {}).items()
+        )
+        line = (
+            f"{time.strftime('%H:%M:%S', time.localtime(record.created))} "
+            f"{record.levelname:<7} {record.name} {record.getMessage()} {fields}"
+        ).rstrip()
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class EventLogger:
+    """Structured logger: one event name plus key/value fields per record.
+
+    Calls below the configured level return before any field is processed,
+    info/debug events can be sampled per event name, and long string fields
+    are truncated and hashed, so a log call never costs time proportional to
+    a conversation's size.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._logger = logging.getLogger(name)
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+    def _log(
+        self, level: int, event: str, fields: Dict[str, Any], exc_info: bool = False
+    ) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING:
+            rate = _sample_rates.get(event)
+            if rate is not None and random.random() >= rate:
+                return
+        self._logger.log(
+            level,
+            event,
+            exc_info=exc_info,
+            extra={"fields": {key: compact(value) for key, value in fields.items()}},
+        )
+
+
+def get_logger(name: str) -> EventLogger:
+    """Return a structured logger under the `carax` namespace.
+
+    Args:
+        name: Usually the calling module's `__name__`.
+
+    Returns:
+        EventLogger: Logger emitting through the queue pipeline.
+    """
+    if not name.startswith(ROOT_LOGGER):
+        name = f"{ROOT_LOGGER}.{name}"
+    return EventLogger(name)
+
+
+def compact(value: Any, max_chars: Optional[int] = None) -> Any:
+    """Make a field value cheap to log.
+
+    Strings longer than `max_chars` keep their head plus their length and a
+    short hash, so equal payloads can still be correlated. Containers are
+    replaced by their size, since their content grows with the conversation.
+
+    Args:
+        value: Field value.
+        max_chars: Longest string kept whole (`LOG_MAX_FIELD_CHARS`, 200).
+
+    Returns:
+        The value, or a bounded summary of it.
+    """
+    limit = max_chars if max_chars is not None else _max_field_chars
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    if isinstance(value, (list, tuple, set, dict)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    if isinstance(value, BaseException):
+        value = repr(value)
+    elif not isinstance(value, str):
+        value = str(value)
+    if len(value) <= limit:
+        return value
+    digest = hashlib.sha1(value.encode("utf-8", "replace")).hexdigest()[:12]
+    return f"{value[:limit]}…[{len(value)} chars sha1:{digest}]"
+
+
+def configure_logging() -> None:
+    """Install the queue-based log pipeline from env vars; safe to call twice.
+
+    Reads `LOG_LEVEL` (INFO), `LOG_FORMAT` (`json` or `text`),
+    `LOG_QUEUE_SIZE` (10000), `LOG_MAX_FIELD_CHARS` (200) and
+    `LOG_SAMPLE_RATES`, a comma-separated list of `event=rate` pairs that
+    keep only that share of info/debug records of the event.
+    """
+    global _listener, _handler, _max_field_chars
+    if _listener is not None:
+        return
+
+    _max_field_chars = int(os.getenv("LOG_MAX_FIELD_CHARS", 200))
+    _sample_rates.clear()
+    _sample_rates.update(parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")))
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(
+        TextFormatter() if os.getenv("LOG_FORMAT", "json") == "text" else JsonFormatter()
+    )
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(
+        maxsize=int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    )
+    _handler = DroppingQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, output, respect_handler_level=False)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [_handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.propagate = False
+
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush pending records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    if _handler is not None and _handler.dropped:
+        sys.stderr.write(f"carax logging dropped {_handler.dropped} records\n")
+
+
+def parse_sample_rates(raw: str) -> Dict[str, float]:
+    """Parse `event=rate,event=rate` into a mapping; malformed pairs are skipped."""
+    rates = {}
+    for pair in raw.split(","):
+        event, _, rate = pair.partition("=")
+        try:
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
@@ -1,8 +1,8 @@
-from typing import List, Dict
+from typing import Any, List, Dict
 from datetime import datetime, timezone
 from typing import Iterable, List, Optional
 
-from app.domain.message import MessageModel
+from app.domain.message import CODE_ROLES, COMPACT_SEPARATOR, ROLE_CODES, MessageModel
 from app.services.llm.llm_io import LLMConversationMessage
 
 
@@ -88,3 +88,104 @@ def message_from_llm_output(text: str) -> Dict[str, str]:
         dict[str, str]: Message with `role=assistant` and stripped content.
     """
     return {"role": "assistant", "content": text.strip()}
+
+
+def to_compact(message: Dict[str, Any]) -> str:
+    """Encode a role/content message dict as `MessageModel.compact_version` text.
+
+    Args:
+        message: Dict with exactly the `role` and `content` keys.
+
+    Returns:
+        str: `u:`, `a:` or `s:` followed by the content.
+
+    Raises:
+        ValueError: If the dict has other keys, an unknown role or non-text
+            content, which the compact form could not restore.
+    """
+    if (
+        len(message) != 2
+        or message.get("role") not in ROLE_CODES
+        or not isinstance(message.get("content"), str)
+    ):
+        raise ValueError("Only role/content messages can be compacted.")
+    return f"{ROLE_CODES[message['role']]}{COMPACT_SEPARATOR}{message['content']}"
+
+
+def from_compact(entry: Any) -> Dict[str, str]:
+    """Decode a compact message back into its role/content dict.
+
+    Args:
+        entry: Compact text, or a message dict stored before the compact
+            format, which is returned unchanged.
+
+    Returns:
+        dict[str, str]: Message with `role` and `content`.
+
+    Raises:
+        ValueError: If a string does not start with a known role code.
+    """
+    if isinstance(entry, dict):
+        return entry
+    return MessageModel.from_compact(entry).model_dump(include={"role", "content"})
+
+
+def is_compact(entry: Any) -> bool:
+    """Tell whether a history entry is a compact message string."""
+    return (
+        isinstance(entry, str)
+        and entry[1:2] == COMPACT_SEPARATOR
+        and entry[:1] in CODE_ROLES
+    )
+
+
+def encode_history(items: Iterable[Any]) -> List[Any]:
+    """Compact every history entry that round-trips losslessly.
+
+    Args:
+        items: History entries, usually role/content dicts.
+
+    Returns:
+        list: Compact strings for plain messages; other entries unchanged.
+    """
+    encoded = []
+    for item in items:
+        try:
+            encoded.append(to_compact(item) if isinstance(item, dict) else item)
+        except ValueError:
+            encoded.append(item)
+    return encoded
+
+
+def decode_history(items: Iterable[Any]) -> List[Any]:
+    """Expand compact history entries back into role/content dicts.
+
+    Args:
+        items: Entries as read from working memory, compact or legacy.
+
+    Returns:
+        list: Message dicts; entries that are not compact are unchanged.
+    """
+    return [
+        {"role": CODE_ROLES[item[0]], "content": item[2:]} if is_compact(item) else item
+        for item in items
+    ]
+
+
+def render_compact_history(messages: Iterable[Dict[str, str]]) -> str:
+    """Render messages as one `u: ...`/`a: ...` line each for a prompt.
+
+    Whitespace inside each message, including newlines, is collapsed so every
+    message stays on its own line.
+
+    Args:
+        messages: Role/content dicts, oldest first.
+
+    Returns:
+        str: Newline-separated compact lines.
+    """
+    return "\n".join(
+        f"{ROLE_CODES.get(m.get('role'), 's')}{COMPACT_SEPARATOR} "
+        f"{' '.join(str(m.get('content', '')).split())}"
+        for m in messages
+    )
@@ -0,0 +1,160 @@
+import functools
+import inspect
+import time
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+REGISTRY = CollectorRegistry(auto_describe=True)
+
+# Spans Redis round trips (~1 ms) up to slow LLM completions (~30 s).
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30,
+)
+
+STAGE_DURATION = Histogram(
+    "carax_stage_duration_seconds",
+    "Duration of each stage of a debate turn.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+STAGE_IN_FLIGHT = Gauge(
+    "carax_stage_in_flight",
+    "Calls currently running per stage.",
+    ["stage"],
+    registry=REGISTRY,
+)
+STAGE_ERRORS = Counter(
+    "carax_stage_errors_total",
+    "Calls per stage that raised an exception.",
+    ["stage"],
+    registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "carax_llm_tokens_total",
+    "LLM tokens reported by the provider, by kind (prompt, cached, completion).",
+    ["model", "kind"],
+    registry=REGISTRY,
+)
+
+DEGRADED_TURNS = Counter(
+    "carax_degraded_turns_total",
+    "Turns answered with a degraded reply, by reason (timeout, unavailable).",
+    ["reason"],
+    registry=REGISTRY,
+)
+
+DB_POOL_CHECKOUT = Histogram(
+    "carax_db_pool_checkout_seconds",
+    "Time spent waiting for a PostgreSQL connection from the pool.",
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "carax_db_pool_connections",
+    "PostgreSQL pool connections by state (checked_out, idle, overflow, size).",
+    ["state"],
+    registry=REGISTRY,
+)
+DB_POOL_TIMEOUTS = Counter(
+    "carax_db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds.",
+    registry=REGISTRY,
+)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorate a function so its calls are recorded under `stage`.
+
+    Records the call duration in `carax_stage_duration_seconds`, keeps
+    `carax_stage_in_flight` up to date and counts exceptions in
+    `carax_stage_errors_total`. The labelled series are resolved once at
+    decoration time, so each call only pays for a clock read and a few
+    lock-protected additions.
+
+    Args:
+        stage: Stage label, e.g. `llm.generate` or `cache.get`.
+
+    Returns:
+        Callable: Decorator for sync or async functions.
+    """
+    duration = STAGE_DURATION.labels(stage)
+    in_flight = STAGE_IN_FLIGHT.labels(stage)
+    errors = STAGE_ERRORS.labels(stage)
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                in_flight.inc()
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    duration.observe(time.perf_counter() - started)
+                    in_flight.dec()
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            in_flight.inc()
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(time.perf_counter() - started)
+                in_flight.dec()
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def record_llm_usage(model: Optional[str], usage: Any) -> None:
+    """Add the token counts of a completion to `carax_llm_tokens_total`.
+
+    Args:
+        model: Model that served the completion.
+        usage: `usage` object of a completion or of the final stream chunk;
+            ignored when None.
+    """
+    if usage is None:
+        return
+    model = model or "unknown"
+    details = getattr(usage, "prompt_tokens_details", None)
+    counts = {
+        "prompt": getattr(usage, "prompt_tokens", None),
+        "cached": getattr(details, "cached_tokens", None),
+        "completion": getattr(usage, "completion_tokens", None),
+    }
+    for kind, count in counts.items():
+        # Some OpenAI-compatible providers omit fields or send nulls.
+        if isinstance(count, int) and count > 0:
+            LLM_TOKENS.labels(model, kind).inc(count)
+
+
+def render() -> Tuple[bytes, str]:
+    """Serialize every metric in the Prometheus text exposition format.
+
+    Returns:
+        tuple: The payload and its content type.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
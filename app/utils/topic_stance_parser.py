@@ -0,0 +1,165 @@
+import re
+from typing import List, Optional, Pattern, Sequence
+
+from pydantic import BaseModel
+
+from app.domain.meta import MetaModel
+
+# Topics end at the first clause break or where the stance clause starts.
+_TOPIC_END = r"(?=\s*(?:[,.;:!\n]|$)|\s+(?:(?:y|and|donde|where)\s+)?(?:tu|tú|you|your)\b)"
+# Stances may contain commas ("que, aunque..., ...") but end at a sentence break.
+_STANCE_END = r"(?=\s*(?:[.;!\n]|$))"
+
+TOPIC_PATTERNS: Sequence[Pattern[str]] = [
+    re.compile(
+        r"\b(?:debatir|debatamos|debate|discutir|discutamos|hablar|hablemos|conversar"
+        r"|conversemos|argumentar|argumentemos)\s+(?:sobre|acerca\s+del?|del?|en\s+torno\s+a)\s+"
+        r"(?P<topic>.+?)" + _TOPIC_END,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b(?:debate|debating|discuss|discussing|talk|argue)\s+(?:about|on|over)\s+"
+        r"(?P<topic>.+?)" + _TOPIC_END,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b(?:let'?s|let\s+us|we\s+will|we'll)\s+(?:debate|discuss)\s+(?!about\b|on\b)"
+        r"(?P<topic>.+?)" + _TOPIC_END,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b(?:el\s+tema(?:\s+(?:de\s+hoy|del\s+debate|de\s+debate|a\s+debatir))?\s+(?:es|será)"
+        r"|tema\s*:|the\s+topic(?:\s+of\s+the\s+debate)?\s+(?:is|will\s+be)|topic\s*:)\s*"
+        r"(?P<topic>.+?)" + _TOPIC_END,
+        re.IGNORECASE,
+    ),
+]
+
+STANCE_PATTERNS: Sequence[Pattern[str]] = [
+    re.compile(
+        r"\b(?:tu\s+(?:postura|posición|posicion|opinión|opinion)\s+(?:es|será|sera)"
+        r"|postura\s*:|your\s+(?:stance|position|side)\s+(?:is|will\s+be)|stance\s*:)\s*"
+        r"(?P<stance>.+?)" + _STANCE_END,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b(?:tú\s+|tu\s+)?(?:defiendes|defenderás|defenderas|debes\s+defender|defiende"
+        r"|argumentas|argumentarás|argumentaras|sostienes|sostendrás|sostendras|sostén|sosten"
+        r"|crees|piensas)\s+(?:que\s+)?(?P<stance>.+?)" + _STANCE_END,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\byou(?:\s+will|\s+should|\s+must|'ll)?\s+(?:argue|defend|support|claim|believe"
+        r"|hold|maintain|take\s+the\s+position)s?\s+(?:that\s+)?(?P<stance>.+?)" + _STANCE_END,
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b(?:estás|estas|estarás|estaras|you\s+are|you're|you\s+will\s+be)\s+"
+        r"(?P<stance>(?:a\s+favor|en\s+contra|in\s+favor|for|against)\b.*?)" + _STANCE_END,
+        re.IGNORECASE,
+    ),
+]
+
+MAX_TOPIC_WORDS = 12
+MAX_STANCE_WORDS = 40
+_TRIM_CHARS = " \t\"'“”«»`,:;-"
+_LEADING_CONJUNCTION = re.compile(r"^(?:que|that)\s+", re.IGNORECASE)
+
+# Signs that a pattern cut the message in the wrong place.
+_DANGLING_TOPIC_END = re.compile(
+    r"\b(?:de|del|la|el|los|las|sobre|of|the|about|on)$", re.IGNORECASE
+)
+_STANCE_LEADING_PREPOSITION = re.compile(
+    r"^(?:sobre|de|del|acerca|about|on|of)\b", re.IGNORECASE
+)
+_STANCE_SECOND_CLAUSE = re.compile(
+    r"\b(?:y|pero|and|but)\s+(?:la\s+mía|la\s+mia|el\s+mío|el\s+mio|yo|mine|I)\b"
+    r"|,\s*(?:estás|estas|tú|tu|yo|you|your|I)\b",
+    re.IGNORECASE,
+)
+_BARE_STANCE = re.compile(r"^(?:no|sí|si|yes|tampoco|también|tambien)$", re.IGNORECASE)
+# The user stating their own opinion competes with the stance assigned to the bot.
+_OWN_OPINION = re.compile(
+    r"\b(?:yo\s+(?:creo|pienso|opino|defiendo|sostengo)|I\s+(?:think|believe|argue))\b",
+    re.IGNORECASE,
+)
+
+
+class ExtractionResult(BaseModel):
+    """Outcome of the rule-based topic/stance extraction.
+
+    Attributes:
+        meta: Extracted topic and stance; None unless both were found.
+        confidence: How much the extraction can be trusted, from 0 to 1.
+    """
+
+    meta: Optional[MetaModel] = None
+    confidence: float = 0.0
+
+
+def extract_topic_and_stance(message: str) -> ExtractionResult:
+    """Extract topic and stance from an opening message without an LLM.
+
+    Recognizes the common Spanish and English phrasings, e.g. "vamos a
+    debatir sobre X, tu postura es Y" or "Debate about X. You argue Y".
+    Messages the rules cannot read confidently get a low score, so the
+    caller can fall back to the LLM: overlong or questioning extractions,
+    topics cut at a preposition or article, stances that start with a
+    preposition or run into a second clause, and openers with competing
+    stances.
+
+    Args:
+        message: Opening message of the debate.
+
+    Returns:
+        ExtractionResult: Meta and confidence; confidence is 0 when nothing
+            was recognized.
+    """
+    text = " ".join(message.split())
+    topics = _matches(TOPIC_PATTERNS, text, "topic")
+    stances = _matches(STANCE_PATTERNS, text, "stance", _LEADING_CONJUNCTION)
+    topic = topics[0] if topics else ""
+    stance = stances[0] if stances else ""
+
+    if not topic or not stance:
+        return ExtractionResult(confidence=0.3 if topic or stance else 0.0)
+
+    confidence = 0.9
+    if len(topic.split()) > MAX_TOPIC_WORDS:
+        confidence -= 0.3
+    if len(stance.split()) > MAX_STANCE_WORDS:
+        confidence -= 0.2
+    if "?" in topic or "?" in stance:
+        confidence -= 0.4
+    if _DANGLING_TOPIC_END.search(topic):
+        confidence -= 0.5
+    if (
+        _STANCE_LEADING_PREPOSITION.search(stance)
+        or _STANCE_SECOND_CLAUSE.search(stance)
+        or _BARE_STANCE.match(stance)
+    ):
+        confidence -= 0.5
+    if len(set(stances)) > 1 or _OWN_OPINION.search(text):
+        confidence -= 0.4
+
+    return ExtractionResult(
+        meta=MetaModel(topic=topic, stance=stance), confidence=round(max(confidence, 0.0), 2)
+    )
+
+
+def _matches(
+    patterns: Sequence[Pattern[str]],
+    text: str,
+    group: str,
+    prefix: Optional[Pattern[str]] = None,
+) -> List[str]:
+    """Return the cleaned group of every pattern match, in pattern order."""
+    values = []
+    for pattern in patterns:
+        for match in pattern.finditer(text):
+            value = match.group(group).strip(_TRIM_CHARS)
+            if prefix is not None:
+                value = prefix.sub("", value)
+            if value:
+                values.append(value[0].upper() + value[1:])
+    return values
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import signal
+
+from app.services.llm.router import LLMRouter
+from app.services.llm.scheduler import BACKGROUND, LLMScheduler
+from app.services.memory.summary_memory import SummaryMemory
+from app.services.memory.working_memory import WorkingMemory
+from app.services.persistence.write_behind import PersistenceWorker
+from app.services.storage.relational_storage import RelationalStorage
+from app.utils.log import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+
+async def maintain_partitions(
+    relational_storage: RelationalStorage, stop: asyncio.Event, interval: float
+) -> None:
+    """Create upcoming message partitions every `interval` seconds until stopped.
+
+    Args:
+        relational_storage: Storage whose partition manager runs the DDL.
+        stop: Event ending the loop.
+        interval: Seconds between checks.
+    """
+    while not stop.is_set():
+        try:
+            await relational_storage.partitions.ensure_partitions()
+        except Exception as e:
+            logger.error("worker.partition_maintenance_failed", error=e)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_worker() -> None:
+    """Drain the write-behind turn stream into PostgreSQL until signalled.
+
+    After each batch, conversations that crossed the summary threshold are
+    compacted into a new rolling summary. Future message partitions are
+    created every `MESSAGE_PARTITION_CHECK_SECONDS` (3600) alongside.
+
+    SIGINT/SIGTERM let the current batch finish before exiting, so no
+    acknowledged turn is ever half-written.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    configure_logging()
+    logger.info("worker.start")
+    relational_storage = RelationalStorage()
+    summary_memory = SummaryMemory(
+        llm=LLMScheduler(LLMRouter.from_env()).for_lane(BACKGROUND),
+        store=relational_storage,
+        cache=WorkingMemory(),
+    )
+    worker = PersistenceWorker(
+        relational_storage, on_persisted=summary_memory.compact_many
+    )
+    maintenance = asyncio.create_task(
+        maintain_partitions(
+            relational_storage,
+            stop,
+            float(os.getenv("MESSAGE_PARTITION_CHECK_SECONDS", 3600)),
+        )
+    )
+    try:
+        await worker.run(stop)
+    finally:
+        stop.set()
+        await maintenance
+        await relational_storage.engine.dispose()
+
+
+if __name__ == "__main__":
+    """Run the persistence worker when executed as a script."""
+    asyncio.run(run_worker())
@@ -0,0 +1,93 @@
+"""Benchmark the cache value codecs on realistic debate payloads.
+
+Compares encode/decode time and stored bytes of every available codec
+(json, orjson, msgpack), with and without zstd compression, for the values
+CacheStorage writes: a topic/stance document, one history message, and a
+full history window serialized as one value (as legacy keys did).
+
+Usage:
+    PYTHONPATH=. python benchmarks/cache_codecs.py [--messages 10] [--rounds 2000]
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, List, Tuple
+
+from app.services.storage.codecs import CODECS, ValueCodec
+
+TURN_TEXT = (
+    "Entiendo tu punto, pero los datos muestran lo contrario: cuando se aplicó "
+    "esta política en otros países, los resultados mejoraron de forma sostenida "
+    "y los costos iniciales se recuperaron en menos de una década. "
+)
+
+
+def payloads(messages: int) -> List[Tuple[str, Any]]:
+    """Build the benchmarked values."""
+    history = [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": TURN_TEXT * (1 + i % 3),
+        }
+        for i in range(messages)
+    ]
+    return [
+        ("meta", {"topic": "La energía nuclear", "stance": "A favor de ampliarla"}),
+        ("message", history[-1]),
+        (f"history[{messages}]", history),
+    ]
+
+
+def configurations() -> List[Tuple[str, Callable[[], ValueCodec]]]:
+    """Codec setups available in this environment."""
+    setups = []
+    for name, codec_cls in CODECS.items():
+        for compress in (False, True):
+            label = f"{name}+zstd" if compress else name
+
+            def build(codec_cls=codec_cls, compress=compress) -> ValueCodec:
+                return ValueCodec(codec=codec_cls(), compress=compress, min_compress_bytes=512)
+
+            try:
+                build()
+            except RuntimeError:
+                continue
+            setups.append((label, build))
+    return setups
+
+
+def measure(codec: ValueCodec, value: Any, rounds: int) -> Tuple[float, float, int]:
+    """Mean encode and decode time in microseconds and encoded size."""
+    encoded = codec.encode(value)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        codec.encode(value)
+    encode_us = (time.perf_counter() - start) / rounds * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        codec.decode(encoded)
+    decode_us = (time.perf_counter() - start) / rounds * 1e6
+    return encode_us, decode_us, len(encoded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    for label, value in payloads(args.messages):
+        legacy = len(json.dumps(value).encode())
+        print(f"\n{label} (legacy json.dumps: {legacy} bytes)")
+        print(f"{'codec':<14}{'encode us':>11}{'decode us':>11}{'bytes':>8}{'vs legacy':>11}")
+        for name, build in configurations():
+            encode_us, decode_us, size = measure(build(), value, args.rounds)
+            print(
+                f"{name:<14}{encode_us:>11.2f}{decode_us:>11.2f}{size:>8}"
+                f"{size / legacy:>10.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
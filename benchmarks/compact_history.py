@@ -0,0 +1,107 @@
+"""Measure what the compact `u:`/`a:` history format saves.
+
+For a synthetic debate, reports:
+
+- Redis bytes per conversation: the encoded size of the history window as
+  stored by WorkingMemory, role/content dicts versus compact strings, for
+  every available cache codec.
+- Prompt tokens per turn: the debate prompt assembled with the history as
+  chat messages versus as one compact message. Tokens are the local
+  estimate used for budgeting and, when tiktoken is installed, a real
+  count (content plus ~3 framing tokens per chat message).
+
+Usage:
+    PYTHONPATH=. python benchmarks/compact_history.py [--messages 10] [--model gpt-4o-mini]
+"""
+
+import argparse
+from typing import Dict, List, Optional
+
+from app.prompts.build_prompt import assemble_conversation_prompt
+from app.services.llm.llm_io import LLMConversationRequest
+from app.services.storage.codecs import CODECS, ValueCodec
+from app.utils.message_adapter import encode_history
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+TURN_TEXT = (
+    "Entiendo tu punto, pero los datos muestran lo contrario: cuando se aplicó "
+    "esta política en otros países, los resultados mejoraron de forma sostenida. "
+)
+META = {"topic": "La energía nuclear", "stance": "A favor de ampliarla"}
+# Framing tokens the chat format adds per message for the GPT family.
+CHAT_MESSAGE_TOKENS = 3
+
+
+def conversation(messages: int) -> List[Dict[str, str]]:
+    """Build a history window: the opener followed by alternating turns."""
+    history = [{"role": "system", "content": "Debatamos sobre la energía nuclear."}]
+    for i in range(1, messages):
+        history.append(
+            {
+                "role": "user" if i % 2 else "assistant",
+                "content": TURN_TEXT * (1 + i % 2),
+            }
+        )
+    return history
+
+
+def stored_bytes(codec: ValueCodec, entries: List[object]) -> int:
+    """Total encoded size of the list entries as written to Redis."""
+    return sum(len(codec.encode(entry)) for entry in entries)
+
+
+def real_tokens(request: LLMConversationRequest, model: str) -> Optional[int]:
+    """Count the request's tokens with tiktoken, or None when not installed."""
+    if tiktoken is None:
+        return None
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return sum(
+        len(encoding.encode(message.content)) + CHAT_MESSAGE_TOKENS
+        for message in request.messages
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+
+    history = conversation(args.messages)
+    compact = encode_history(history)
+
+    print(f"Redis bytes per conversation ({args.messages} messages)")
+    print(f"{'codec':<10}{'dicts':>9}{'compact':>9}{'saved':>8}")
+    for name, codec_cls in CODECS.items():
+        try:
+            codec = ValueCodec(codec=codec_cls())
+        except RuntimeError:
+            continue
+        before, after = stored_bytes(codec, history), stored_bytes(codec, compact)
+        print(f"{name:<10}{before:>9}{after:>9}{1 - after / before:>8.1%}")
+
+    last = {"role": "user", "content": TURN_TEXT}
+    print("\nPrompt tokens per turn")
+    print(f"{'format':<10}{'estimate':>9}{'history':>9}{'tiktoken':>10}")
+    for history_format in ("messages", "compact"):
+        assembly = assemble_conversation_prompt(
+            META, history, None, last, max_input_tokens=100_000,
+            history_format=history_format,
+        )
+        counted = real_tokens(assembly.request, args.model)
+        print(
+            f"{history_format:<10}{assembly.total_tokens:>9}"
+            f"{assembly.sections['history']:>9}"
+            f"{counted if counted is not None else '-':>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
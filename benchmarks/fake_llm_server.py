@@ -0,0 +1,262 @@
+"""OpenAI-compatible stub server for offline tests and benchmarks.
+
+Serves `POST /v1/chat/completions` (plain and streamed) with canned debate
+replies, an artificial latency drawn from a configurable distribution and an
+optional error rate, so the LLM clients, the router and the whole API can be
+exercised without spending tokens.
+
+Latency distributions (`--latency-dist`), all with mean `--latency-ms`:
+    fixed        every response takes exactly the mean.
+    uniform      uniform between mean - jitter and mean + jitter.
+    normal       normal with standard deviation `--jitter-ms`.
+    lognormal    long right tail; `--jitter-ms` is the standard deviation.
+    exponential  memoryless, standard deviation equal to the mean.
+
+Streamed responses spread the latency: the first chunk arrives after
+`--ttft-share` of it and the remaining chunks share the rest.
+
+Usage:
+    PYTHONPATH=. python benchmarks/fake_llm_server.py --port 8001 \
+        --latency-ms 800 --latency-dist lognormal --jitter-ms 400
+
+Point the API at it with `OPENAI_BASE_URL=http://localhost:8001/v1` or an
+`LLM_BACKENDS` entry whose `base_url` is that address.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+STREAM_CHUNK_CHARS = 24
+
+REPLIES = [
+    "Entiendo tu punto, pero los datos muestran lo contrario: cuando se aplicó "
+    "esta política, los resultados mejoraron de forma sostenida.",
+    "Tu argumento ignora un detalle clave: los costos a largo plazo superan con "
+    "creces cualquier beneficio inmediato.",
+    "Piensa en un ejemplo cotidiano: nadie confiaría en un puente construido sin "
+    "pruebas, y aquí ocurre exactamente lo mismo.",
+]
+
+
+def create_app(
+    latency_ms: float = 0.0,
+    error_rate: float = 0.0,
+    model: str = "fake-model",
+    seed: Optional[int] = None,
+    latency_dist: str = "fixed",
+    jitter_ms: float = 0.0,
+    ttft_share: float = 0.3,
+) -> FastAPI:
+    """Build the stub server.
+
+    Args:
+        latency_ms: Mean delay of each response.
+        error_rate: Share of requests answered with HTTP 500.
+        model: Model name echoed in responses.
+        seed: Seed for reproducible latencies, replies and failures.
+        latency_dist: One of `LATENCY_DISTRIBUTIONS`.
+        jitter_ms: Spread of the distribution around the mean.
+        ttft_share: Share of a streamed response's latency spent before the
+            first chunk.
+
+    Returns:
+        FastAPI: Application serving the chat completions endpoint.
+    """
+    app = FastAPI(title="Fake LLM")
+    rng = random.Random(seed)
+    sample_latency = latency_sampler(latency_dist, latency_ms, jitter_ms, rng)
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Any:
+        body = await request.json()
+        app.state.requests += 1
+        latency = sample_latency() / 1000
+        if rng.random() < error_rate:
+            await asyncio.sleep(latency)
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Injected failure", "type": "server_error"}},
+            )
+        content = _reply(body, rng)
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_completion(body, content, model, latency, ttft_share),
+                media_type="text/event-stream",
+            )
+        await asyncio.sleep(latency)
+        return completion(body, content, model)
+
+    return app
+
+
+def latency_sampler(
+    dist: str, mean_ms: float, jitter_ms: float, rng: random.Random
+) -> Callable[[], float]:
+    """Return a function drawing response latencies in milliseconds.
+
+    Args:
+        dist: One of `LATENCY_DISTRIBUTIONS`.
+        mean_ms: Mean latency.
+        jitter_ms: Spread around the mean (ignored by `fixed` and
+            `exponential`).
+        rng: Random source.
+
+    Returns:
+        Callable[[], float]: Sampler returning non-negative latencies.
+
+    Raises:
+        ValueError: If the distribution is unknown.
+    """
+    if dist == "fixed" or mean_ms <= 0:
+        return lambda: max(0.0, mean_ms)
+    if dist == "uniform":
+        return lambda: max(0.0, rng.uniform(mean_ms - jitter_ms, mean_ms + jitter_ms))
+    if dist == "normal":
+        return lambda: max(0.0, rng.gauss(mean_ms, jitter_ms))
+    if dist == "lognormal":
+        # Parameters of the underlying normal giving the requested mean and deviation.
+        sigma = math.sqrt(math.log(1 + (jitter_ms / mean_ms) ** 2))
+        mu = math.log(mean_ms) - sigma**2 / 2
+        return lambda: rng.lognormvariate(mu, sigma)
+    if dist == "exponential":
+        return lambda: rng.expovariate(1 / mean_ms)
+    raise ValueError(f"Unknown latency distribution: {dist}")
+
+
+def completion(body: Dict[str, Any], content: str, model: str) -> Dict[str, Any]:
+    """Render a chat completion in the OpenAI response format."""
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+    prompt_tokens = max(1, prompt_chars // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model") or model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+
+
+async def stream_completion(
+    body: Dict[str, Any],
+    content: str,
+    model: str,
+    latency: float,
+    ttft_share: float,
+) -> AsyncIterator[str]:
+    """Render a streamed chat completion as server-sent events.
+
+    Args:
+        body: Request body; `stream_options.include_usage` adds a usage chunk.
+        content: Reply to stream.
+        model: Model name echoed when the request names none.
+        latency: Total seconds the stream should take.
+        ttft_share: Share of the latency spent before the first chunk.
+
+    Yields:
+        str: `data:` lines ending with `data: [DONE]`.
+    """
+    pieces = [
+        content[i : i + STREAM_CHUNK_CHARS]
+        for i in range(0, len(content), STREAM_CHUNK_CHARS)
+    ] or [""]
+    full = completion(body, content, model)
+    chunk = {
+        "id": full["id"],
+        "object": "chat.completion.chunk",
+        "created": full["created"],
+        "model": full["model"],
+    }
+
+    await asyncio.sleep(latency * ttft_share)
+    gap = latency * (1 - ttft_share) / len(pieces)
+    for index, piece in enumerate(pieces):
+        if index:
+            await asyncio.sleep(gap)
+        delta = {"content": piece}
+        if index == 0:
+            delta["role"] = "assistant"
+        yield _event(
+            {**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+        )
+    yield _event(
+        {**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    )
+    if (body.get("stream_options") or {}).get("include_usage"):
+        yield _event({**chunk, "choices": [], "usage": full["usage"]})
+    yield "data: [DONE]\n\n"
+
+
+def _event(data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _reply(body: Dict[str, Any], rng: random.Random) -> str:
+    """Pick a reply; extraction prompts get the JSON they ask for."""
+    prompt = str(body.get("messages", [{}])[0].get("content", ""))
+    if '"argument"' in prompt:
+        return json.dumps(
+            {"topic": "Tema de prueba", "stance": "A favor", "argument": rng.choice(REPLIES)},
+            ensure_ascii=False,
+        )
+    if '"topic"' in prompt:
+        return json.dumps({"topic": "Tema de prueba", "stance": "A favor"})
+    return rng.choice(REPLIES)
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument(
+        "--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed"
+    )
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--ttft-share", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            seed=args.seed,
+            latency_dist=args.latency_dist,
+            jitter_ms=args.jitter_ms,
+            ttft_share=args.ttft_share,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
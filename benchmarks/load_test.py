@@ -0,0 +1,329 @@
+"""End-to-end load test of the debate API.
+
+Drives `--debates` multi-turn debates against `POST /conversation`, at most
+`--concurrency` of them at a time. Each debate opens with a message from the
+opener corpus and continues for `--turns` turns in total, reusing the
+returned `conversation_id`, so Redis, Postgres, the worker and the LLM client
+all take part. Point the API at `benchmarks/fake_llm_server.py` to measure
+the service without spending tokens (`make bench` does this).
+
+Reports latency percentiles per turn kind, throughput, error rate and the
+shares of degraded answers, split into deadline overruns and turns no LLM
+backend was available for. `--max-error-rate` and
+`--max-p95-ms` make the run fail, for use as a regression gate.
+
+Usage:
+    python benchmarks/load_test.py --url http://localhost:8000 \\
+        --debates 50 --concurrency 10 --turns 4 [--json report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+CORPUS_PATH = Path(__file__).parent / "data" / "topic_stance_corpus.jsonl"
+
+FOLLOW_UPS = [
+    "No estoy de acuerdo, ¿qué pruebas tienes de eso?",
+    "Eso suena bien en teoría, pero en la práctica nunca funciona así.",
+    "Dame un ejemplo concreto que respalde tu argumento.",
+    "Mucha gente piensa lo contrario y tiene buenas razones.",
+    "¿Y qué pasa con los costos? Nadie habla de eso.",
+    "I still don't buy it, convince me with data.",
+    "Ok, pero eso no responde a lo que te pregunté.",
+]
+
+
+class TurnResult(BaseModel):
+    """Outcome of one request of the load test.
+
+    Attributes:
+        kind: `open` for the first turn of a debate, `continue` otherwise.
+        latency_ms: Wall-clock time of the request.
+        status: HTTP status code; 0 when the request itself failed.
+        degraded: Whether the API answered with a degraded reply because the
+            deadline ran out.
+        unavailable: Whether the API answered with a degraded reply because
+            no LLM backend was available.
+        error: Error description for failed requests.
+    """
+
+    kind: str
+    latency_ms: float
+    status: int = 0
+    degraded: bool = False
+    unavailable: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the request got a successful, non-degraded answer."""
+        return (
+            self.status == 200
+            and self.error is None
+            and not self.degraded
+            and not self.unavailable
+        )
+
+
+def load_openers(path: Path = CORPUS_PATH) -> List[str]:
+    """Read the opening messages of the topic/stance corpus."""
+    return [
+        json.loads(line)["message"]
+        for line in path.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+
+async def send_turn(
+    client: httpx.AsyncClient,
+    message: str,
+    conversation_id: Optional[str],
+    kind: str,
+) -> Tuple[TurnResult, Optional[str]]:
+    """Send one debate turn.
+
+    Args:
+        client: HTTP client bound to the API base URL and credentials.
+        message: User message.
+        conversation_id: Conversation to continue; None to open one.
+        kind: Turn kind recorded in the result.
+
+    Returns:
+        tuple: The turn result and the conversation id to continue with.
+    """
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            "/conversation",
+            json={"conversation_id": conversation_id, "message": message},
+        )
+    except httpx.HTTPError as e:
+        elapsed = (time.perf_counter() - started) * 1000
+        return TurnResult(kind=kind, latency_ms=elapsed, error=repr(e)), None
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if response.status_code != 200:
+        return (
+            TurnResult(
+                kind=kind,
+                latency_ms=elapsed,
+                status=response.status_code,
+                error=response.text[:200],
+            ),
+            None,
+        )
+    body = response.json()
+    unavailable = body.get("degraded_reason") == "unavailable"
+    return (
+        TurnResult(
+            kind=kind,
+            latency_ms=elapsed,
+            status=response.status_code,
+            degraded=bool(body.get("degraded")) and not unavailable,
+            unavailable=unavailable,
+        ),
+        body.get("conversation_id"),
+    )
+
+
+async def run_debate(
+    client: httpx.AsyncClient,
+    opener: str,
+    turns: int,
+    rng: random.Random,
+    results: List[TurnResult],
+    think_time: float = 0.0,
+) -> None:
+    """Play one debate, stopping early if it cannot be continued.
+
+    Args:
+        client: HTTP client bound to the API.
+        opener: Opening message.
+        turns: Total turns including the opening one.
+        rng: Random source for the follow-up messages.
+        results: List the turn results are appended to.
+        think_time: Seconds to wait between turns, like a user typing.
+    """
+    result, conversation_id = await send_turn(client, opener, None, "open")
+    results.append(result)
+    for _ in range(turns - 1):
+        if not conversation_id:
+            return
+        if think_time:
+            await asyncio.sleep(think_time)
+        result, next_id = await send_turn(
+            client, rng.choice(FOLLOW_UPS), conversation_id, "continue"
+        )
+        results.append(result)
+        if result.status != 200:
+            return
+        conversation_id = next_id or conversation_id
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    debates: int,
+    concurrency: int,
+    turns: int,
+    openers: Sequence[str],
+    seed: Optional[int] = None,
+    think_time: float = 0.0,
+) -> Dict[str, Any]:
+    """Run the load test and summarize it.
+
+    Args:
+        client: HTTP client bound to the API.
+        debates: Number of debates to play.
+        concurrency: Maximum debates in flight at once.
+        turns: Turns per debate, including the opening one.
+        openers: Opening messages to pick from.
+        seed: Seed for reproducible message choices.
+        think_time: Seconds between turns of a debate.
+
+    Returns:
+        dict: Report as built by `summarize`.
+    """
+    rng = random.Random(seed)
+    results: List[TurnResult] = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def debate(opener: str) -> None:
+        async with slots:
+            await run_debate(client, opener, turns, rng, results, think_time)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(debate(rng.choice(openers)) for _ in range(debates)))
+    return summarize(results, time.perf_counter() - started)
+
+
+def summarize(results: Sequence[TurnResult], elapsed: float) -> Dict[str, Any]:
+    """Aggregate turn results into the load-test report.
+
+    Args:
+        results: Results of every request sent.
+        elapsed: Wall-clock duration of the run in seconds.
+
+    Returns:
+        dict: Request counts, error, degraded and unavailable rates,
+            throughput in requests per second and latency percentiles in
+            milliseconds, overall and per turn kind.
+    """
+    total = len(results)
+    errors = sum(1 for r in results if r.error is not None)
+    degraded = sum(1 for r in results if r.degraded)
+    unavailable = sum(1 for r in results if r.unavailable)
+    return {
+        "requests": total,
+        "ok": sum(1 for r in results if r.ok),
+        "errors": errors,
+        "degraded": degraded,
+        "error_rate": errors / total if total else 0.0,
+        "degraded_rate": degraded / total if total else 0.0,
+        "unavailable": unavailable,
+        "unavailable_rate": unavailable / total if total else 0.0,
+        "duration_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": latency_summary([r.latency_ms for r in results]),
+        "by_kind": {
+            kind: latency_summary([r.latency_ms for r in results if r.kind == kind])
+            for kind in ("open", "continue")
+        },
+    }
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, float]:
+    """Mean, p50, p95, p99 and max of latency samples; zeros when empty."""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of sorted samples; 0 when empty."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print the report as a human-readable table."""
+    print(f"requests:     {report['requests']} in {report['duration_s']:.1f} s")
+    print(f"throughput:   {report['throughput_rps']:.2f} req/s")
+    print(f"error rate:   {report['error_rate']:.2%} ({report['errors']})")
+    print(f"degraded:     {report['degraded_rate']:.2%} ({report['degraded']})")
+    print(f"unavailable:  {report['unavailable_rate']:.2%} ({report['unavailable']})")
+    rows = [("all", report["latency_ms"])] + list(report["by_kind"].items())
+    print(f"{'latency ms':<12}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, stats in rows:
+        print(
+            f"{name:<12}{stats['count']:>7}{stats['mean']:>9.0f}{stats['p50']:>9.0f}"
+            f"{stats['p95']:>9.0f}{stats['p99']:>9.0f}{stats['max']:>9.0f}"
+        )
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={"Authorization": f"Bearer {args.api_key}"},
+        timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as client:
+        return await run_load(
+            client,
+            debates=args.debates,
+            concurrency=args.concurrency,
+            turns=args.turns,
+            openers=load_openers(),
+            seed=args.seed,
+            think_time=args.think_time,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test of POST /conversation.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", "dev-leonardo-key"))
+    parser.add_argument("--debates", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", default=None)
+    parser.add_argument("--max-error-rate", type=float, default=None)
+    parser.add_argument("--max-p95-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    print_report(report)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    failed = []
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        failed.append(f"error rate {report['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    if args.max_p95_ms is not None and report["latency_ms"]["p95"] > args.max_p95_ms:
+        failed.append(f"p95 {report['latency_ms']['p95']:.0f} ms > {args.max_p95_ms:.0f} ms")
+    if failed:
+        print("FAILED: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark the rule-based topic/stance parser against the opener corpus.
+
+Reports how many openers skip the LLM extraction call, how accurate those
+extractions are, the parser's own latency, and the latency saved assuming an
+average extraction round trip of `--llm-latency-ms`.
+
+Usage:
+    PYTHONPATH=. python benchmarks/topic_stance_parser.py [--llm-latency-ms 900]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from app.utils.topic_stance_parser import extract_topic_and_stance
+
+CORPUS_PATH = Path(__file__).parent / "data" / "topic_stance_corpus.jsonl"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency-ms", type=float, default=900.0)
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = [
+        json.loads(line)
+        for line in CORPUS_PATH.read_text(encoding="utf-8").splitlines()
+    ]
+
+    hits = correct = 0
+    for case in corpus:
+        result = extract_topic_and_stance(case["message"])
+        if result.meta is None or result.confidence < args.min_confidence:
+            continue
+        hits += 1
+        if (result.meta.topic, result.meta.stance) == (case["topic"], case["stance"]):
+            correct += 1
+
+    timings = []
+    for _ in range(args.rounds):
+        for case in corpus:
+            start = time.perf_counter()
+            extract_topic_and_stance(case["message"])
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    parse_ms = statistics.mean(timings)
+    saved_ms = hits * args.llm_latency_ms - len(corpus) * parse_ms
+
+    print(f"openers:          {len(corpus)}")
+    print(f"parser hits:      {hits} ({hits / len(corpus):.0%})")
+    print(f"hit accuracy:     {correct}/{hits}")
+    print(f"parse latency:    mean {parse_ms:.3f} ms, p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+    print(
+        f"latency saved:    {saved_ms / len(corpus):.0f} ms per opener "
+        f"(LLM extraction assumed {args.llm_latency_ms:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
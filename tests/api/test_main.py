@@ -1,8 +1,14 @@
 import os
+
+import httpx
+import openai
 import pytest
 from fastapi.testclient import TestClient
 
 import app.main as main_mod
+from app.schemas.responses import StreamEvent
+from app.services.llm.router import NoBackendAvailable
+from app.utils.deadline import DeadlineExceeded
 
 
 @pytest.fixture
@@ -29,15 +35,23 @@ def test_chat_new_conversation_uses_service(client, monkeypatch):
     headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
 
     class DummyService:
-        async def start_conversation(self, msg):
-            return {"conversation_id": "conv-x", "topic": "T", "stance": "S"}
+        async def open_conversation(self, msg, deadline=None):
+            reply = {"role": "assistant", "content": "apertura"}
+            return "conv-x", {"conversation_id": "conv-x", "message": [reply]}, reply
+
+        async def persist_conversation(self, *args, **kwargs):
+            return None
 
     # override FastAPI dependency to return our dummy
     main_mod.app.dependency_overrides[main_mod.get_conversation_service] = (
         lambda: DummyService()
     )
 
-    r = client.post("/chat", json={"message": "inicia"}, headers=headers)
+    r = client.post(
+        "/conversation",
+        json={"message": "Debatamos sobre IA, tú estás en contra"},
+        headers=headers,
+    )
     assert r.status_code == 200
     data = r.json()
     assert data["conversation_id"] == "conv-x"
@@ -47,8 +61,8 @@ def test_chat_existing_conversation_returns_response(client, monkeypatch):
     headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
 
     class DummyService:
-        async def continue_conversation(self, conv_id, msg):
-            return {"conversation_id": conv_id, "message": [msg]}, {"role": "assistant", "content": "ok"}
+        async def continue_conversation(self, conv_id, msg, deadline=None):
+            return {"conversation_id": conv_id, "message": [msg.model_dump()]}, {"role": "assistant", "content": "ok"}
 
         async def persist_conversation(self, *args, **kwargs):
             return None
@@ -57,8 +71,190 @@ def test_chat_existing_conversation_returns_response(client, monkeypatch):
         lambda: DummyService()
     )
 
-    r = client.post("/chat", json={"conversation_id": "conv-1", "message": "hola"}, headers=headers)
+    r = client.post(
+        "/conversation",
+        json={"conversation_id": "conv-1", "message": "hola, este es mi argumento"},
+        headers=headers,
+    )
     assert r.status_code == 200
     data = r.json()
     assert data["conversation_id"] == "conv-1"
     assert isinstance(data.get("message"), list)
+
+
+def test_conversation_returns_degraded_reply_when_deadline_is_exhausted(client):
+    headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
+    persisted = []
+
+    class DummyService:
+        async def continue_conversation(self, conv_id, msg, deadline=None):
+            assert deadline is not None and deadline.remaining() > 0
+            raise DeadlineExceeded("Deadline exceeded")
+
+        async def persist_conversation(self, *args, **kwargs):
+            persisted.append(args)
+
+    main_mod.app.dependency_overrides[main_mod.get_conversation_service] = (
+        lambda: DummyService()
+    )
+
+    r = client.post(
+        "/conversation",
+        json={"conversation_id": "conv-1", "message": "hola, este es mi argumento"},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["degraded"] is True
+    assert data["degraded_reason"] == "timeout"
+    assert data["conversation_id"] == "conv-1"
+    assert data["message"][0]["role"] == "assistant"
+    assert persisted == []
+
+
+def test_conversation_reports_unavailable_when_no_llm_backend_is_up(client):
+    headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
+
+    class DummyService:
+        async def continue_conversation(self, conv_id, msg, deadline=None):
+            raise NoBackendAvailable("Every LLM backend circuit is open")
+
+    main_mod.app.dependency_overrides[main_mod.get_conversation_service] = (
+        lambda: DummyService()
+    )
+
+    r = client.post(
+        "/conversation",
+        json={"conversation_id": "conv-1", "message": "hola, este es mi argumento"},
+        headers=headers,
+    )
+    main_mod.app.dependency_overrides.clear()
+    assert r.status_code == 200
+    data = r.json()
+    assert data["degraded"] is True
+    assert data["degraded_reason"] == "unavailable"
+
+    r = client.get("/metrics", headers=headers)
+    assert 'carax_degraded_turns_total{reason="unavailable"}' in r.text
+
+
+def test_conversation_degrades_when_llm_retries_are_exhausted(client):
+    headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
+    rate_limited = openai.RateLimitError(
+        "Rate limit reached",
+        response=httpx.Response(429, request=httpx.Request("POST", "http://llm.local")),
+        body=None,
+    )
+
+    class DummyService:
+        async def continue_conversation(self, conv_id, msg, deadline=None):
+            raise rate_limited
+
+    main_mod.app.dependency_overrides[main_mod.get_conversation_service] = (
+        lambda: DummyService()
+    )
+
+    r = client.post(
+        "/conversation",
+        json={"conversation_id": "conv-1", "message": "hola, este es mi argumento"},
+        headers=headers,
+    )
+    main_mod.app.dependency_overrides.clear()
+    assert r.status_code == 200
+    data = r.json()
+    assert data["degraded"] is True
+    assert data["degraded_reason"] == "unavailable"
+
+
+def test_conversation_stream_emits_tokens_then_persists(client):
+    headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
+    persisted = []
+
+    class DummyService:
+        async def stream_conversation(self, conv_id, msg, deadline=None):
+            yield StreamEvent(event="token", data={"content": "Ho"})
+            yield StreamEvent(event="token", data={"content": "la"})
+            yield StreamEvent(
+                event="done",
+                data={
+                    "conversation_id": conv_id,
+                    "message": [{"role": "assistant", "content": "Hola"}],
+                },
+            )
+
+        async def persist_conversation(self, conv_id, user_msg, bot_msg):
+            persisted.append((conv_id, user_msg.content, bot_msg.content))
+
+    main_mod.app.dependency_overrides[main_mod.get_conversation_service] = (
+        lambda: DummyService()
+    )
+
+    r = client.post(
+        "/conversation/stream",
+        json={"conversation_id": "conv-1", "message": "hola, este es mi argumento"},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in r.text.split("\n\n") if block]
+    assert events[0] == 'event: token\ndata: {"content": "Ho"}'
+    assert events[-1].startswith("event: done")
+    assert persisted == [("conv-1", "hola, este es mi argumento", "Hola")]
+
+
+def test_metrics_are_exposed_in_prometheus_format(client):
+    headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
+
+    assert client.get("/metrics").status_code in (401, 403)
+
+    r = client.get("/metrics", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert "carax_stage_duration_seconds" in r.text
+    assert "carax_llm_tokens_total" in r.text
+
+
+def test_conversation_stream_opening_keeps_opener_and_reports_errors(client):
+    headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
+    streamed = []
+
+    class DummyService:
+        def __init__(self, fail_start=None):
+            self.fail_start = fail_start
+
+        async def start_conversation(self, msg, deadline=None):
+            if self.fail_start:
+                raise self.fail_start
+            msg.content = "extraction prompt"
+            return "conv-new"
+
+        async def stream_conversation(self, conv_id, msg, deadline=None):
+            streamed.append((conv_id, msg.role, msg.content))
+            yield StreamEvent(
+                event="done",
+                data={"conversation_id": conv_id, "message": [{"role": "assistant", "content": "Hola"}]},
+            )
+
+        async def persist_conversation(self, conv_id, user_msg, bot_msg):
+            pass
+
+    main_mod.app.dependency_overrides[main_mod.get_conversation_service] = (
+        lambda: DummyService()
+    )
+    r = client.post("/conversation/stream", json={"message": "Debatamos sobre IA, tú estás en contra"}, headers=headers)
+    assert r.status_code == 200
+    assert streamed == [("conv-new", "system", "Debatamos sobre IA, tú estás en contra")]
+
+    for error, expected in (
+        (DeadlineExceeded("late"), '"degraded_reason": "timeout"'),
+        (NoBackendAvailable("all open"), '"degraded_reason": "unavailable"'),
+        (ValueError("Topic and stance not processed."), "Response generation failed."),
+    ):
+        main_mod.app.dependency_overrides[main_mod.get_conversation_service] = (
+            lambda error=error: DummyService(fail_start=error)
+        )
+        r = client.post("/conversation/stream", json={"message": "Debatamos sobre energía nuclear"}, headers=headers)
+        assert r.status_code == 200
+        assert r.text.startswith("event: error")
+        assert expected in r.text
+    main_mod.app.dependency_overrides.clear()
@@ -0,0 +1,47 @@
+import random
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.services.llm.openai_client import OpenAIClient
+from benchmarks.fake_llm_server import REPLIES, create_app, latency_sampler
+
+
+def client_for(app):
+    client = OpenAIClient(model="fake-model", report_cached_tokens=True)
+    client.client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake-llm/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+    )
+    return client
+
+
+@pytest.mark.asyncio
+async def test_streams_reply_in_chunks_with_usage():
+    client = client_for(create_app(seed=3))
+
+    chunks = [
+        chunk
+        async for chunk in client.stream_response([{"role": "user", "content": "Hola"}])
+    ]
+
+    assert len(chunks) > 1
+    assert "".join(chunks) in REPLIES
+    assert client.last_usage["completion_tokens"] > 0
+
+
+@pytest.mark.parametrize("dist", ["fixed", "uniform", "normal", "lognormal", "exponential"])
+def test_latency_distributions_keep_requested_mean(dist):
+    sample = latency_sampler(dist, 200.0, 80.0, random.Random(1))
+
+    samples = [sample() for _ in range(5000)]
+
+    assert min(samples) >= 0
+    assert sum(samples) / len(samples) == pytest.approx(200.0, rel=0.1)
+
+
+def test_unknown_latency_distribution_is_rejected():
+    with pytest.raises(ValueError):
+        latency_sampler("pareto", 200.0, 0.0, random.Random(1))
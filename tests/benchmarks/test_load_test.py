@@ -0,0 +1,91 @@
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from benchmarks.load_test import TurnResult, run_load, summarize
+
+
+def fake_api(fail_continue=False, degrade_every=0):
+    app = FastAPI()
+    app.state.turns = 0
+
+    @app.post("/conversation")
+    async def conversation(body: dict):
+        app.state.turns += 1
+        if body["conversation_id"] and fail_continue:
+            return JSONResponse(status_code=500, content={"detail": "boom"})
+        degraded = bool(degrade_every) and app.state.turns % degrade_every == 0
+        return {
+            "conversation_id": body["conversation_id"] or str(uuid.uuid4()),
+            "message": [{"role": "assistant", "content": "ok"}],
+            "degraded": degraded,
+        }
+
+    return app
+
+
+def api_client(app):
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://api",
+    )
+
+
+@pytest.mark.asyncio
+async def test_plays_every_turn_of_every_debate():
+    app = fake_api(degrade_every=4)
+
+    async with api_client(app) as client:
+        report = await run_load(
+            client, debates=5, concurrency=2, turns=3, openers=["Debatamos sobre X"], seed=1
+        )
+
+    assert report["requests"] == 15
+    assert report["errors"] == 0
+    assert report["degraded"] == 3
+    assert report["by_kind"]["open"]["count"] == 5
+    assert report["by_kind"]["continue"]["count"] == 10
+    assert report["throughput_rps"] > 0
+
+
+@pytest.mark.asyncio
+async def test_debate_stops_after_a_failed_turn():
+    app = fake_api(fail_continue=True)
+
+    async with api_client(app) as client:
+        report = await run_load(
+            client, debates=4, concurrency=4, turns=5, openers=["Debatamos sobre X"]
+        )
+
+    assert report["requests"] == 8
+    assert report["errors"] == 4
+    assert report["error_rate"] == 0.5
+
+
+def test_summarize_reports_percentiles():
+    results = [TurnResult(kind="open", latency_ms=float(ms), status=200) for ms in range(1, 101)]
+
+    report = summarize(results, elapsed=2.0)
+
+    assert report["throughput_rps"] == 50
+    assert report["latency_ms"]["p50"] == 51
+    assert report["latency_ms"]["p95"] == 96
+    assert report["latency_ms"]["p99"] == 100
+    assert report["by_kind"]["continue"]["count"] == 0
+
+
+def test_summarize_counts_unavailable_apart_from_timeouts():
+    results = [
+        TurnResult(kind="open", latency_ms=1.0, status=200, degraded=True),
+        TurnResult(kind="open", latency_ms=1.0, status=200, unavailable=True),
+        TurnResult(kind="open", latency_ms=1.0, status=200),
+    ]
+
+    report = summarize(results, elapsed=1.0)
+
+    assert report["ok"] == 1
+    assert report["degraded"] == 1
+    assert report["unavailable"] == 1
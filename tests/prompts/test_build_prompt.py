@@ -1,4 +1,10 @@
-from app.prompts.build_prompt import build_conversation_prompt, build_new_conversation_prompt
+from app.prompts.build_prompt import (
+    assemble_conversation_prompt,
+    build_conversation_prompt,
+    build_new_conversation_prompt,
+)
+from app.prompts.constants import CONVERSATION_SYSTEM_PROMPT
+from app.prompts.token_budget import estimate_tokens
 
 
 def test_build_new_conversation_prompt_includes_message_text():
@@ -10,12 +16,101 @@ def test_build_new_conversation_prompt_includes_message_text():
 def test_build_conversation_prompt_renders_all_parts():
     topic_and_stance = {"topic": "IA", "stance": "En contra"}
     redis_messages = [{"role": "user", "content": "m1"}]
-    summary = {"summary": "resumen"}
+    summary = "resumen"
     last_message = {"role": "user", "content": "último"}
 
-    prompt = build_conversation_prompt(topic_and_stance, redis_messages, summary, last_message)
+    request = build_conversation_prompt(topic_and_stance, redis_messages, summary, last_message)
+    rendered = "\n".join(m.content for m in request.messages)
 
-    assert "IA" in prompt
-    assert "En contra" in prompt or str(topic_and_stance) in prompt
-    assert "resumen" in prompt or str(summary) in prompt
-    assert "último" in prompt
+    assert "IA" in rendered
+    assert "En contra" in rendered
+    assert "resumen" in rendered
+    assert "último" in rendered
+
+
+def test_build_conversation_prompt_orders_static_prefix_first():
+    def build(topic, history, last):
+        return build_conversation_prompt(
+            {"topic": topic, "stance": "En contra"},
+            history,
+            None,
+            {"role": "user", "content": last},
+        ).messages
+
+    first = build("IA", [{"role": "system", "content": "Debatamos  sobre IA"}], "hola")
+    other = build("Clima", [], "adiós")
+
+    # the instructions are identical across conversations and turns
+    assert first[0] == other[0]
+    assert first[0].role == "system" and first[0].content == CONVERSATION_SYSTEM_PROMPT
+    assert "IA" in first[1].content and "Clima" in other[1].content
+    # history and the last message travel as chat-role messages, compacted
+    assert [(m.role, m.content) for m in first[2:]] == [
+        ("user", "Debatamos sobre IA"),
+        ("user", "hola"),
+    ]
+
+
+def test_assemble_conversation_prompt_drops_oldest_turns_to_fit_budget():
+    history = [{"role": "user", "content": f"mensaje {i} " + "x" * 200} for i in range(10)]
+    unbounded = assemble_conversation_prompt(
+        {"topic": "IA", "stance": "En contra"}, history, "resumen", {"role": "user", "content": "último"},
+        max_input_tokens=100000,
+    )
+    budget = unbounded.total_tokens - 200
+
+    assembly = assemble_conversation_prompt(
+        {"topic": "IA", "stance": "En contra"}, history, "resumen", {"role": "user", "content": "último"},
+        max_input_tokens=budget,
+    )
+    contents = [m.content for m in assembly.request.messages]
+
+    assert unbounded.dropped_messages == 0
+    assert assembly.dropped_messages > 0
+    assert assembly.total_tokens <= budget
+    assert any(c.startswith("mensaje 9") for c in contents)
+    assert not any(c.startswith("mensaje 0") for c in contents)
+    assert set(assembly.sections) == {
+        "instructions", "topic_and_stance", "last_message", "history", "summary"
+    }
+
+
+def test_assemble_conversation_prompt_compact_history_format():
+    history = [{"role": "system", "content": "Debatamos  sobre IA"}] + [
+        {"role": "assistant" if i % 2 else "user", "content": f"mensaje {i} " + "x" * 80}
+        for i in range(1, 10)
+    ]
+    args = ({"topic": "IA", "stance": "En contra"}, history, None, {"role": "user", "content": "último"})
+    messages = assemble_conversation_prompt(*args, max_input_tokens=100000)
+    compact = assemble_conversation_prompt(
+        *args, max_input_tokens=100000, history_format="compact"
+    )
+
+    block = compact.request.messages[2]
+    assert len(compact.request.messages) == 4
+    assert block.role == "system"
+    assert block.content.splitlines()[1:3] == ["u: Debatamos sobre IA", "a: mensaje 1 " + "x" * 80]
+    assert compact.request.messages[-1].content == "último"
+    assert compact.sections["history"] < messages.sections["history"]
+
+    tight = assemble_conversation_prompt(
+        *args, max_input_tokens=compact.total_tokens - 30, history_format="compact"
+    )
+    assert tight.dropped_messages > 0
+    assert tight.total_tokens <= tight.budget
+    assert "mensaje 9" in tight.request.messages[2].content
+    assert "Debatamos" not in tight.request.messages[2].content
+
+
+def test_assemble_conversation_prompt_condenses_summary_last():
+    assembly = assemble_conversation_prompt(
+        {"topic": "IA", "stance": "En contra"},
+        [],
+        "antiguo " * 500 + "reciente",
+        {"role": "user", "content": "último"},
+        max_input_tokens=estimate_tokens(CONVERSATION_SYSTEM_PROMPT) + 80,
+    )
+
+    assert assembly.summary_truncated
+    assert "reciente" in assembly.request.messages[2].content
+    assert assembly.total_tokens <= assembly.budget
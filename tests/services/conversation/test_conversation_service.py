@@ -2,7 +2,10 @@ import json
 import pytest
 from unittest.mock import AsyncMock
 
+from app.domain.context import ConversationContext
+from app.domain.meta import MetaModel
 from app.services.conversation.conversation_service import ConversationService
+from app.services.llm.llm_io import LLMConversationMessage
 
 
 @pytest.mark.asyncio
@@ -22,18 +25,153 @@ async def test_start_conversation_creates_topic_and_stance(monkeypatch):
     service = ConversationService(llm=mock_llm, store=mock_store, cache=mock_cache)
 
     # Act
-    result = await service.start_conversation({"role": "user", "content": "Debatamos sobre clima, tú niegas su existencia"})
+    message = LLMConversationMessage(
+        role="system", content="Debatamos sobre clima, tú niegas su existencia"
+    )
+    result = await service.start_conversation(message)
 
     # Assert
-    assert result["conversation_id"] == "conv-123"
-    assert result["topic"] == "Cambio climático"
-    assert result["stance"] == "El cambio climático no es real"
-    mock_cache.store_in_memory.assert_awaited_once_with("conv-123:meta", {
+    assert result == "conv-123"
+    mock_cache.store_meta.assert_awaited_once_with("conv-123", {
         "topic": "Cambio climático",
         "stance": "El cambio climático no es real",
     })
 
 
+@pytest.mark.asyncio
+async def test_open_conversation_uses_single_llm_call():
+    mock_llm = AsyncMock()
+    mock_llm.generate_response.return_value = json.dumps({
+        "topic": "IA",
+        "stance": "En contra",
+        "argument": " La IA concentra poder. ",
+    })
+    mock_store = AsyncMock()
+    mock_store.save.return_value = "conv-1"
+    mock_cache = AsyncMock()
+
+    service = ConversationService(llm=mock_llm, store=mock_store, cache=mock_cache)
+
+    message = LLMConversationMessage(role="system", content="Convénceme de que la IA es peligrosa")
+    conversation_id, response, reply = await service.open_conversation(message)
+
+    assert conversation_id == "conv-1"
+    mock_llm.generate_response.assert_awaited_once()
+    mock_cache.store_meta.assert_awaited_once_with("conv-1", {"topic": "IA", "stance": "En contra"})
+    assert reply.content == "La IA concentra poder."
+    assert response == {
+        "conversation_id": "conv-1",
+        "message": [{"role": "assistant", "content": "La IA concentra poder."}],
+    }
+    # the original message is left untouched for persistence
+    assert message.content == "Convénceme de que la IA es peligrosa"
+
+
+@pytest.mark.asyncio
+async def test_open_conversation_skips_extraction_on_topic_cache_hit():
+    mock_llm = AsyncMock()
+    mock_llm.generate_response.return_value = "Argumento de apertura"
+    mock_store = AsyncMock()
+    mock_store.save.return_value = "conv-3"
+    mock_cache = AsyncMock()
+    mock_cache.retrieve_context.return_value = ConversationContext(
+        meta=MetaModel(topic="IA", stance="En contra")
+    )
+    topic_cache = AsyncMock()
+    topic_cache.get.return_value = MetaModel(topic="IA", stance="En contra")
+
+    service = ConversationService(
+        llm=mock_llm, store=mock_store, cache=mock_cache, topic_cache=topic_cache
+    )
+
+    message = LLMConversationMessage(role="system", content="Convénceme de que la IA es peligrosa")
+    conversation_id, response, reply = await service.open_conversation(message)
+
+    assert conversation_id == "conv-3"
+    # only the opening argument is generated
+    mock_llm.generate_response.assert_awaited_once()
+    mock_cache.store_meta.assert_awaited_once_with("conv-3", {"topic": "IA", "stance": "En contra"})
+    topic_cache.set.assert_not_awaited()
+    assert reply.content == "Argumento de apertura"
+
+
+@pytest.mark.asyncio
+async def test_open_conversation_caches_extracted_topic_and_stance():
+    mock_llm = AsyncMock()
+    mock_llm.generate_response.return_value = json.dumps({
+        "topic": "IA", "stance": "En contra", "argument": "La IA concentra poder."
+    })
+    mock_store = AsyncMock()
+    mock_store.save.return_value = "conv-4"
+    topic_cache = AsyncMock()
+    topic_cache.get.return_value = None
+
+    service = ConversationService(
+        llm=mock_llm, store=mock_store, cache=AsyncMock(), topic_cache=topic_cache
+    )
+
+    message = LLMConversationMessage(role="system", content="Convénceme de que la IA es peligrosa")
+    await service.open_conversation(message)
+
+    topic_cache.set.assert_awaited_once_with(
+        "Convénceme de que la IA es peligrosa", MetaModel(topic="IA", stance="En contra")
+    )
+
+
+@pytest.mark.asyncio
+async def test_open_conversation_parses_common_openers_without_extraction_call():
+    mock_llm = AsyncMock()
+    mock_llm.generate_response.return_value = "Argumento de apertura"
+    mock_store = AsyncMock()
+    mock_store.save.return_value = "conv-5"
+    mock_cache = AsyncMock()
+    mock_cache.retrieve_context.return_value = ConversationContext(
+        meta=MetaModel(topic="IA", stance="En contra")
+    )
+    topic_cache = AsyncMock()
+
+    service = ConversationService(
+        llm=mock_llm, store=mock_store, cache=mock_cache, topic_cache=topic_cache
+    )
+
+    message = LLMConversationMessage(
+        role="system", content="Vamos a debatir sobre IA, tu postura es en contra"
+    )
+    conversation_id, _, reply = await service.open_conversation(message)
+
+    assert conversation_id == "conv-5"
+    mock_llm.generate_response.assert_awaited_once()
+    mock_store.save.assert_awaited_once_with({"topic": "IA", "stance": "En contra"})
+    topic_cache.get.assert_not_awaited()
+    assert reply.content == "Argumento de apertura"
+
+
+@pytest.mark.asyncio
+async def test_open_conversation_falls_back_to_two_steps_on_parse_failure():
+    mock_llm = AsyncMock()
+    mock_llm.generate_response.side_effect = [
+        "esto no es JSON",
+        json.dumps({"topic": "IA", "stance": "En contra"}),
+        "Argumento de apertura",
+    ]
+    mock_store = AsyncMock()
+    mock_store.save.return_value = "conv-2"
+    mock_cache = AsyncMock()
+    mock_cache.retrieve_context.return_value = ConversationContext(
+        meta=MetaModel(topic="IA", stance="En contra")
+    )
+
+    service = ConversationService(llm=mock_llm, store=mock_store, cache=mock_cache)
+
+    message = LLMConversationMessage(role="system", content="Convénceme de que la IA es peligrosa")
+    conversation_id, response, reply = await service.open_conversation(message)
+
+    assert conversation_id == "conv-2"
+    assert mock_llm.generate_response.await_count == 3
+    assert reply.content == "Argumento de apertura"
+    assert response["message"] == [{"role": "assistant", "content": "Argumento de apertura"}]
+
+
 @pytest.mark.asyncio
 async def test_continue_conversation_builds_prompt_and_limits_history(monkeypatch):
     # Arrange
@@ -41,27 +179,87 @@ async def test_continue_conversation_builds_prompt_and_limits_history(monkeypatc
     mock_llm.generate_response.return_value = "Respuesta persuasiva"
 
     mock_store = AsyncMock()
-    mock_store.get.return_value = {"summary": "resumen previo"}
 
     mock_cache = AsyncMock()
     # simulate existing messages
     existing = [{"role": "user", "content": f"m{i}"} for i in range(6)]
-    mock_cache.retrieve_from_memory.side_effect = [
-        existing,  # history
-        {"topic": "X", "stance": "Y"},  # meta
-    ]
+    mock_cache.retrieve_context.return_value = ConversationContext(
+        meta=MetaModel(topic="X", stance="Y"), history=existing, summary="resumen previo"
+    )
 
-    service = ConversationService(llm=mock_llm, store=mock_store, cache=mock_cache)
+    service = ConversationService(
+        llm=mock_llm, store=mock_store, cache=mock_cache, history_window=3
+    )
 
-    user_message = {"role": "user", "content": "nuevo argumento"}
+    user_message = LLMConversationMessage(role="user", content="nuevo argumento")
     response, llm_msg = await service.continue_conversation("conv-1", user_message)
 
     # Assert
     assert response["conversation_id"] == "conv-1"
+    # a single batched read, limited to the window the prompt and envelope need
+    mock_cache.retrieve_context.assert_awaited_once_with("conv-1", last_n=5)
     # last 5 messages only
     assert len(response["message"]) == 5
-    assert llm_msg["role"] == "assistant"
-    assert isinstance(llm_msg["content"], str)
+    assert llm_msg.role == "assistant"
+    assert isinstance(llm_msg.content, str)
+    sent = mock_llm.generate_response.call_args.args[0]
+    assert [m.content for m in sent[-4:]] == ["m3", "m4", "m5", "nuevo argumento"]
+    assert "resumen previo" in sent[2].content
+
+
+@pytest.mark.asyncio
+async def test_continue_conversation_leaves_summarized_history_out_of_prompt():
+    mock_llm = AsyncMock()
+    mock_llm.generate_response.return_value = "Respuesta persuasiva"
+    mock_cache = AsyncMock()
+    existing = [{"role": "user", "content": f"m{i}"} for i in range(6)]
+    mock_cache.retrieve_context.return_value = ConversationContext(
+        meta=MetaModel(topic="X", stance="Y"),
+        history=existing,
+        summary="resumen previo",
+        summary_cutoff={"role": "user", "content": "m3"},
+    )
+    service = ConversationService(
+        llm=mock_llm, store=AsyncMock(), cache=mock_cache, history_window=10
+    )
+
+    response, _ = await service.continue_conversation(
+        "conv-1", LLMConversationMessage(role="user", content="nuevo argumento")
+    )
+
+    sent = [m.content for m in mock_llm.generate_response.call_args.args[0]]
+    assert not any(content in ("m0", "m1", "m2", "m3") for content in sent)
+    assert sent[-3:] == ["m4", "m5", "nuevo argumento"]
+    # the response envelope still carries the latest cached turns
+    assert response["message"][0] == {"role": "user", "content": "m3"}
+
+
+@pytest.mark.asyncio
+async def test_stream_conversation_yields_tokens_then_envelope():
+    async def fake_stream(messages, deadline=None):
+        for chunk in ["Respuesta ", "persuasiva"]:
+            yield chunk
+
+    mock_llm = AsyncMock()
+    mock_llm.stream_response = fake_stream
+
+    mock_cache = AsyncMock()
+    mock_cache.retrieve_context.return_value = ConversationContext(
+        meta=MetaModel(topic="X", stance="Y"),
+        history=[{"role": "assistant", "content": "apertura"}],
+    )
+
+    service = ConversationService(llm=mock_llm, store=AsyncMock(), cache=mock_cache)
+
+    user_message = LLMConversationMessage(role="user", content="nuevo argumento")
+    events = [e async for e in service.stream_conversation("conv-1", user_message)]
+
+    assert [e.event for e in events] == ["token", "token", "done"]
+    assert events[-1].data["message"][-1] == {
+        "role": "assistant",
+        "content": "Respuesta persuasiva",
+    }
+    assert len(events[-1].data["message"]) == 3
 
 
 @pytest.mark.asyncio
@@ -72,11 +270,36 @@ async def test_persist_conversation_stores_cache_and_db():
 
     service = ConversationService(llm=mock_llm, store=mock_store, cache=mock_cache)
 
-    user_message = {"role": "user", "content": "hola"}
-    bot_message = {"role": "assistant", "content": "respuesta"}
+    user_message = LLMConversationMessage(role="user", content="hola")
+    bot_message = LLMConversationMessage(role="assistant", content="respuesta")
 
     await service.persist_conversation("conv-9", user_message, bot_message)
 
-    mock_cache.store_in_memory.assert_awaited_once()
+    mock_cache.store_in_memory.assert_awaited_once_with(
+        "conv-9",
+        [
+            {"role": "user", "content": "hola"},
+            {"role": "assistant", "content": "respuesta"},
+        ],
+    )
     mock_store.save.assert_awaited_once()
 
+
+@pytest.mark.asyncio
+async def test_persist_conversation_enqueues_when_write_behind_enabled():
+    mock_store = AsyncMock()
+    mock_cache = AsyncMock()
+    mock_queue = AsyncMock()
+
+    service = ConversationService(
+        llm=AsyncMock(), store=mock_store, cache=mock_cache, turn_queue=mock_queue
+    )
+
+    user_message = LLMConversationMessage(role="user", content="hola")
+    bot_message = LLMConversationMessage(role="assistant", content="respuesta")
+
+    await service.persist_conversation("conv-9", user_message, bot_message)
+
+    mock_cache.store_in_memory.assert_awaited_once()
+    mock_queue.enqueue.assert_awaited_once_with("conv-9", [user_message, bot_message])
+    mock_store.save.assert_not_awaited()
@@ -1,7 +1,19 @@
+import asyncio
+
+import httpx
+import openai
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from app.services.llm.llm_io import LLMConversationMessage
 from app.services.llm.openai_client import OpenAIClient
+from app.utils.deadline import Deadline, DeadlineExceeded
+
+
+def make_response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
 
 @pytest.mark.asyncio
 async def test_generate_response_creates_client_and_returns_message():
@@ -34,6 +46,107 @@ async def test_generate_response_uses_existing_client():
     assert result == "Already here"
     mock_client.chat.completions.create.assert_called_once()
 
+@pytest.mark.asyncio
+async def test_stream_response_yields_content_deltas():
+    def make_chunk(content):
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = content
+        return chunk
+
+    async def fake_stream():
+        for content in ["Hola", None, " mundo"]:
+            yield make_chunk(content)
+
+    mock_client = AsyncMock()
+    mock_client.chat.completions.create.return_value = fake_stream()
+
+    client = OpenAIClient()
+    client.client = mock_client
+
+    chunks = [c async for c in client.stream_response([{"role": "user", "content": "Hi"}])]
+
+    assert chunks == ["Hola", " mundo"]
+    assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+@pytest.mark.asyncio
+async def test_generate_response_reports_cached_tokens_when_enabled():
+    mock_client = AsyncMock()
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "ok"
+    mock_response.usage.prompt_tokens = 1500
+    mock_response.usage.completion_tokens = 40
+    mock_response.usage.prompt_tokens_details.cached_tokens = 1024
+    mock_client.chat.completions.create.return_value = mock_response
+
+    client = OpenAIClient(report_cached_tokens=True)
+    client.client = mock_client
+
+    await client.generate_response([LLMConversationMessage(role="user", content="Hi")])
+
+    assert client.last_usage == {
+        "prompt_tokens": 1500,
+        "cached_tokens": 1024,
+        "completion_tokens": 40,
+    }
+    assert mock_client.chat.completions.create.call_args.kwargs["messages"] == [
+        {"role": "user", "content": "Hi"}
+    ]
+
+@pytest.mark.asyncio
+async def test_generate_response_retries_transient_errors():
+    mock_client = AsyncMock()
+    mock_client.chat.completions.create.side_effect = [
+        openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com")),
+        make_response("ok"),
+    ]
+
+    client = OpenAIClient(max_attempts=3, retry_backoff=0.001)
+    client.client = mock_client
+
+    assert await client.generate_response([{"role": "user", "content": "Hi"}]) == "ok"
+    assert mock_client.chat.completions.create.await_count == 2
+
+@pytest.mark.asyncio
+async def test_generate_response_stops_at_the_deadline():
+    async def hang(**kwargs):
+        await asyncio.sleep(10)
+
+    mock_client = AsyncMock()
+    mock_client.chat.completions.create.side_effect = hang
+
+    client = OpenAIClient(request_timeout=5, max_attempts=3)
+    client.client = mock_client
+
+    with pytest.raises(DeadlineExceeded):
+        await client.generate_response(
+            [{"role": "user", "content": "Hi"}], deadline=Deadline(0.05)
+        )
+    assert mock_client.chat.completions.create.await_count == 1
+
+@pytest.mark.asyncio
+async def test_hedged_request_returns_first_answer():
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+            return make_response("slow")
+        return make_response("fast")
+
+    mock_client = AsyncMock()
+    mock_client.chat.completions.create.side_effect = create
+
+    client = OpenAIClient(hedge=True, hedge_after=0.01)
+    client.client = mock_client
+
+    result = await client.generate_response([{"role": "user", "content": "Hi"}])
+
+    assert result == "fast"
+    assert len(calls) == 2
+    assert client.hedged_requests == 1
+
 @pytest.mark.asyncio
 async def test_interpret_returns_default_intent():
     client = OpenAIClient()
@@ -0,0 +1,141 @@
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.services.llm.base import LLMBase
+from app.services.llm.openai_client import OpenAIClient
+from app.services.llm.router import CLOSED, OPEN, Backend, LLMRouter, NoBackendAvailable
+from benchmarks.fake_llm_server import create_app
+
+
+class StubLLM(LLMBase):
+    def __init__(self, reply="ok", fail=False):
+        self.reply = reply
+        self.fail = fail
+        self.calls = 0
+
+    async def interpret(self, user_input):
+        return {"intent": "default", "message": user_input}
+
+    async def generate_response(self, messages, deadline=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("backend down")
+        return self.reply
+
+
+def fake_backend_client(**server_options):
+    """OpenAIClient talking to an in-process fake OpenAI-compatible server."""
+    client = OpenAIClient(model="fake-model", max_attempts=1)
+    client.client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake-llm/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=create_app(seed=1, **server_options))
+        ),
+    )
+    return client
+
+
+@pytest.mark.asyncio
+async def test_routes_to_fastest_weighted_backend():
+    slow, fast = StubLLM("slow"), StubLLM("fast")
+    router = LLMRouter([Backend("slow", slow), Backend("fast", fast)])
+    router.backends[0].latency = 2.0
+    router.backends[1].latency = 0.5
+
+    assert await router.generate_response([]) == "fast"
+
+    # a heavier weight can outrank raw speed
+    router.backends[0].weight = 10
+    assert await router.generate_response([]) == "slow"
+
+
+@pytest.mark.asyncio
+async def test_fails_over_and_opens_circuit_after_repeated_errors():
+    broken, healthy = StubLLM(fail=True), StubLLM("healthy")
+    router = LLMRouter(
+        [Backend("broken", broken), Backend("healthy", healthy)],
+        failure_threshold=2,
+        cooldown=60,
+    )
+    router.backends[1].latency = 1.0
+
+    for _ in range(3):
+        assert await router.generate_response([]) == "healthy"
+
+    assert router.backends[0].state == OPEN
+    # the open circuit keeps traffic away from the broken backend
+    assert broken.calls == 2
+    assert router.backends[0].error_rate > 0
+
+
+@pytest.mark.asyncio
+async def test_half_open_circuit_closes_after_successful_trial():
+    flaky = StubLLM("recovered", fail=True)
+    router = LLMRouter([Backend("flaky", flaky)], failure_threshold=1, cooldown=0)
+
+    with pytest.raises(NoBackendAvailable):
+        await router.generate_response([])
+    assert router.backends[0].state == OPEN
+
+    flaky.fail = False
+    assert await router.generate_response([]) == "recovered"
+    assert router.backends[0].state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_circuits_report_no_backend_available():
+    broken = StubLLM(fail=True)
+    router = LLMRouter([Backend("broken", broken)], failure_threshold=1, cooldown=60)
+
+    with pytest.raises(NoBackendAvailable):
+        await router.generate_response([])
+    with pytest.raises(NoBackendAvailable):
+        await router.generate_response([])
+    assert broken.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_every_backend_failing_reports_no_backend_available():
+    first, second = StubLLM(fail=True), StubLLM(fail=True)
+    router = LLMRouter([Backend("first", first), Backend("second", second)])
+
+    with pytest.raises(NoBackendAvailable) as raised:
+        await router.generate_response([])
+
+    assert isinstance(raised.value.__cause__, RuntimeError)
+    assert first.calls == second.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_routes_against_fake_openai_compatible_servers():
+    router = LLMRouter(
+        [
+            Backend("failing", fake_backend_client(error_rate=1.0)),
+            Backend("working", fake_backend_client(latency_ms=5)),
+        ],
+        failure_threshold=1,
+        cooldown=60,
+    )
+
+    reply = await router.generate_response([{"role": "user", "content": "hola"}])
+
+    assert reply
+    stats = {backend["name"]: backend for backend in router.stats()}
+    assert stats["failing"]["state"] == OPEN
+    assert stats["working"]["state"] == CLOSED
+    assert stats["working"]["latency_ms"] > 0
+
+
+def test_from_env_builds_single_attempt_backends(monkeypatch):
+    monkeypatch.setenv(
+        "LLM_BACKENDS",
+        '[{"name": "a", "model": "m1"}, {"name": "b", "model": "m2", "max_attempts": 2}]',
+    )
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+    router = LLMRouter.from_env()
+
+    assert [backend.llm.max_attempts for backend in router.backends] == [1, 2]
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from app.services.llm.base import LLMBase
+from app.services.llm.scheduler import BACKGROUND, LLMScheduler
+
+
+class GatedLLM(LLMBase):
+    """Fake client whose completions finish only when released by the test."""
+
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+
+    async def interpret(self, user_input):
+        return {"intent": "default", "message": user_input}
+
+    async def generate_response(self, messages, deadline=None):
+        name = messages[0]
+        self.started.append(name)
+        self.gates[name] = asyncio.Event()
+        await self.gates[name].wait()
+        return name
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_caps_calls_in_flight():
+    llm = GatedLLM()
+    scheduler = LLMScheduler(llm, max_concurrency=2)
+
+    tasks = [asyncio.create_task(scheduler.generate_response([f"t{i}"])) for i in range(3)]
+    await settle()
+
+    assert llm.started == ["t0", "t1"]
+    assert scheduler.stats()["lanes"]["interactive"]["waiting"] == 1
+
+    llm.gates["t0"].set()
+    await settle()
+    assert llm.started == ["t0", "t1", "t2"]
+
+    for name in ("t1", "t2"):
+        llm.gates[name].set()
+    assert await asyncio.gather(*tasks) == ["t0", "t1", "t2"]
+    stats = scheduler.stats()["lanes"]["interactive"]
+    assert stats["completed"] == 3 and stats["running"] == 0
+    assert stats["queue_ms"]["max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_preempt_waiting_background_work():
+    llm = GatedLLM()
+    scheduler = LLMScheduler(llm, max_concurrency=1, background_limit=1)
+    background = scheduler.for_lane(BACKGROUND)
+
+    first = asyncio.create_task(background.generate_response(["b0"]))
+    await settle()
+    queued_background = asyncio.create_task(background.generate_response(["b1"]))
+    await settle()
+    interactive = asyncio.create_task(scheduler.generate_response(["turn"]))
+    await settle()
+
+    llm.gates["b0"].set()
+    await settle()
+
+    # the debate turn queued after b1 still gets the freed slot first
+    assert llm.started == ["b0", "turn"]
+
+    llm.gates["turn"].set()
+    await settle()
+    llm.gates["b1"].set()
+    await asyncio.gather(first, queued_background, interactive)
+
+
+@pytest.mark.asyncio
+async def test_background_work_keeps_slots_free_for_turns():
+    llm = GatedLLM()
+    scheduler = LLMScheduler(llm, max_concurrency=3, background_limit=1)
+    background = scheduler.for_lane(BACKGROUND)
+
+    tasks = [asyncio.create_task(background.generate_response([f"b{i}"])) for i in range(2)]
+    await settle()
+    tasks.append(asyncio.create_task(scheduler.generate_response(["turn"])))
+    await settle()
+
+    assert llm.started == ["b0", "turn"]
+
+    for name in ("b0", "turn"):
+        llm.gates[name].set()
+    await settle()
+    llm.gates["b1"].set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    llm = GatedLLM()
+    scheduler = LLMScheduler(llm, max_concurrency=1)
+
+    running = asyncio.create_task(scheduler.generate_response(["t0"]))
+    await settle()
+    waiting = asyncio.create_task(scheduler.generate_response(["t1"]))
+    await settle()
+    waiting.cancel()
+    await settle()
+
+    llm.gates["t0"].set()
+    await running
+    assert scheduler.stats()["lanes"]["interactive"]["waiting"] == 0
+
+    follow_up = asyncio.create_task(scheduler.generate_response(["t2"]))
+    await settle()
+    llm.gates["t2"].set()
+    assert await follow_up == "t2"
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from app.services.memory.local_cache import CacheInvalidationListener, LocalCache
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LocalCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = LocalCache(max_entries=10, ttl=5)
+    with patch("app.services.memory.local_cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("app.services.memory.local_cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == 1
+    with patch("app.services.memory.local_cache.time.monotonic", return_value=106.0):
+        assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_zero_size_disables_cache():
+    cache = LocalCache(max_entries=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_listener_invalidates_announced_keys():
+    cache = LocalCache(max_entries=10)
+    cache.set("conv-1", "meta")
+    listener = CacheInvalidationListener(cache)
+
+    listener.handle(b"conv-1")
+    listener.handle("unknown")
+
+    assert cache.get("conv-1") is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.domain.context import ConversationContext
+from app.domain.meta import MetaModel
+from app.models.models import RoleEnum
+from app.services.memory.read_through_memory import ReadThroughMemory
+
+
+def make_memory(context):
+    memory = AsyncMock()
+    memory.max_messages = 10
+    memory.retrieve_context.return_value = context
+    return memory
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_storage():
+    cached = ConversationContext(
+        meta=MetaModel(topic="T", stance="S"),
+        history=[{"role": "user", "content": "hola"}],
+    )
+    memory = make_memory(cached)
+    store = AsyncMock()
+
+    context = await ReadThroughMemory(memory, store).retrieve_context("conv-1", last_n=5)
+
+    assert context == cached
+    store.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_rehydrates_from_storage():
+    memory = make_memory(ConversationContext())
+    store = AsyncMock()
+    store.get.side_effect = [
+        [{"id": "conv-1", "topic": "T", "stance": "S"}],
+        [
+            {"id": 1, "role": RoleEnum.user, "content": "m1"},
+            {"id": 2, "role": RoleEnum.assistant, "content": "m2"},
+        ],
+        [{"summary": "resumen", "version": 1, "last_message_id": 1}],
+    ]
+
+    context = await ReadThroughMemory(memory, store).retrieve_context("conv-1", last_n=1)
+
+    assert context.meta == MetaModel(topic="T", stance="S")
+    assert context.history == [{"role": "assistant", "content": "m2"}]
+    assert context.summary == "resumen"
+    assert context.summary_cutoff == {"role": "user", "content": "m1"}
+    store.get.assert_any_await({"conversation_id": "conv-1", "limit": 10, "latest": True})
+    memory.rehydrate.assert_awaited_once_with(
+        "conv-1",
+        {"topic": "T", "stance": "S"},
+        [{"role": "user", "content": "m1"}, {"role": "assistant", "content": "m2"}],
+        summary="resumen",
+        summary_cutoff={"role": "user", "content": "m1"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_unknown_conversation_returns_cached_context():
+    memory = make_memory(ConversationContext())
+    store = AsyncMock()
+    store.get.return_value = []
+
+    context = await ReadThroughMemory(memory, store).retrieve_context("missing")
+
+    assert context == ConversationContext()
+    memory.rehydrate.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_a_single_load():
+    memory = make_memory(ConversationContext())
+    release = asyncio.Event()
+
+    async def slow_get(filters):
+        await release.wait()
+        if "id" in filters:
+            return [{"id": "conv-1", "topic": "T", "stance": "S"}]
+        return []
+
+    store = MagicMock()
+    store.get = AsyncMock(side_effect=slow_get)
+    read_through = ReadThroughMemory(memory, store)
+
+    tasks = [
+        asyncio.create_task(read_through.retrieve_context("conv-1")) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert all(r.meta.topic == "T" for r in results)
+    assert store.get.await_count == 3
+    memory.rehydrate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_new_conversation_without_history_skips_storage():
+    cached = ConversationContext(meta=MetaModel(topic="T", stance="S"))
+    memory = make_memory(cached)
+    store = AsyncMock()
+    read_through = ReadThroughMemory(memory, store)
+
+    await read_through.store_meta("conv-1", {"topic": "T", "stance": "S"})
+    context = await read_through.retrieve_context("conv-1", last_n=5)
+
+    assert context == cached
+    store.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_evicted_history_with_cached_meta_rehydrates():
+    memory = make_memory(ConversationContext(meta=MetaModel(topic="T", stance="S")))
+    store = AsyncMock()
+    store.get.side_effect = [
+        [{"id": "conv-1", "topic": "T", "stance": "S"}],
+        [{"role": RoleEnum.user, "content": "m1"}],
+        [],
+    ]
+    read_through = ReadThroughMemory(memory, store)
+
+    await read_through.store_meta("conv-1", {"topic": "T", "stance": "S"})
+    await read_through.store_in_memory("conv-1", [{"role": "user", "content": "m1"}])
+    context = await read_through.retrieve_context("conv-1")
+
+    assert context.history == [{"role": "user", "content": "m1"}]
+    memory.rehydrate.assert_awaited_once()
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from app.domain.context import ConversationContext
+from app.domain.meta import MetaModel
+from app.models.models import RoleEnum
+from app.services.memory.summary_memory import SummaryMemory
+
+
+def make_messages(first_id, count):
+    return [
+        {"id": i, "role": RoleEnum.user if i % 2 else RoleEnum.assistant, "content": f"m{i}"}
+        for i in range(first_id, first_id + count)
+    ]
+
+
+def make_summary_memory(store, llm=None, cache=None):
+    return SummaryMemory(
+        llm=llm or AsyncMock(),
+        store=store,
+        cache=cache or AsyncMock(),
+        trigger_messages=6,
+        keep_recent=2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_compact_skips_below_threshold():
+    store = AsyncMock()
+    store.get.side_effect = [[], make_messages(1, 6)]
+    llm = AsyncMock()
+
+    assert not await make_summary_memory(store, llm).compact("conv-1")
+
+    llm.generate_response.assert_not_awaited()
+    store.save.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_compact_folds_older_messages_into_first_version():
+    store = AsyncMock()
+    store.get.side_effect = [[], make_messages(1, 8)]
+    llm = AsyncMock()
+    llm.generate_response.return_value = "resumen v1"
+    cache = AsyncMock()
+
+    assert await make_summary_memory(store, llm, cache).compact("conv-1")
+
+    store.get.assert_any_await({"conversation_id": "conv-1", "after_id": None, "limit": 200})
+    prompt = llm.generate_response.call_args.args[0][0].content
+    assert "user: m1" in prompt and "assistant: m6" in prompt
+    assert "m7" not in prompt  # newest messages stay out of the summary
+    saved = store.save.call_args.args[0]
+    assert saved["version"] == 1
+    assert saved["first_message_id"] == 1
+    assert saved["last_message_id"] == 6
+    assert saved["summary"] == "resumen v1"
+    cache.store_summary.assert_awaited_once_with(
+        "conv-1", "resumen v1", cutoff={"role": "assistant", "content": "m6"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_compact_merges_into_previous_version():
+    previous = {
+        "summary": "resumen v1",
+        "version": 1,
+        "first_message_id": 1,
+        "last_message_id": 6,
+    }
+    store = AsyncMock()
+    store.get.side_effect = [[previous], make_messages(7, 10)]
+    llm = AsyncMock()
+    llm.generate_response.return_value = "resumen v2"
+
+    assert await make_summary_memory(store, llm).compact("conv-1")
+
+    store.get.assert_any_await({"conversation_id": "conv-1", "after_id": 6, "limit": 200})
+    assert "resumen v1" in llm.generate_response.call_args.args[0][0].content
+    saved = store.save.call_args.args[0]
+    assert saved["version"] == 2
+    assert saved["first_message_id"] == 1
+    assert saved["last_message_id"] == 14
+
+
+@pytest.mark.asyncio
+async def test_retrieve_from_memory_returns_latest_summary_text():
+    store = AsyncMock()
+    store.get.return_value = [{"summary": "resumen", "version": 3}]
+
+    assert await make_summary_memory(store).retrieve_from_memory("conv-1") == "resumen"
+    store.get.assert_awaited_once_with({"summary_for": "conv-1"})
+
+
+@pytest.mark.asyncio
+async def test_retrieve_context_reads_uncached_summary_from_storage():
+    store = AsyncMock()
+    store.get.return_value = [{"summary": "resumen", "version": 1}]
+    cache = AsyncMock()
+    cache.retrieve_context.return_value = ConversationContext(
+        meta=MetaModel(topic="T", stance="S"), history=[{"role": "user", "content": "m1"}]
+    )
+
+    context = await make_summary_memory(store, cache=cache).retrieve_context("conv-1", last_n=4)
+
+    cache.retrieve_context.assert_awaited_once_with("conv-1", last_n=4)
+    store.get.assert_awaited_once_with({"summary_for": "conv-1"})
+    assert context.summary == "resumen"
+    assert context.history == [{"role": "user", "content": "m1"}]
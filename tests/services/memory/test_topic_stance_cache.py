@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.domain.meta import MetaModel
+from app.services.memory.topic_stance_cache import (
+    STATS_KEY,
+    TopicStanceCache,
+    opener_key,
+)
+
+
+def test_opener_key_folds_case_and_whitespace():
+    assert opener_key("Debatamos sobre  IA,\ntú estás EN CONTRA ") == opener_key(
+        "debatamos sobre ia, tú estás en contra"
+    )
+    assert opener_key("Debatamos sobre IA") != opener_key("Debatamos sobre clima")
+
+
+@pytest.mark.asyncio
+async def test_get_returns_cached_meta_and_counts_hit():
+    cache = TopicStanceCache(ttl=60)
+    cache.storage = AsyncMock()
+    cache.storage.get.return_value = {"topic": "IA", "stance": "En contra"}
+
+    meta = await cache.get("Debatamos sobre IA")
+    await asyncio.gather(*cache._counting)
+
+    assert meta == MetaModel(topic="IA", stance="En contra")
+    cache.storage.get.assert_awaited_once_with(opener_key("Debatamos sobre IA"))
+    cache.storage.increment.assert_awaited_once_with(STATS_KEY, "hits")
+
+
+@pytest.mark.asyncio
+async def test_get_counts_miss_and_set_stores_with_ttl():
+    cache = TopicStanceCache(ttl=60)
+    cache.storage = AsyncMock()
+    cache.storage.get.return_value = None
+
+    assert await cache.get("Debatamos sobre IA") is None
+    await asyncio.gather(*cache._counting)
+    await cache.set("Debatamos sobre IA", MetaModel(topic="IA", stance="En contra"))
+
+    cache.storage.increment.assert_awaited_once_with(STATS_KEY, "misses")
+    cache.storage.set.assert_awaited_once_with(
+        opener_key("Debatamos sobre IA"), {"topic": "IA", "stance": "En contra"}, ttl=60
+    )
+
+
+@pytest.mark.asyncio
+async def test_stats_reports_hit_rate():
+    cache = TopicStanceCache()
+    cache.storage = AsyncMock()
+    cache.storage.get_counters.return_value = {"hits": 3, "misses": 1}
+
+    assert await cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75}
+
+
+@pytest.mark.asyncio
+async def test_get_does_not_wait_for_the_counter():
+    cache = TopicStanceCache()
+    cache.storage = AsyncMock()
+    cache.storage.get.return_value = {"topic": "IA", "stance": "En contra"}
+    release = asyncio.Event()
+
+    async def slow_increment(key, field):
+        await release.wait()
+        raise ConnectionError("redis down")
+
+    cache.storage.increment.side_effect = slow_increment
+
+    assert await cache.get("Debatamos sobre IA") == MetaModel(topic="IA", stance="En contra")
+    assert len(cache._counting) == 1
+
+    release.set()
+    await asyncio.gather(*cache._counting)
+    assert not cache._counting
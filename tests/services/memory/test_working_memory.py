@@ -4,21 +4,79 @@ from app.services.memory.working_memory import WorkingMemory
 
 
 @pytest.mark.asyncio
-async def test_store_in_memory_appends_to_existing_list():
+async def test_store_in_memory_appends_single_item():
+    memory = WorkingMemory(
+        max_messages=10,
+        max_bytes=2048,
+        history_ttl=600,
+        sliding_expiry=True,
+        compact_history=False,
+    )
+    memory.storage = AsyncMock()
+    await memory.store_in_memory("test_key", {"role": "user", "content": "hola"})
+    memory.storage.append_to_list.assert_awaited_with(
+        "test_key",
+        [{"role": "user", "content": "hola"}],
+        max_length=10,
+        max_bytes=2048,
+        ttl=600,
+        sliding=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_store_in_memory_compacts_messages():
+    memory = WorkingMemory(max_messages=10, max_bytes=0, history_ttl=0)
+    memory.storage = AsyncMock()
+    await memory.store_in_memory(
+        "test_key",
+        [
+            {"role": "user", "content": "hola: ¿qué tal?"},
+            {"role": "assistant", "content": "bien\ny tú"},
+            {"role": "user", "content": "x", "id": 3},
+        ],
+    )
+    memory.storage.append_to_list.assert_awaited_with(
+        "test_key",
+        ["u:hola: ¿qué tal?", "a:bien\ny tú", {"role": "user", "content": "x", "id": 3}],
+        max_length=10,
+        max_bytes=0,
+        ttl=0,
+        sliding=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_retrieve_expands_compact_and_legacy_history():
     memory = WorkingMemory()
     memory.storage = AsyncMock()
-    memory.storage.get.return_value = ["existing"]
-    await memory.store_in_memory("test_key", ["new_item"])
-    memory.storage.set.assert_awaited_with("test_key", ["existing", "new_item"])
+    memory.storage.get_list.return_value = [
+        {"role": "system", "content": "Debatamos"},
+        "a:bien\ny tú",
+    ]
+    expected = [
+        {"role": "system", "content": "Debatamos"},
+        {"role": "assistant", "content": "bien\ny tú"},
+    ]
+    assert await memory.retrieve_from_memory("conv-1") == expected
+
+    memory.storage.read_many.return_value = {
+        "conv-1:meta": None,
+        "conv-1:summary": None,
+        "conv-1": memory.storage.get_list.return_value,
+    }
+    context = await memory.retrieve_context("conv-1")
+    assert context.history == expected
 
 
 @pytest.mark.asyncio
 async def test_store_in_memory_appends_list():
-    memory = WorkingMemory()
+    memory = WorkingMemory(max_messages=4, max_bytes=0, history_ttl=0)
     memory.storage = AsyncMock()
-    memory.storage.get.return_value = ["existing"]
     await memory.store_in_memory("test_key", ["new1", "new2"])
-    memory.storage.set.assert_awaited_with("test_key", ["existing", "new1", "new2"])
+    memory.storage.append_to_list.assert_awaited_with(
+        "test_key", ["new1", "new2"], max_length=4, max_bytes=0, ttl=0, sliding=True
+    )
 
 
 @pytest.mark.asyncio
@@ -29,32 +87,168 @@ async def test_store_in_memory_raises_error_on_string():
 
 
 @pytest.mark.asyncio
-async def test_retrieve_from_memory_returns_deserialized_json():
+async def test_retrieve_from_memory_reads_whole_window():
     memory = WorkingMemory()
     memory.storage = AsyncMock()
-    memory.storage.get.return_value = '{"a": 1}'
+    memory.storage.get_list.return_value = [1, 2, 3]
     result = await memory.retrieve_from_memory("test_key")
-    assert result == {"a": 1}
+    assert result == [1, 2, 3]
+    memory.storage.get_list.assert_awaited_with("test_key", 0, -1)
 
 
 @pytest.mark.asyncio
-async def test_retrieve_from_memory_returns_list_directly():
+async def test_retrieve_from_memory_reads_last_n():
     memory = WorkingMemory()
     memory.storage = AsyncMock()
-    memory.storage.get.return_value = [1, 2, 3]
-    result = await memory.retrieve_from_memory("test_key")
-    assert result == [1, 2, 3]
+    memory.storage.get_list.return_value = [2, 3]
+    result = await memory.retrieve_from_memory("test_key", last_n=2)
+    assert result == [2, 3]
+    memory.storage.get_list.assert_awaited_with("test_key", -2, -1)
 
 
 @pytest.mark.asyncio
 async def test_retrieve_from_memory_returns_none():
     memory = WorkingMemory()
     memory.storage = AsyncMock()
-    memory.storage.get.return_value = None
+    memory.storage.get_list.return_value = []
     result = await memory.retrieve_from_memory("test_key")
     assert result is None
 
 
+@pytest.mark.asyncio
+async def test_store_and_retrieve_meta_use_meta_key():
+    memory = WorkingMemory(meta_ttl=300)
+    memory.storage = AsyncMock()
+    memory.storage.get.return_value = {"topic": "T", "stance": "S"}
+    await memory.store_meta("conv-1", {"topic": "T", "stance": "S"})
+    memory.storage.set.assert_awaited_with(
+        "conv-1:meta", {"topic": "T", "stance": "S"}, ttl=300
+    )
+    # served from the local tier right after being stored
+    assert await memory.retrieve_meta("conv-1") == {"topic": "T", "stance": "S"}
+    memory.storage.get.assert_not_awaited()
+
+    other_process = WorkingMemory()
+    other_process.storage = memory.storage
+    assert await other_process.retrieve_meta("conv-1") == {"topic": "T", "stance": "S"}
+    memory.storage.get.assert_awaited_with("conv-1:meta")
+
+
+@pytest.mark.asyncio
+async def test_retrieve_context_reads_meta_from_redis_only_once():
+    memory = WorkingMemory(sliding_expiry=False)
+    memory.storage = AsyncMock()
+    memory.storage.read_many.return_value = {
+        "conv-1:meta": {"topic": "T", "stance": "S"},
+        "conv-1:summary": None,
+        "conv-1": [],
+    }
+
+    await memory.retrieve_context("conv-1")
+    context = await memory.retrieve_context("conv-1")
+
+    assert memory.storage.read_many.call_args.kwargs["keys"] == ["conv-1:summary"]
+    assert context.meta.topic == "T"
+    assert memory.local_meta.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_meta_writes_and_deletes_announce_invalidations():
+    memory = WorkingMemory(publish_invalidations=True)
+    memory.storage = AsyncMock()
+
+    await memory.store_meta("conv-1", {"topic": "T", "stance": "S"})
+    await memory.delete_from_memory("conv-1:meta")
+
+    assert memory.storage.publish.await_count == 2
+    memory.storage.publish.assert_awaited_with("memory:invalidate", "conv-1")
+    assert memory.local_meta.get("conv-1") is None
+
+
+@pytest.mark.asyncio
+async def test_retrieve_context_batches_meta_and_history():
+    memory = WorkingMemory(history_ttl=600, meta_ttl=900, sliding_expiry=True)
+    memory.storage = AsyncMock()
+    memory.storage.read_many.return_value = {
+        "conv-1:meta": {"topic": "T", "stance": "S"},
+        "conv-1:summary": "resumen",
+        "conv-1": [{"role": "user", "content": "hola"}],
+    }
+    context = await memory.retrieve_context("conv-1", last_n=4)
+    # sliding expiry is refreshed in the same round trip
+    memory.storage.read_many.assert_awaited_once_with(
+        keys=["conv-1:meta", "conv-1:summary"],
+        lists={"conv-1": (-4, -1)},
+        touch={"conv-1:meta": 900, "conv-1:summary": 900, "conv-1": 600},
+    )
+    assert context.meta.topic == "T"
+    assert context.summary == "resumen"
+    assert context.history == [{"role": "user", "content": "hola"}]
+
+
+@pytest.mark.asyncio
+async def test_summary_is_cached_with_its_cutoff():
+    memory = WorkingMemory(meta_ttl=900)
+    memory.storage = AsyncMock()
+    cutoff = {"role": "assistant", "content": "m6"}
+
+    await memory.store_summary("conv-1", "resumen", cutoff=cutoff)
+    memory.storage.set.assert_awaited_once_with(
+        "conv-1:summary", {"summary": "resumen", "cutoff": cutoff}, ttl=900
+    )
+
+    memory.storage.read_many.return_value = {
+        "conv-1:meta": None,
+        "conv-1:summary": {"summary": "resumen", "cutoff": cutoff},
+        "conv-1": [],
+    }
+    context = await memory.retrieve_context("conv-1")
+    assert context.summary == "resumen"
+    assert context.summary_cutoff == cutoff
+
+
+@pytest.mark.asyncio
+async def test_retrieve_context_without_meta():
+    memory = WorkingMemory(sliding_expiry=False)
+    memory.storage = AsyncMock()
+    memory.storage.read_many.return_value = {
+        "conv-1:meta": None,
+        "conv-1:summary": None,
+        "conv-1": [],
+    }
+    context = await memory.retrieve_context("conv-1")
+    assert memory.storage.read_many.call_args.kwargs["touch"] == {}
+    assert context.meta is None
+    assert context.history == []
+
+
+@pytest.mark.asyncio
+async def test_rehydrate_writes_only_under_lock_and_into_empty_list():
+    memory = WorkingMemory(max_messages=10, max_bytes=0, history_ttl=0)
+    memory.storage = AsyncMock()
+    memory.storage.set.return_value = True
+    memory.storage.get_list.return_value = []
+    history = [{"role": "user", "content": "hola"}]
+
+    assert await memory.rehydrate("conv-1", {"topic": "T", "stance": "S"}, history)
+
+    memory.storage.set.assert_any_await("conv-1:rehydrate", 1, ttl=10, nx=True)
+    memory.storage.append_to_list.assert_awaited_once_with(
+        "conv-1", ["u:hola"], max_length=10, max_bytes=0, ttl=0, sliding=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_rehydrate_skips_when_lock_is_held():
+    memory = WorkingMemory()
+    memory.storage = AsyncMock()
+    memory.storage.set.return_value = False
+
+    assert not await memory.rehydrate("conv-1", {"topic": "T", "stance": "S"}, [])
+
+    memory.storage.append_to_list.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_delete_from_memory():
     memory = WorkingMemory()
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.llm.llm_io import LLMConversationMessage
+from app.services.persistence.write_behind import PersistenceWorker, TurnQueue
+
+
+def make_entry(entry_id, conversation_id="conv-1"):
+    payload = {
+        "conversation_id": conversation_id,
+        "created_at": "2025-01-01T10:00:00",
+        "messages": [{"role": "user", "content": "hola"}],
+    }
+    return entry_id, {"payload": json.dumps(payload)}
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    redis = AsyncMock()
+    redis.xautoclaim.return_value = ["0-0", [], []]
+    mocker.patch(
+        "app.services.persistence.write_behind.get_redis_client", return_value=redis
+    )
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_enqueue_adds_turn_to_stream(mock_redis):
+    queue = TurnQueue(stream="turns")
+    messages = [
+        LLMConversationMessage(role="user", content="hola"),
+        LLMConversationMessage(role="assistant", content="respuesta"),
+    ]
+
+    await queue.enqueue("conv-1", messages)
+
+    stream, fields = mock_redis.xadd.call_args.args
+    payload = json.loads(fields["payload"])
+    assert stream == "turns"
+    assert payload["conversation_id"] == "conv-1"
+    assert payload["messages"][1] == {"role": "assistant", "content": "respuesta"}
+
+
+@pytest.mark.asyncio
+async def test_run_once_saves_batch_and_acks(mock_redis):
+    mock_redis.xreadgroup.return_value = [
+        ["turns", [make_entry("1-0"), make_entry("2-0", "conv-2")]]
+    ]
+    store = AsyncMock()
+    worker = PersistenceWorker(store, stream="turns", group="g", consumer="c")
+
+    handled = await worker.run_once()
+
+    assert handled == 2
+    store.save_many.assert_awaited_once()
+    turns = store.save_many.call_args.args[0]
+    assert [t["conversation_id"] for t in turns] == ["conv-1", "conv-2"]
+    mock_redis.xack.assert_awaited_once_with("turns", "g", "1-0", "2-0")
+
+
+@pytest.mark.asyncio
+async def test_failing_entry_is_dead_lettered_after_max_deliveries(mock_redis):
+    mock_redis.xreadgroup.return_value = [
+        ["turns", [make_entry("1-0"), make_entry("2-0", "bad")]]
+    ]
+    mock_redis.xpending_range.return_value = [{"times_delivered": 3}]
+
+    async def save_many(turns):
+        if any(t["conversation_id"] == "bad" for t in turns):
+            raise RuntimeError("insert failed")
+
+    store = AsyncMock()
+    store.save_many.side_effect = save_many
+    worker = PersistenceWorker(
+        store, stream="turns", dead_letter_stream="dead", group="g", consumer="c",
+        max_deliveries=3,
+    )
+
+    handled = await worker.run_once()
+
+    assert handled == 2
+    dead_stream, dead_fields = mock_redis.xadd.call_args.args
+    assert dead_stream == "dead"
+    assert dead_fields["source_id"] == "2-0"
+    acked = [call.args[2] for call in mock_redis.xack.await_args_list]
+    assert acked == ["1-0", "2-0"]
+
+
+@pytest.mark.asyncio
+async def test_failing_entry_stays_pending_below_max_deliveries(mock_redis):
+    mock_redis.xreadgroup.return_value = [["turns", [make_entry("1-0")]]]
+    mock_redis.xpending_range.return_value = [{"times_delivered": 1}]
+    store = AsyncMock()
+    store.save_many.side_effect = RuntimeError("db down")
+    worker = PersistenceWorker(store, stream="turns", group="g", consumer="c")
+
+    handled = await worker.run_once()
+
+    assert handled == 0
+    mock_redis.xack.assert_not_awaited()
+    mock_redis.xadd.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_on_persisted_hook_receives_batch_conversations(mock_redis):
+    mock_redis.xreadgroup.return_value = [
+        ["turns", [make_entry("1-0"), make_entry("2-0", "conv-2")]]
+    ]
+    hook = AsyncMock()
+    worker = PersistenceWorker(
+        AsyncMock(), stream="turns", group="g", consumer="c", on_persisted=hook
+    )
+
+    await worker.run_once()
+
+    hook.assert_awaited_once_with(["conv-1", "conv-2"])
+
+
+@pytest.mark.asyncio
+async def test_enqueue_tags_turn_with_an_id(mock_redis):
+    await TurnQueue(stream="turns").enqueue(
+        "conv-1", [LLMConversationMessage(role="user", content="hola")]
+    )
+    payload = json.loads(mock_redis.xadd.call_args.args[1]["payload"])
+    assert len(payload["turn_id"]) == 32
+
+
+@pytest.mark.asyncio
+async def test_run_survives_failed_batches_and_backs_off(mock_redis, mocker):
+    stop = asyncio.Event()
+    calls = []
+
+    async def run_once():
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise ConnectionError("redis blip")
+        stop.set()
+        return 0
+
+    worker = PersistenceWorker(
+        AsyncMock(), stream="turns", group="g", consumer="c",
+        retry_backoff=0.01, max_retry_backoff=0.015,
+    )
+    worker.run_once = run_once
+    waits = []
+    real_wait_for = asyncio.wait_for
+
+    async def wait_for(awaitable, timeout):
+        waits.append(timeout)
+        return await real_wait_for(awaitable, timeout)
+
+    mocker.patch("app.services.persistence.write_behind.asyncio.wait_for", wait_for)
+
+    await worker.run(stop)
+
+    assert len(calls) == 3
+    assert waits == [0.01, 0.015]
+
+
+@pytest.mark.asyncio
+async def test_acked_entries_are_deleted_from_stream(mock_redis):
+    mock_redis.xreadgroup.return_value = [
+        ["turns", [make_entry("1-0"), make_entry("2-0", "conv-2")]]
+    ]
+    worker = PersistenceWorker(AsyncMock(), stream="turns", group="g", consumer="c")
+
+    await worker.run_once()
+
+    mock_redis.xdel.assert_awaited_once_with("turns", "1-0", "2-0")
+
+
+@pytest.mark.asyncio
+async def test_dead_letter_stream_is_capped(mock_redis):
+    mock_redis.xreadgroup.return_value = [["turns", [make_entry("1-0", "bad")]]]
+    mock_redis.xpending_range.return_value = [{"times_delivered": 3}]
+    store = AsyncMock()
+    store.save_many.side_effect = ValueError("bad row")
+    worker = PersistenceWorker(
+        store, stream="turns", dead_letter_stream="dead", group="g", consumer="c",
+        max_deliveries=3, dead_letter_maxlen=50,
+    )
+
+    await worker.run_once()
+
+    assert mock_redis.xadd.call_args.kwargs == {"maxlen": 50, "approximate": True}
+    mock_redis.xdel.assert_awaited_once_with("turns", "1-0")
+
+
+@pytest.mark.asyncio
+async def test_database_outage_keeps_batch_pending(mock_redis):
+    from sqlalchemy.exc import OperationalError
+
+    mock_redis.xreadgroup.return_value = [
+        ["turns", [make_entry("1-0"), make_entry("2-0", "conv-2")]]
+    ]
+    mock_redis.xpending_range.return_value = [{"times_delivered": 5}]
+    store = AsyncMock()
+    store.save_many.side_effect = OperationalError("INSERT", {}, ConnectionError())
+    hook = AsyncMock()
+    worker = PersistenceWorker(
+        store, stream="turns", group="g", consumer="c", on_persisted=hook
+    )
+
+    with pytest.raises(OperationalError):
+        await worker.run_once()
+
+    store.save_many.assert_awaited_once()
+    mock_redis.xack.assert_not_awaited()
+    mock_redis.xadd.assert_not_awaited()
+    hook.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_on_persisted_hook_skipped_when_nothing_saved(mock_redis):
+    mock_redis.xreadgroup.return_value = [["turns", [make_entry("1-0")]]]
+    mock_redis.xpending_range.return_value = [{"times_delivered": 1}]
+    store = AsyncMock()
+    store.save_many.side_effect = ValueError("bad row")
+    hook = AsyncMock()
+    worker = PersistenceWorker(
+        store, stream="turns", group="g", consumer="c", on_persisted=hook
+    )
+
+    await worker.run_once()
+
+    hook.assert_not_awaited()
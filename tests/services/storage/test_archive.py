@@ -0,0 +1,70 @@
+import gzip
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.storage.archive import PartitionArchiver, write_ndjson, write_parquet
+
+
+async def batches(*groups):
+    for group in groups:
+        yield group
+
+
+@pytest.mark.asyncio
+async def test_write_ndjson_writes_one_gzipped_object_per_row(tmp_path):
+    path = tmp_path / "message_p2025_01.ndjson.gz"
+    rows = [
+        {"id": 1, "role": "user", "content": "hola\nmundo", "created_at": datetime(2025, 1, 2)},
+        {"id": 2, "role": "assistant", "content": "¿qué?", "created_at": datetime(2025, 1, 3)},
+    ]
+
+    assert await write_ndjson(str(path), batches(rows[:1], rows[1:])) == 2
+
+    with gzip.open(path, "rt", encoding="utf-8") as archived:
+        lines = [json.loads(line) for line in archived]
+    assert lines[0] == {**rows[0], "created_at": "2025-01-02T00:00:00"}
+    assert lines[1]["content"] == "¿qué?"
+
+
+@pytest.mark.asyncio
+async def test_write_parquet_round_trips_rows(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "message_p2025_01.parquet"
+    row = {
+        "id": 1,
+        "conversation_id": "c",
+        "role": "user",
+        "content": "hola",
+        "created_at": datetime(2025, 1, 2),
+    }
+    assert await write_parquet(str(path), batches([row])) == 1
+    assert parquet.read_table(path).to_pylist() == [row]
+
+
+@pytest.mark.asyncio
+async def test_archive_expired_detaches_and_archives_only_old_months():
+    manager = MagicMock()
+    manager.partitions = AsyncMock(
+        return_value=[
+            ("message_p2025_03", datetime(2025, 3, 1), False),
+            ("message_p2025_04", datetime(2025, 4, 1), True),
+            ("message_p2025_05", datetime(2025, 5, 1), True),
+        ]
+    )
+    manager.detach = AsyncMock()
+    archiver = PartitionArchiver(manager, directory="unused", retention_months=6)
+    archiver.archive = AsyncMock(side_effect=lambda name: {"partition": name})
+
+    results = await archiver.archive_expired(now=datetime(2025, 11, 10))
+
+    assert archiver.cutoff(datetime(2025, 11, 10)) == datetime(2025, 5, 1)
+    # a partition left detached by an interrupted run is archived again
+    assert [r["partition"] for r in results] == ["message_p2025_03", "message_p2025_04"]
+    manager.detach.assert_awaited_once_with("message_p2025_04")
+
+
+def test_archiver_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        PartitionArchiver(MagicMock(), format="csv")
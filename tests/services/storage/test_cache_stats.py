@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.storage import cache_stats
+from app.services.storage.cache_stats import memory_usage_by_namespace
+
+
+def make_redis(mocker, keys, size=10):
+    redis = MagicMock()
+    redis.info = AsyncMock(return_value={"used_memory": 100})
+
+    async def scan_iter(count):
+        for key in keys:
+            yield key
+
+    redis.scan_iter = scan_iter
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(side_effect=lambda: [size] * pipe.memory_usage.call_count)
+    redis.pipeline.return_value.__aenter__.return_value = pipe
+    mocker.patch.object(cache_stats, "get_redis_client", AsyncMock(return_value=redis))
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_groups_keys_by_namespace_and_kind(mocker):
+    make_redis(
+        mocker,
+        [
+            "memory:{conv-1}",
+            "memory:{conv-1}:meta",
+            "memory:{conv-1}:bytes",
+            "memory:conv-2:meta",
+            "memory:topic_stance:{abc}",
+            "persistence:turns",
+        ],
+    )
+
+    report = await memory_usage_by_namespace(batch_size=100)
+
+    kinds = report["namespaces"]["memory"]["kinds"]
+    assert kinds["base"] == {"keys": 1, "bytes": 10}
+    assert kinds["meta"] == {"keys": 2, "bytes": 20}
+    assert set(kinds) == {"base", "meta", "bytes", "topic_stance"}
+    assert report["namespaces"]["memory"]["keys"] == 5
+    assert report["namespaces"]["persistence"]["kinds"] == {"base": {"keys": 1, "bytes": 10}}
+
+
+@pytest.mark.asyncio
+async def test_scan_of_exactly_max_keys_is_complete(mocker):
+    make_redis(mocker, ["a:1", "a:2"])
+
+    report = await memory_usage_by_namespace(max_keys=2)
+
+    assert report["scanned_keys"] == 2
+    assert report["complete"] is True
+
+
+@pytest.mark.asyncio
+async def test_scan_cut_short_is_incomplete(mocker):
+    make_redis(mocker, ["a:1", "a:2", "a:3"])
+
+    report = await memory_usage_by_namespace(max_keys=2)
+
+    assert report["scanned_keys"] == 2
+    assert report["complete"] is False
@@ -1,16 +1,23 @@
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 import json
 
-from app.services.storage.cache_storage import CacheStorage
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import NoScriptError, ResponseError
+
+from app.services.storage.cache_storage import TRIM_TO_BYTES_SCRIPT, CacheStorage
 
 @pytest.fixture
 def cache():
-    return CacheStorage(namespace="test")
+    return CacheStorage(namespace="test", hash_tags=True)
 
 @pytest.mark.asyncio
 async def test_make_key(cache):
-    assert cache._make_key("example") == "test:example"
+    assert cache._make_key("example") == "test:{example}"
+    assert cache._make_key("conv1:meta") == "test:{conv1}:meta"
+    # keys carrying their own hash tag are only namespaced
+    assert cache._make_key("topic_stance:{abc}") == "test:topic_stance:{abc}"
+    assert CacheStorage(namespace="test", hash_tags=False)._make_key("conv1:meta") == "test:conv1:meta"
 
 @pytest.mark.asyncio
 async def test_set_and_get(cache, mocker):
@@ -30,7 +37,196 @@ async def test_delete(cache, mocker):
     mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
 
     await cache.delete("key2")
-    mock_redis.delete.assert_called_once_with("test:key2")
+    mock_redis.delete.assert_called_once_with("test:{key2}", "test:{key2}:bytes")
+
+@pytest.mark.asyncio
+async def test_delete_untagged_keys_one_by_one(mocker):
+    mock_redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+
+    await CacheStorage(namespace="test", hash_tags=False).delete("key2")
+
+    mock_redis.pipeline.assert_called_once_with(transaction=False)
+    assert [call.args for call in pipe.delete.call_args_list] == [
+        ("test:key2",), ("test:key2:bytes",)
+    ]
+
+def test_hash_tags_default_to_cluster_mode_only(monkeypatch):
+    monkeypatch.delenv("CACHE_KEY_HASH_TAGS", raising=False)
+    monkeypatch.setenv("REDIS_MODE", "standalone")
+    assert not CacheStorage(namespace="test").hash_tags
+    monkeypatch.setenv("REDIS_MODE", "cluster")
+    assert CacheStorage(namespace="test").hash_tags
+    monkeypatch.setenv("REDIS_MODE", "standalone")
+    monkeypatch.setenv("CACHE_KEY_HASH_TAGS", "true")
+    assert CacheStorage(namespace="test").hash_tags
+
+@pytest.mark.asyncio
+async def test_append_to_list_pushes_and_trims(cache, mocker):
+    mock_redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+
+    await cache.append_to_list("conv1", [{"role": "user", "content": "Hi"}], max_length=3)
+
+    pipe.rpush.assert_called_once_with(
+        "test:{conv1}", cache.codec.encode({"role": "user", "content": "Hi"})
+    )
+    pipe.ltrim.assert_called_once_with("test:{conv1}", -3, -1)
+    pipe.evalsha.assert_not_called()
+    pipe.expire.assert_not_called()
+    pipe.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_append_to_list_applies_byte_budget_and_expiry(cache, mocker):
+    mock_redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+
+    await cache.append_to_list("conv1", ["x"], max_bytes=1024, ttl=60, sliding=False)
+    await cache.append_to_list("conv1", ["y"], max_bytes=1024)
+
+    # registered once and called by SHA, with the size of the pushed entries
+    mock_redis.register_script.assert_called_once_with(TRIM_TO_BYTES_SCRIPT)
+    script = mock_redis.register_script.return_value
+    pushed = len(cache.codec.encode("x"))
+    assert pipe.evalsha.call_args_list[0].args == (
+        script.sha, 2, "test:{conv1}", "test:{conv1}:bytes", 1024, pushed
+    )
+    pipe.expire.assert_any_call("test:{conv1}", 60, nx=True)
+    pipe.expire.assert_any_call("test:{conv1}:bytes", 60, nx=True)
+
+@pytest.mark.asyncio
+async def test_append_to_list_reloads_a_flushed_trim_script(cache, mocker):
+    mock_redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(side_effect=NoScriptError("NOSCRIPT No matching script."))
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    script = AsyncMock()
+    mock_redis.register_script.return_value = script
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+
+    await cache.append_to_list("conv1", ["x"], max_bytes=1024)
+
+    pipe.rpush.assert_called_once()
+    pushed = len(cache.codec.encode("x"))
+    script.assert_awaited_once_with(
+        keys=["test:{conv1}", "test:{conv1}:bytes"], args=[1024, pushed], client=mock_redis
+    )
+
+@pytest.mark.asyncio
+async def test_append_to_list_pipelines_without_multi_on_cluster(cache, mocker):
+    mock_redis = MagicMock(spec=RedisCluster)
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+
+    await cache.append_to_list("conv1", [{"role": "user", "content": "Hi"}], max_length=3)
+
+    mock_redis.pipeline.assert_called_once_with(transaction=False)
+    pipe.ltrim.assert_called_once_with("test:{conv1}", -3, -1)
+
+@pytest.mark.asyncio
+async def test_get_list_deserializes_range(cache, mocker):
+    mock_redis = AsyncMock()
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+    mock_redis.lrange.return_value = [json.dumps({"a": 1}), json.dumps({"b": 2})]
+
+    items = await cache.get_list("conv1", -2, -1)
+
+    mock_redis.lrange.assert_awaited_once_with("test:{conv1}", -2, -1)
+    assert items == [{"a": 1}, {"b": 2}]
+
+@pytest.mark.asyncio
+async def test_read_many_uses_one_pipeline(cache, mocker):
+    mock_redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(
+        return_value=[json.dumps({"topic": "T"}), None, [json.dumps({"a": 1})], 1]
+    )
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+
+    results = await cache.read_many(
+        keys=["c:meta", "c:other"], lists={"c": (-2, -1)}, touch={"c": 30}
+    )
+
+    mock_redis.pipeline.assert_called_once_with(transaction=False)
+    pipe.expire.assert_called_once_with("test:{c}", 30)
+    pipe.execute.assert_awaited_once()
+    pipe.lrange.assert_called_once_with("test:{c}", -2, -1)
+    pipe.get.assert_any_call("test:{c}:meta")
+    assert results == {"c:meta": {"topic": "T"}, "c:other": None, "c": [{"a": 1}]}
+
+WRONGTYPE = ResponseError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+def legacy_redis(mocker, lrange_side_effect=None):
+    mock_redis = MagicMock()
+    mock_redis.get = AsyncMock(return_value=json.dumps([{"role": "user", "content": "Hi"}]))
+    mock_redis.lrange = AsyncMock(side_effect=lrange_side_effect)
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+    return mock_redis, pipe
+
+@pytest.mark.asyncio
+async def test_get_list_converts_legacy_json_value(cache, mocker):
+    mock_redis, pipe = legacy_redis(
+        mocker, lrange_side_effect=[WRONGTYPE, [cache.codec.encode({"role": "user", "content": "Hi"})]]
+    )
+
+    items = await cache.get_list("conv1")
+
+    assert items == [{"role": "user", "content": "Hi"}]
+    pipe.delete.assert_called_once_with("test:{conv1}")
+    pipe.rpush.assert_called_once_with(
+        "test:{conv1}", cache.codec.encode({"role": "user", "content": "Hi"})
+    )
+    assert mock_redis.lrange.await_count == 2
+
+@pytest.mark.asyncio
+async def test_append_to_list_retries_after_converting_legacy_value(cache, mocker):
+    mock_redis, pipe = legacy_redis(mocker)
+    pipe.execute.side_effect = [WRONGTYPE, None, None]
+
+    await cache.append_to_list("conv1", [{"role": "assistant", "content": "Hello"}])
+
+    assert pipe.execute.await_count == 3
+    pipe.delete.assert_called_once_with("test:{conv1}")
+    assert pipe.rpush.call_args_list[-1].args == (
+        "test:{conv1}", cache.codec.encode({"role": "assistant", "content": "Hello"})
+    )
+
+@pytest.mark.asyncio
+async def test_append_to_list_raises_other_errors(cache, mocker):
+    _, pipe = legacy_redis(mocker)
+    pipe.execute.side_effect = ResponseError("OOM command not allowed")
+
+    with pytest.raises(ResponseError):
+        await cache.append_to_list("conv1", [{"role": "user", "content": "Hi"}])
+    pipe.delete.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_read_many_converts_legacy_list(cache, mocker):
+    mock_redis, pipe = legacy_redis(
+        mocker, lrange_side_effect=[[cache.codec.encode({"role": "user", "content": "Hi"})]]
+    )
+    pipe.execute.side_effect = [[None, WRONGTYPE], None]
+
+    results = await cache.read_many(keys=["c:meta"], lists={"c": (0, -1)})
+
+    pipe.execute.assert_any_await(raise_on_error=False)
+    mock_redis.lrange.assert_awaited_once_with("test:{c}", 0, -1)
+    assert results == {"c:meta": None, "c": [{"role": "user", "content": "Hi"}]}
 
 @pytest.mark.asyncio
 async def test_append_interaction(cache, mocker):
@@ -45,8 +241,8 @@ async def test_append_interaction(cache, mocker):
     ]
     mock_redis.set.assert_called_once()
     args, kwargs = mock_redis.set.call_args
-    assert "test:conv1" in args[0]
-    actual = json.loads(args[1])
+    assert "test:{conv1}" in args[0]
+    actual = cache.codec.decode(args[1])
     assert expected == actual
 
 @pytest.mark.asyncio
@@ -56,4 +252,15 @@ async def test_get_raw(cache, mocker):
     mock_redis.get.return_value = b'raw_string'
 
     raw_value = await cache.get_raw("key3")
-    assert raw_value == b'raw_string'
\ No newline at end of file
+    assert raw_value == b'raw_string'
+@pytest.mark.asyncio
+async def test_values_round_trip_through_the_codec(cache, mocker):
+    mock_redis = AsyncMock()
+    mocker.patch("app.services.storage.cache_storage.get_redis_client", return_value=mock_redis)
+
+    await cache.set("key1", {"topic": "Energía", "stance": "A favor"})
+    stored = mock_redis.set.call_args.args[1]
+    mock_redis.get.return_value = stored
+
+    assert isinstance(stored, bytes) and stored[0] == 0
+    assert await cache.get("key1") == {"topic": "Energía", "stance": "A favor"}
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.services.storage import codecs
+from app.services.storage.codecs import JsonCodec, ValueCodec
+
+HISTORY = [
+    {"role": "user" if i % 2 else "assistant", "content": f"Argumento número {i}. " * 20}
+    for i in range(20)
+]
+
+
+def test_json_values_round_trip():
+    codec = ValueCodec(codec=JsonCodec())
+
+    encoded = codec.encode(HISTORY)
+
+    assert encoded[:4] == bytes((0x00, 1, codecs.JSON_ID, codecs.NO_COMPRESSION))
+    assert codec.decode(encoded) == HISTORY
+
+
+def test_legacy_values_without_header_stay_readable():
+    codec = ValueCodec()
+
+    assert codec.decode(json.dumps({"topic": "T"})) == {"topic": "T"}
+    assert codec.decode(json.dumps({"topic": "T"}).encode()) == {"topic": "T"}
+    assert codec.decode(b"plain text") == "plain text"
+    assert codec.decode(None) is None
+
+
+def test_values_are_read_whatever_codec_wrote_them():
+    written = ValueCodec(codec=JsonCodec()).encode({"a": [1, 2]})
+
+    assert ValueCodec().decode(written) == {"a": [1, 2]}
+
+
+def test_unknown_header_version_is_rejected():
+    with pytest.raises(ValueError):
+        ValueCodec().decode(bytes((0x00, 9, 1, 0)) + b"{}")
+
+
+def test_from_env_rejects_unknown_codec(monkeypatch):
+    monkeypatch.setenv("CACHE_CODEC", "xml")
+
+    with pytest.raises(ValueError):
+        ValueCodec.from_env()
+
+
+def test_msgpack_values_round_trip():
+    pytest.importorskip("msgpack")
+    codec = ValueCodec(codec=codecs.MsgpackCodec())
+
+    encoded = codec.encode(HISTORY)
+
+    assert encoded[2] == codecs.MSGPACK_ID
+    assert ValueCodec().decode(encoded) == HISTORY
+
+
+def test_large_values_are_compressed_above_threshold():
+    pytest.importorskip("zstandard")
+    codec = ValueCodec(compress=True, min_compress_bytes=256)
+
+    large = codec.encode(HISTORY)
+    small = codec.encode({"topic": "T"})
+
+    assert large[3] == codecs.ZSTD
+    assert len(large) < len(json.dumps(HISTORY).encode())
+    assert small[3] == codecs.NO_COMPRESSION
+    assert codec.decode(large) == HISTORY
@@ -0,0 +1,115 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.storage.partitions import (
+    PartitionManager,
+    add_months,
+    month_start,
+    partition_month,
+    partition_name,
+)
+
+
+def executed_sql(conn):
+    return [str(call.args[0]) for call in conn.execute.await_args_list]
+
+
+def test_month_helpers():
+    assert month_start(datetime(2025, 12, 31, 23, 59)) == datetime(2025, 12, 1)
+    assert add_months(datetime(2025, 12, 1), 1) == datetime(2026, 1, 1)
+    assert add_months(datetime(2025, 1, 1), -13) == datetime(2023, 12, 1)
+    assert partition_name(datetime(2025, 3, 1)) == "message_p2025_03"
+    assert partition_month("message_p2025_03") == datetime(2025, 3, 1)
+    assert partition_month("message_default") is None
+    assert partition_month("message_p2025_03_old") is None
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_creates_missing_months_ahead():
+    manager = PartitionManager(MagicMock(), premake=2)
+    manager.partitions = AsyncMock(
+        return_value=[("message_p2025_11", datetime(2025, 11, 1), True)]
+    )
+    conn = AsyncMock()
+    conn.execute.return_value = MagicMock(scalar=MagicMock(return_value=False))
+
+    created = await manager.ensure_partitions(conn, now=datetime(2025, 11, 15))
+
+    assert created == ["message_p2025_12", "message_p2026_01"]
+    sql = executed_sql(conn)
+    assert "PARTITION OF \"message\" DEFAULT" in sql[0]
+    assert sql[1].startswith('SELECT EXISTS (SELECT 1 FROM "message_default"')
+    assert sql[2] == (
+        'CREATE TABLE "message_p2025_12" PARTITION OF "message" '
+        "FOR VALUES FROM ('2025-12-01T00:00:00') TO ('2026-01-01T00:00:00')"
+    )
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_moves_rows_caught_by_default_partition():
+    manager = PartitionManager(MagicMock(), premake=0)
+    manager.partitions = AsyncMock(return_value=[])
+    conn = AsyncMock()
+    conn.execute.return_value = MagicMock(
+        scalar=MagicMock(return_value=True), rowcount=7
+    )
+
+    created = await manager.ensure_partitions(conn, now=datetime(2025, 11, 15))
+
+    assert created == ["message_p2025_11"]
+    sql = executed_sql(conn)[2:]
+    assert sql[0] == 'ALTER TABLE "message" DETACH PARTITION "message_default"'
+    assert sql[1].startswith('CREATE TABLE "message_p2025_11" PARTITION OF "message"')
+    assert sql[2].startswith('INSERT INTO "message_p2025_11" SELECT * FROM "message_default"')
+    assert sql[3].startswith('DELETE FROM "message_default"')
+    assert sql[4] == 'ALTER TABLE "message" ATTACH PARTITION "message_default" DEFAULT'
+
+
+@pytest.mark.asyncio
+async def test_prepare_legacy_only_renames_plain_tables():
+    manager = PartitionManager(MagicMock(), premake=0)
+    conn = AsyncMock()
+    conn.execute.return_value = MagicMock(scalar=MagicMock(return_value="p"))
+    assert not await manager.prepare_legacy(conn)
+    assert conn.execute.await_count == 1
+
+    conn = AsyncMock()
+    conn.execute.return_value = MagicMock(scalar=MagicMock(return_value="r"))
+    assert await manager.prepare_legacy(conn)
+    sql = executed_sql(conn)
+    assert 'ALTER TABLE "message" RENAME TO "message_unpartitioned"' in sql
+    assert any("RENAME CONSTRAINT \"message_pkey\"" in statement for statement in sql)
+
+
+@pytest.mark.asyncio
+async def test_migrate_legacy_unwraps_jsonb_and_verifies_row_count():
+    manager = PartitionManager(MagicMock(), premake=0)
+    manager.partitions = AsyncMock(return_value=[])
+    results = {
+        "min(created_at)": datetime(2025, 9, 20),
+        "data_type": "jsonb",
+        "count(*)": 3,
+    }
+
+    async def execute(statement, params=None):
+        sql = str(statement)
+        result = MagicMock(rowcount=3)
+        result.scalar.return_value = next(
+            (value for marker, value in results.items() if marker in sql), None
+        )
+        return result
+
+    conn = AsyncMock()
+    conn.execute.side_effect = execute
+    assert await manager.migrate_legacy(conn, now=datetime(2025, 11, 2)) == 3
+
+    sql = executed_sql(conn)
+    assert any('CREATE TABLE "message_p2025_09"' in s for s in sql)
+    assert any('CREATE TABLE "message_p2025_10"' in s for s in sql)
+    assert any("content #>> '{}'" in s for s in sql)
+    assert sql[-1] == 'DROP TABLE "message_unpartitioned"'
+
+    results["count(*)"] = 4
+    with pytest.raises(RuntimeError):
+        await manager.migrate_legacy(conn, now=datetime(2025, 11, 2))
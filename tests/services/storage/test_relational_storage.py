@@ -0,0 +1,125 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+
+from app.services.storage.relational_storage import (
+    RelationalStorage,
+    messages_page_query,
+)
+
+
+def compile_sql(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_messages_page_query_uses_keyset_not_offset():
+    cursor = (datetime(2025, 1, 1), 42)
+    sql = compile_sql(messages_page_query("conv-1", limit=20, after=cursor))
+
+    assert "OFFSET" not in sql
+    assert "(message.created_at, message.id) >" in sql
+    assert "ORDER BY message.created_at ASC, message.id ASC" in sql
+
+
+def test_messages_page_query_reads_backwards_for_latest_and_before():
+    latest_sql = compile_sql(messages_page_query("conv-1", latest=True))
+    before_sql = compile_sql(
+        messages_page_query("conv-1", before=(datetime(2025, 1, 1), 42))
+    )
+
+    for sql in (latest_sql, before_sql):
+        assert "ORDER BY message.created_at DESC, message.id DESC" in sql
+    assert "(message.created_at, message.id) <" in before_sql
+
+
+@pytest.mark.asyncio
+async def test_get_dispatches_on_filters():
+    storage = RelationalStorage()
+    storage.get_messages = AsyncMock(return_value=[{"id": 1}])
+    storage.get_conversation = AsyncMock(return_value=None)
+
+    assert await storage.get({"conversation_id": "conv-1", "limit": 5, "latest": True}) == [{"id": 1}]
+    storage.get_messages.assert_awaited_once_with(
+        "conv-1", limit=5, before=None, after=None, latest=True, after_id=None
+    )
+    assert await storage.get({"id": "missing"}) == []
+
+    with pytest.raises(ValueError):
+        await storage.get({"topic": "IA"})
+
+
+@pytest.mark.asyncio
+async def test_save_many_skips_turns_already_stored():
+    storage = RelationalStorage()
+    session = AsyncMock()
+    session.begin = MagicMock(return_value=AsyncMock())
+    storage.session_local = MagicMock(return_value=AsyncMock(__aenter__=AsyncMock(return_value=session)))
+    created_at = datetime(2025, 1, 1)
+
+    await storage.save_many(
+        [
+            {
+                "turn_id": "t1",
+                "conversation_id": "conv-1",
+                "created_at": created_at,
+                "messages": [
+                    {"role": "user", "content": "hola"},
+                    {"role": "assistant", "content": "adiós"},
+                ],
+            }
+        ]
+    )
+
+    statement, rows = session.execute.await_args.args
+    assert "ON CONFLICT DO NOTHING" in compile_sql(statement)
+    assert [(r["turn_id"], r["turn_position"]) for r in rows] == [("t1", 0), ("t1", 1)]
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_copies_records_in_column_order():
+    storage = RelationalStorage()
+    copied = {}
+
+    async def copy_records_to_table(table, records, columns):
+        copied[table] = (columns, list(records))
+        return f"COPY {len(copied[table][1])}"
+
+    driver = MagicMock()
+    driver.transaction.return_value = AsyncMock()
+    driver.copy_records_to_table = AsyncMock(side_effect=copy_records_to_table)
+    conn = AsyncMock()
+    conn.get_raw_connection.return_value = MagicMock(driver_connection=driver)
+    storage.engine = MagicMock()
+    storage.engine.connect.return_value = AsyncMock(__aenter__=AsyncMock(return_value=conn))
+    created_at = datetime(2025, 1, 1)
+
+    loaded = await storage.bulk_load(
+        {
+            "conversations": [
+                {"id": "conv-1", "topic": "IA", "stance": "En contra", "created_at": created_at}
+            ],
+            "messages": (
+                m
+                for m in [
+                    {"conversation_id": "conv-1", "role": "user", "content": "hola", "created_at": created_at},
+                    {"conversation_id": "conv-1", "role": "assistant", "content": {"texto": "adiós"}, "created_at": created_at},
+                ]
+            ),
+        }
+    )
+
+    assert loaded == [{"table": "conversation", "count": 1}, {"table": "message", "count": 2}]
+    driver.transaction.assert_called_once()
+    assert copied["conversation"] == (
+        ["id", "topic", "stance", "created_at"],
+        [("conv-1", "IA", "En contra", created_at)],
+    )
+    assert copied["message"] == (
+        ["conversation_id", "role", "content", "created_at"],
+        [
+            ("conv-1", "user", "hola", created_at),
+            # non-string content is stored as its JSON text
+            ("conv-1", "assistant", '{"texto": "adi\\u00f3s"}', created_at),
+        ],
+    )
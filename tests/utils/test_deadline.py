@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from app.utils.deadline import Deadline, DeadlineExceeded
+
+
+def test_timeout_is_capped_by_remaining_budget():
+    deadline = Deadline(10)
+
+    assert deadline.timeout(cap=2) == 2
+    assert 9 < deadline.timeout() <= 10
+
+
+def test_timeout_raises_once_expired():
+    deadline = Deadline(0)
+
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout()
+
+
+@pytest.mark.asyncio
+async def test_run_distinguishes_step_timeout_from_exhausted_budget():
+    deadline = Deadline(5)
+    with pytest.raises(asyncio.TimeoutError) as step_timeout:
+        await deadline.run(asyncio.sleep(1), cap=0.01)
+    assert not isinstance(step_timeout.value, DeadlineExceeded)
+
+    short = Deadline(0.01)
+    with pytest.raises(DeadlineExceeded):
+        await short.run(asyncio.sleep(1))
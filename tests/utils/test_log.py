@@ -0,0 +1,98 @@
+import json
+import logging
+import queue
+
+import pytest
+
+import app.utils.log as log_mod
+from app.utils.log import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    compact,
+    get_logger,
+    parse_sample_rates,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    handler = ListHandler()
+    logger = logging.getLogger("carax.test")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield handler
+    logger.removeHandler(handler)
+    monkeypatch.setattr(log_mod, "_sample_rates", {})
+
+
+def test_compact_truncates_and_hashes_long_strings():
+    text = "argumento " * 100
+
+    summary = compact(text, max_chars=20)
+
+    assert summary.startswith(text[:20])
+    assert f"[{len(text)} chars sha1:" in summary
+    assert compact(text, max_chars=20) == summary
+    assert compact("corto", max_chars=20) == "corto"
+
+
+def test_compact_replaces_containers_by_their_size():
+    history = [{"role": "user", "content": "x" * 1000}] * 30
+
+    assert compact(history) == "<list len=30>"
+    assert compact(42) == 42
+
+
+def test_events_below_level_are_skipped(captured):
+    logger = get_logger("test")
+
+    logger.debug("turn.context", content="x" * 10_000)
+    logger.info("turn.done", tokens=12)
+
+    assert [r.getMessage() for r in captured.records] == ["turn.done"]
+    assert captured.records[0].fields == {"tokens": 12}
+
+
+def test_info_events_are_sampled_but_warnings_are_not(captured, monkeypatch):
+    monkeypatch.setattr(log_mod, "_sample_rates", {"hot.event": 0.0})
+    logger = get_logger("test")
+
+    for _ in range(10):
+        logger.info("hot.event")
+    logger.warning("hot.event")
+
+    assert [r.levelno for r in captured.records] == [logging.WARNING]
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("carax", logging.INFO, __file__, 1, "event", None, None)
+
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.dropped == 1
+
+
+def test_json_formatter_renders_event_and_fields():
+    record = logging.LogRecord("carax.api", logging.INFO, __file__, 1, "turn", None, None)
+    record.fields = {"conversation_id": "c-1", "tokens": 10}
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["event"] == "turn"
+    assert entry["level"] == "info"
+    assert entry["conversation_id"] == "c-1"
+
+
+def test_parse_sample_rates_skips_malformed_pairs():
+    assert parse_sample_rates("a=0.5, b=2,c=x,") == {"a": 0.5, "b": 1.0}
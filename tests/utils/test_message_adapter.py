@@ -1,8 +1,14 @@
 
 
 import pytest
+from app.domain.message import MessageModel
 from app.utils.message_adapter import (
+    decode_history,
+    encode_history,
     format_conversation,
+    from_compact,
+    render_compact_history,
+    to_compact,
     message_from_user_input,
     message_from_llm_output,
 )
@@ -31,4 +37,46 @@ def test_message_from_user_input_strips_text():
 def test_message_from_llm_output_strips_text():
     text = "   Sí, tenemos camionetas de varias marcas.   "
     expected = {"role": "assistant", "content": "Sí, tenemos camionetas de varias marcas."}
-    assert message_from_llm_output(text) == expected
\ No newline at end of file
+    assert message_from_llm_output(text) == expected
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"role": "user", "content": "Hola: ¿empezamos?"},
+        {"role": "assistant", "content": "Línea 1\n  Línea 2 "},
+        {"role": "system", "content": ""},
+    ],
+)
+def test_compact_round_trip_is_lossless(message):
+    compact = to_compact(message)
+    assert compact == MessageModel(**message, created_at=None).compact_version
+    assert from_compact(compact) == message
+    assert decode_history(encode_history([message])) == [message]
+
+
+def test_from_compact_keeps_legacy_dicts_and_rejects_garbage():
+    legacy = {"role": "user", "content": "hola"}
+    assert from_compact(legacy) is legacy
+    with pytest.raises(ValueError):
+        from_compact("x:hola")
+    with pytest.raises(ValueError):
+        MessageModel.from_compact("sin separador")
+
+
+def test_encode_history_leaves_entries_it_cannot_restore():
+    entries = [{"role": "user", "content": "a", "id": 1}, {"role": "bot", "content": "b"}, 7]
+    assert encode_history(entries) == entries
+    with pytest.raises(ValueError):
+        to_compact(entries[0])
+
+
+def test_render_compact_history_one_line_per_message():
+    rendered = render_compact_history(
+        [
+            {"role": "user", "content": "hola\n  mundo"},
+            {"role": "assistant", "content": "adiós"},
+        ]
+    )
+    assert rendered == "u: hola mundo\na: adiós"
+
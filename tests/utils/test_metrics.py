@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.metrics import REGISTRY, record_llm_usage, render, timed
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_timed_records_duration_and_in_flight_calls():
+    seen_in_flight = []
+
+    @timed("test.async")
+    async def work():
+        seen_in_flight.append(sample("carax_stage_in_flight", stage="test.async"))
+        return "done"
+
+    before = sample("carax_stage_duration_seconds_count", stage="test.async")
+
+    assert await work() == "done"
+
+    assert seen_in_flight == [1.0]
+    assert sample("carax_stage_in_flight", stage="test.async") == 0
+    assert sample("carax_stage_duration_seconds_count", stage="test.async") == before + 1
+
+
+def test_timed_counts_errors_of_sync_functions():
+    @timed("test.sync")
+    def fail():
+        raise RuntimeError("boom")
+
+    before = sample("carax_stage_errors_total", stage="test.sync")
+
+    with pytest.raises(RuntimeError):
+        fail()
+
+    assert sample("carax_stage_errors_total", stage="test.sync") == before + 1
+    assert sample("carax_stage_in_flight", stage="test.sync") == 0
+
+
+def test_record_llm_usage_counts_tokens_by_kind():
+    usage = SimpleNamespace(
+        prompt_tokens=120,
+        completion_tokens=30,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=100),
+    )
+
+    record_llm_usage("test-model", usage)
+    record_llm_usage("test-model", None)
+
+    assert sample("carax_llm_tokens_total", model="test-model", kind="prompt") == 120
+    assert sample("carax_llm_tokens_total", model="test-model", kind="cached") == 100
+    assert sample("carax_llm_tokens_total", model="test-model", kind="completion") == 30
+    payload, content_type = render()
+    assert b'carax_llm_tokens_total{kind="prompt",model="test-model"} 120.0' in payload
+    assert content_type.startswith("text/plain")
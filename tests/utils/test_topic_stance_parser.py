@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.utils.topic_stance_parser import extract_topic_and_stance
+
+CORPUS_PATH = Path(__file__).parents[2] / "benchmarks" / "data" / "topic_stance_corpus.jsonl"
+MIN_CONFIDENCE = 0.8
+
+CORPUS = [json.loads(line) for line in CORPUS_PATH.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["message"][:40] for c in CORPUS])
+def test_extracts_corpus_openers_or_defers_to_llm(case):
+    result = extract_topic_and_stance(case["message"])
+
+    if case["topic"] is None:
+        # never guess: ambiguous openers must fall back to the LLM
+        assert result.confidence < MIN_CONFIDENCE
+    else:
+        assert result.confidence >= MIN_CONFIDENCE
+        assert result.meta.topic == case["topic"]
+        assert result.meta.stance == case["stance"]
+
+
+def test_corpus_hit_rate_covers_most_readme_style_openers():
+    parseable = [c for c in CORPUS if c["topic"] is not None]
+    hits = [
+        c for c in parseable
+        if extract_topic_and_stance(c["message"]).confidence >= MIN_CONFIDENCE
+    ]
+
+    assert len(hits) / len(parseable) >= 0.9
+
+
+def test_long_or_questioning_extractions_get_low_confidence():
+    result = extract_topic_and_stance(
+        "Vamos a debatir sobre si deberíamos o no permitir que las personas mayores "
+        "de setenta años sigan conduciendo sus autos, tu postura es ¿a favor?"
+    )
+
+    assert result.meta is not None
+    assert result.confidence < MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # topic cut at "tu", leaving a dangling preposition
+        "Debate sobre el uso de tu teléfono en clase, estás en contra",
+        # the user's own opinion competes with a bare "no"
+        "Hablemos de los impuestos. Yo creo que los impuestos son altos, tú crees que no",
+        # stance starts with a preposition and two stance patterns disagree
+        "Hablemos de lo que piensas sobre la IA, estás a favor",
+        # stance runs into the user's side of the debate
+        "Vamos a debatir sobre el aborto, tu postura es a favor y la mía en contra",
+    ],
+)
+def test_misread_extractions_get_low_confidence(message):
+    result = extract_topic_and_stance(message)
+
+    assert result.meta is not None
+    assert result.confidence < MIN_CONFIDENCE